@@ -0,0 +1,2 @@
+# benchmarks package initialization
+# Micro-benchmarks and fixtures for performance regression checks
@@ -0,0 +1,84 @@
+"""
+Render micro-benchmarks for weather/formatter.py.
+
+Usage:
+    python -m benchmarks.bench_render [--min-time 1.0] [--json]
+
+Reports renders/second for current, forecast and AQI payloads so regressions show up
+as a drop between runs.
+"""
+import argparse
+import copy
+import json
+import os
+import time
+
+from weather.formatter import (
+    build_comparison_embed,
+    build_outlook_embed,
+    build_weather_embed,
+    format_air_quality,
+    format_current_weather,
+    format_forecast,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def measure(fn, min_time: float) -> tuple[int, float]:
+    """
+    Calls `fn` in growing batches until at least `min_time` seconds have elapsed.
+    Returns (calls, seconds).
+    """
+    calls, batch, elapsed = 0, 1, 0.0
+    while elapsed < min_time:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        elapsed += time.perf_counter() - start
+        calls += batch
+        batch *= 2
+    return calls, elapsed
+
+def build_cases() -> dict:
+    current = load_fixture("current")
+    forecast = load_fixture("forecast")
+    air = load_fixture("air_quality")
+    rows = [(name, dict(current, name=name)) for name in ("Delhi", "Patna", "Mumbai", "Kolkata")]
+
+    return {
+        "current.text": lambda: format_current_weather(current),
+        "current.embed": lambda: build_weather_embed(current),
+        # A fresh payload each call measures the one-off columnar parse
+        "forecast.slots.cold": lambda: format_forecast(copy.copy(forecast)),
+        "forecast.slots": lambda: format_forecast(forecast),
+        "forecast.daily": lambda: format_forecast(forecast, count=5, mode="daily"),
+        "forecast.embed": lambda: build_outlook_embed(forecast),
+        "compare.embed": lambda: build_comparison_embed(rows, ["Atlantis"]),
+        "aqi.text": lambda: format_air_quality(air),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark weather render paths.")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to spend on each case.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn in build_cases().items():
+        calls, elapsed = measure(fn, args.min_time)
+        results[name] = {"renders_per_sec": calls / elapsed, "us_per_render": elapsed / calls * 1e6}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'case':<22}{'renders/s':>14}{'µs/render':>12}")
+    for name, result in results.items():
+        print(f"{name:<22}{result['renders_per_sec']:>14,.0f}{result['us_per_render']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
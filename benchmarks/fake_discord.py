@@ -0,0 +1,267 @@
+"""
+Offline stand-ins for the Discord gateway and REST API, and for the weather upstreams.
+
+FakeDiscord populates a bot's connection state with one guild, channel and set of users
+(as a GUILD_CREATE would), then builds real `discord.Message` and `discord.Interaction`
+objects for commands to run against. Everything the library would send to Discord is
+answered in-process by FakeREST and FakeWebhookAdapter with minimal valid payloads.
+"""
+import asyncio
+import copy
+import itertools
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import discord
+from discord.webhook.async_ import async_context
+
+from benchmarks.bench_render import load_fixture
+from utils.http import HTTPService
+
+_snowflakes = itertools.count(1_100_000_000_000_000_000)
+
+def snowflake() -> int:
+    return next(_snowflakes)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+# -----------------------------
+# 🧱 PAYLOADS
+# -----------------------------
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "global_name": name, "avatar": None, "bot": bot}
+
+def member_payload(user: dict) -> dict:
+    return {"user": user, "roles": [], "joined_at": _now(), "deaf": False, "mute": False, "flags": 0}
+
+def message_payload(channel_id: int, guild_id: int | None, author: dict, content: str = "", **extra) -> dict:
+    payload = {
+        "id": str(snowflake()),
+        "channel_id": str(channel_id),
+        "author": author,
+        "content": content,
+        "timestamp": _now(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+        "components": [],
+        **extra,
+    }
+    if guild_id is not None:
+        payload["guild_id"] = str(guild_id)
+        payload["member"] = {k: v for k, v in member_payload(author).items() if k != "user"}
+    return payload
+
+# -----------------------------
+# 🌐 FAKE REST
+# -----------------------------
+
+class FakeREST:
+    """
+    Replaces `HTTPClient.request`. Sleeps for the configured latency, counts calls per
+    route and answers with the smallest payload the library accepts.
+    """
+
+    def __init__(self, discord_fake: "FakeDiscord", latency: float = 0.0, jitter: float = 0.0):
+        self.fake = discord_fake
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter = Counter()
+
+    async def delay(self):
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        self.calls[f"{route.method} {route.path}"] += 1
+        await self.delay()
+
+        payload = kwargs.get("json") or {}
+        last = route.url.rstrip("/").rsplit("/", 1)[-1]
+
+        if route.path.endswith("/messages") and route.method == "POST":
+            return message_payload(route.channel_id, self.fake.guild_id, self.fake.bot_user, payload.get("content") or "")
+        if "/messages/{message_id}" in route.path and route.method in ("PATCH", "GET"):
+            return message_payload(route.channel_id, self.fake.guild_id, self.fake.bot_user, payload.get("content") or "")
+        if route.path.endswith("/members/{member_id}") and route.method == "GET":
+            return member_payload(self.fake.users[int(last)])
+        if route.path.startswith("/users/{user_id}") and route.method == "GET":
+            return self.fake.users.get(int(last)) or user_payload(int(last), f"user{last}")
+        if route.path.endswith("/emojis") and route.method == "POST":
+            return {"id": str(snowflake()), "name": payload.get("name"), "roles": [], "animated": False,
+                    "require_colons": True, "managed": False, "available": True}
+        return None
+
+class FakeWebhookAdapter:
+    """
+    Stands in for discord.py's webhook adapter, which carries every interaction response
+    and followup. Message-returning calls get a message payload; the rest get None.
+    """
+
+    def __init__(self, rest: FakeREST):
+        self.rest = rest
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            self.rest.calls[f"webhook {name}"] += 1
+            await self.rest.delay()
+            fake = self.rest.fake
+            if name in ("execute_webhook", "get_original_interaction_response", "edit_original_interaction_response",
+                        "get_webhook_message", "edit_webhook_message"):
+                return message_payload(fake.channel_id, fake.guild_id, fake.bot_user)
+            return None
+        return call
+
+# -----------------------------
+# 🌦️ FIXTURE UPSTREAMS
+# -----------------------------
+
+class FixtureHTTPService(HTTPService):
+    """
+    HTTPService that answers OpenWeatherMap and AQI requests from the benchmark fixtures
+    after `latency` seconds, without touching the network.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.fixtures = {name: load_fixture(name) for name in ("current", "forecast", "air_quality")}
+
+    async def get_json(self, url: str, *, params: dict | None = None, headers: dict | None = None,
+                       retries: int = 1, timeout=None, before_retry=None) -> tuple[int, object]:
+        started = time.perf_counter()
+        await asyncio.sleep(self.latency)
+        if "/forecast" in url:
+            data = self.fixtures["forecast"]
+        elif "/weather" in url:
+            data = self.fixtures["current"]
+        elif "airquality" in url:
+            data = self.fixtures["air_quality"]
+        else:
+            self._record(url, started, True)
+            return 404, {"message": "not found"}
+        self._record(url, started, True)
+        return 200, copy.deepcopy(data)
+
+# -----------------------------
+# 🎭 FAKE DISCORD
+# -----------------------------
+
+class FakeDiscord:
+    """
+    One guild with a text channel, an owner who issues commands, `member_count` other
+    members and a few custom emojis, loaded into `bot`'s connection state.
+    """
+
+    def __init__(self, bot: discord.Client, rest_latency: float = 0.0, rest_jitter: float = 0.0,
+                 member_count: int = 50, emoji_count: int = 20):
+        self.bot = bot
+        self.state = bot._connection
+        self.rest = FakeREST(self, rest_latency, rest_jitter)
+
+        self.guild_id = snowflake()
+        self.channel_id = snowflake()
+        self.application_id = snowflake()
+        self.bot_user = user_payload(snowflake(), "Rishource", bot=True)
+        self.owner = user_payload(snowflake(), "owner")
+        self.members = [user_payload(snowflake(), f"member{i}") for i in range(member_count)]
+        self.users = {int(u["id"]): u for u in (self.bot_user, self.owner, *self.members)}
+        self.emojis = [
+            {"id": str(snowflake()), "name": f"emoji{i}", "roles": [], "animated": i % 5 == 0,
+             "require_colons": True, "managed": False, "available": True}
+            for i in range(emoji_count)
+        ]
+
+    async def install(self):
+        """
+        Routes the bot's REST and webhook traffic to the fakes and creates the guild.
+        """
+        # What login() would do first: bind the client to the running loop
+        await self.bot._async_setup_hook()
+        self.bot.http.request = self.rest.request
+        async_context.set(FakeWebhookAdapter(self.rest))
+
+        self.state.user = discord.ClientUser(state=self.state, data=self.bot_user)
+        self.state.application_id = self.application_id
+
+        guild_payload = {
+            "id": str(self.guild_id),
+            "name": "Load Test",
+            "owner_id": self.owner["id"],
+            "roles": [{"id": str(self.guild_id), "name": "@everyone", "permissions": "0", "position": 0,
+                       "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+            "channels": [{"id": str(self.channel_id), "type": 0, "name": "general", "position": 0,
+                          "permission_overwrites": [], "guild_id": str(self.guild_id)}],
+            "members": [member_payload(self.bot_user)],
+            "emojis": self.emojis,
+            "stickers": [],
+            "member_count": len(self.users),
+        }
+        self.guild = discord.Guild(data=guild_payload, state=self.state)
+        self.state._add_guild(self.guild)
+        self.channel = self.guild.get_channel(self.channel_id)
+
+    def random_member_id(self) -> int:
+        return int(random.choice(self.members)["id"])
+
+    def message(self, content: str) -> discord.Message:
+        """
+        A message from the guild owner in the test channel, as MESSAGE_CREATE would deliver it.
+        """
+        data = message_payload(self.channel_id, self.guild_id, self.owner, content)
+        return discord.Message(state=self.state, channel=self.channel, data=data)
+
+    def interaction(self, name: str, **options) -> discord.Interaction:
+        """
+        A slash command invocation by the guild owner, as INTERACTION_CREATE would deliver it.
+        """
+        data = {
+            "id": str(snowflake()),
+            "application_id": str(self.application_id),
+            "type": 2,
+            "token": "offline",
+            "version": 1,
+            "guild_id": str(self.guild_id),
+            "channel_id": str(self.channel_id),
+            "channel": {"id": str(self.channel_id), "type": 0},
+            "member": {**member_payload(self.owner), "permissions": str(discord.Permissions.all().value)},
+            "app_permissions": str(discord.Permissions.all().value),
+            "locale": "en-US",
+            "data": {
+                "id": str(snowflake()),
+                "name": name,
+                "type": 1,
+                "options": [{"name": key, "type": 3, "value": value} for key, value in options.items()],
+            },
+        }
+        return discord.Interaction(data=data, state=self.state)
+
+    async def run_message(self, content: str) -> bool:
+        """
+        Runs a prefix command to completion. Returns False if it failed.
+        """
+        ctx = await self.bot.get_context(self.message(content))
+        if ctx.command is None:
+            raise LookupError(f"no command for {content!r}")
+        await self.bot.invoke(ctx)
+        return not ctx.command_failed
+
+    async def run_interaction(self, name: str, **options) -> bool:
+        """
+        Runs a slash command to completion through the command tree. Returns False if it failed.
+        """
+        interaction = self.interaction(name, **options)
+        # What the tree does for INTERACTION_CREATE, awaited here instead of spawned
+        await self.bot.tree._call(interaction)
+        return not interaction.command_failed
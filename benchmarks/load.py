@@ -0,0 +1,241 @@
+"""
+Offline load test for the command paths of the real cogs.
+
+Usage:
+    python -m benchmarks.load [--duration 30] [--rate weather=20 --rate kick=5 ...]
+                              [--rest-latency 0.05] [--upstream-latency 0.15] [--json]
+                              [--upstream sim [--upstream-error 503=0.02 ...]]
+
+Loads WeatherCog, AirQuality, EmojiStickerCog, Moderation and TicTacToeCog into the
+bot from bot.py, without logging in, and feeds them commands from an open-loop Poisson
+arrival process per scenario. Discord REST and interaction responses are answered by
+benchmarks.fake_discord. Weather and AQI answers come straight from the fixtures, or with
+--upstream sim over real HTTP from benchmarks.upstream_sim, so the client's connection
+pooling, retries and error handling are part of the measurement.
+
+Reports per-scenario throughput and latency percentiles, event-loop lag, and the
+number of Discord REST calls and upstream requests the commands made.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+# Before bot.py reads its configuration
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("WEATHER_API_KEY", "offline")
+os.environ.setdefault("RAPIDAPI_KEY", "offline")
+
+from config import UPSTREAM_RATE_LIMITS
+from benchmarks.fake_discord import FakeDiscord, FixtureHTTPService
+from benchmarks.upstream_sim import UpstreamSimulator, run_in_thread
+from utils.http import HTTPService, set_http_service
+from weather.gazetteer import get_gazetteer
+
+EXTENSIONS = ["cogs.weather_cog", "cogs.air_cog", "cogs.emoji_cog", "cogs.moderation_cog", "cogs.game_cog"]
+
+LAG_INTERVAL = 0.05  # seconds between event-loop lag probes
+
+# name -> (default requests/second, coroutine function(fake, city) -> ok)
+SCENARIOS = {
+    "weather": (10.0, lambda fake, city: fake.run_message(f"!weather {city}")),
+    "weather.slash": (5.0, lambda fake, city: fake.run_interaction("weather", city=city)),
+    "forecast": (5.0, lambda fake, city: fake.run_message(f"!forecast {city}")),
+    "air.slash": (5.0, lambda fake, city: fake.run_interaction("air", city=city)),
+    "emojilist": (2.0, lambda fake, city: fake.run_message("!emojilist")),
+    "kick": (2.0, lambda fake, city: fake.run_message(f"!kick {fake.random_member_id()} load test")),
+    "tictactoe": (2.0, lambda fake, city: fake.run_message("!tictactoe")),
+}
+
+def percentile(samples: list[float], q: float) -> float | None:
+    """
+    Nearest-rank percentile of `samples`, in milliseconds (None when empty).
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+class ScenarioStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.sent = 0
+        self.errors = 0
+
+    def summary(self, duration: float) -> dict:
+        return {
+            "sent": self.sent,
+            "errors": self.errors,
+            "throughput": len(self.latencies) / duration,
+            "p50_ms": percentile(self.latencies, 0.5),
+            "p95_ms": percentile(self.latencies, 0.95),
+            "p99_ms": percentile(self.latencies, 0.99),
+            "max_ms": percentile(self.latencies, 1.0),
+        }
+
+def parse_rates(values: list[str]) -> dict[str, float]:
+    """
+    "weather=20" pairs -> {"weather": 20.0}. With none given, every scenario runs at its default rate.
+    """
+    if not values:
+        return {name: rate for name, (rate, _) in SCENARIOS.items()}
+    rates = {}
+    for value in values:
+        name, _, rate = value.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        rates[name] = float(rate)
+    return rates
+
+async def monitor_loop_lag(samples: list[float], stop: asyncio.Event):
+    """
+    Samples how late a LAG_INTERVAL sleep wakes up; anything beyond it is time the
+    loop spent running other callbacks.
+    """
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_INTERVAL))
+
+async def drive(name: str, rate: float, fake: FakeDiscord, cities: list[str], stats: ScenarioStats,
+                deadline: float, pending: set):
+    """
+    Starts one command every Exp(rate) seconds until `deadline`, without waiting for
+    earlier ones to finish, so a slow bot builds a backlog instead of slowing the arrivals.
+    """
+    run = SCENARIOS[name][1]
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            ok = await run(fake, random.choice(cities))
+        except Exception:
+            ok = False
+        stats.latencies.append(time.perf_counter() - started)
+        stats.errors += not ok
+
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while True:
+        next_at += random.expovariate(rate)
+        if next_at >= deadline:
+            return
+        await asyncio.sleep(max(0.0, next_at - loop.time()))
+        stats.sent += 1
+        task = asyncio.create_task(one())
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+async def run_load(args) -> dict:
+    from bot import bot
+
+    fake = FakeDiscord(bot, rest_latency=args.rest_latency, rest_jitter=args.rest_latency / 2)
+    await fake.install()
+
+    stop_simulator = simulator = None
+    if args.upstream == "sim":
+        simulator = UpstreamSimulator(
+            latency=args.upstream_latency,
+            jitter=args.upstream_latency / 2,
+            errors={int(status): float(rate) for status, _, rate in (e.partition("=") for e in args.upstream_error or [])},
+            seed=args.seed,
+        )
+        stop_simulator = run_in_thread(simulator)
+        os.environ.update(simulator.env())
+        bot.http_service = HTTPService()
+    else:
+        bot.http_service = FixtureHTTPService(latency=args.upstream_latency)
+    set_http_service(bot.http_service)
+    for extension in EXTENSIONS:
+        await bot.load_extension(extension)
+
+    cities = [city.name for city in get_gazetteer().cities[:args.cities]]
+    rates = parse_rates(args.rate)
+    stats = {name: ScenarioStats() for name in rates}
+    lag: list[float] = []
+    pending: set[asyncio.Task] = set()
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+    started = time.perf_counter()
+    deadline = asyncio.get_running_loop().time() + args.duration
+
+    await asyncio.gather(*(
+        drive(name, rate, fake, cities, stats[name], deadline, pending) for name, rate in rates.items() if rate > 0
+    ))
+    # Let in-flight commands finish; their time counts towards the run
+    while pending:
+        await asyncio.wait(set(pending))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await monitor
+    upstream = {host: stat["requests"] for host, stat in bot.http_service.stats().items()}
+    await bot.http_service.close()
+    set_http_service(None)
+    if stop_simulator is not None:
+        stop_simulator()
+
+    return {
+        "duration": round(elapsed, 2),
+        "scenarios": {name: stat.summary(elapsed) for name, stat in stats.items()},
+        "loop_lag": {
+            "p50_ms": percentile(lag, 0.5),
+            "p99_ms": percentile(lag, 0.99),
+            "max_ms": percentile(lag, 1.0),
+        },
+        "rest_calls": dict(fake.rest.calls.most_common()),
+        "upstream_requests": upstream,
+        "upstream_faults": simulator.stats()["faults"] if simulator else {},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive synthetic command traffic through the cogs, offline.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic to generate.")
+    parser.add_argument("--rate", action="append", metavar="NAME=RPS",
+                        help=f"Arrival rate for a scenario; repeatable. Scenarios: {', '.join(SCENARIOS)}.")
+    parser.add_argument("--rest-latency", type=float, default=0.05, help="Seconds per fake Discord REST call.")
+    parser.add_argument("--upstream-latency", type=float, default=0.15, help="Seconds per fake weather/AQI request.")
+    parser.add_argument("--upstream", choices=("fixtures", "sim"), default="fixtures",
+                        help="Serve weather/AQI from in-process fixtures or over HTTP from the upstream simulator.")
+    parser.add_argument("--upstream-error", action="append", metavar="STATUS=RATE",
+                        help="With --upstream sim, answer this fraction of requests with the status; repeatable.")
+    parser.add_argument("--cities", type=int, default=200, help="Pick cities from the first N gazetteer entries.")
+    parser.add_argument("--real-quotas", action="store_true",
+                        help="Keep the configured upstream rate limits instead of lifting them.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for arrivals and inputs.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not args.real_quotas:
+        # The fixtures cost nothing; measure the bot rather than the quota
+        for upstream in UPSTREAM_RATE_LIMITS:
+            os.environ.setdefault(f"{upstream.upper()}_RATE_PER_MINUTE", "1000000")
+            os.environ.setdefault(f"{upstream.upper()}_RATE_BURST", "1000000")
+    results = asyncio.run(run_load(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<16}{'sent':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in results["scenarios"].items():
+        cells = [s[key] if s[key] is not None else float("nan") for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:<16}{s['sent']:>7}{s['errors']:>8}{s['throughput']:>9.1f}" + "".join(f"{c:>10.1f}" for c in cells))
+
+    lag = results["loop_lag"]
+    print(f"\nevent-loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms")
+    print("\nDiscord REST calls:")
+    for route, count in results["rest_calls"].items():
+        print(f"  {count:>7}  {route}")
+    print("\nupstream requests:")
+    for host, count in results["upstream_requests"].items():
+        print(f"  {count:>7}  {host}")
+    for fault, count in results["upstream_faults"].items():
+        print(f"  {count:>7}  {fault} (injected)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Local stand-in for the OpenWeatherMap, API Ninjas AQI and Wikipedia endpoints the bot calls.
+
+Usage:
+    python -m benchmarks.upstream_sim [--port 8090] [--latency 0.1] [--jitter 0.05]
+                                      [--error 429=0.05 --error 503=0.02] [--timeouts 0.01]
+                                      [--quota openweathermap=60] [--seed 1]
+
+Replays the recorded fixtures in benchmarks/fixtures with the place names from each
+request filled in. Unknown cities get the same 404 OpenWeatherMap gives. Latency, jitter,
+injected errors, hung requests and per-key quotas are configurable and reproducible
+with --seed. On start it prints the *_BASE_URL variables (see config.py) that point the
+bot at it. GET /_stats returns the request and fault counts.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import random
+import re
+import threading
+from collections import Counter
+
+from aiohttp import web
+
+from benchmarks.bench_render import FIXTURES_DIR, load_fixture
+from config import UPSTREAM_RATE_LIMITS
+from utils.ratelimit import TokenBucket
+from weather.gazetteer import resolve_city
+
+HANG_SECONDS = 60  # a "timeout" answers after this, well past the bot's request timeouts
+
+# Error bodies in each upstream's own format
+ERROR_BODIES = {
+    "openweathermap": lambda status: {"cod": status, "message": "simulated error" if status != 429 else
+                                      "Your account is temporary blocked due to exceeding of requests limitation"},
+    "rapidapi": lambda status: {"message": "simulated error" if status != 429 else
+                                "You have exceeded the rate limit per minute for your plan"},
+    "wikipedia": lambda status: {"error": "simulated error"},
+}
+
+class UpstreamSimulator:
+    """
+    aiohttp.web application answering like the real upstreams. `errors` maps an HTTP
+    status to the fraction of requests that get it; `quotas` maps an upstream to the
+    requests per minute each API key may make before receiving 429s.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, errors: dict[int, float] | None = None,
+                 timeout_rate: float = 0.0, quotas: dict[str, float] | None = None, seed: int | None = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = errors or {}
+        self.timeout_rate = timeout_rate
+        self.quotas = quotas or {}
+        self.random = random.Random(seed)
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url: str | None = None
+
+        self.current = load_fixture("current")
+        self.forecast = load_fixture("forecast")
+        self.air_quality = load_fixture("air_quality")
+        with open(f"{FIXTURES_DIR}/wiki.html", encoding="utf-8") as f:
+            self.wiki = f.read()
+
+        self.requests: Counter = Counter()
+        self.faults: Counter = Counter()
+
+    # -----------------------------
+    # 🔌 LIFECYCLE
+    # -----------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/data/2.5/weather", self._owm_current)
+        app.router.add_get("/data/2.5/forecast", self._owm_forecast)
+        app.router.add_get("/v1/airquality", self._air_quality)
+        app.router.add_get("/wiki/{title}", self._wiki)
+        app.router.add_get("/_stats", self._stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Starts listening (port 0 picks a free one) and returns the base URL.
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def env(self) -> dict[str, str]:
+        """
+        The config.py overrides that send the bot's upstream traffic here.
+        """
+        return {
+            "OPENWEATHERMAP_BASE_URL": f"{self.base_url}/data/2.5",
+            "RAPIDAPI_BASE_URL": f"{self.base_url}/v1/airquality",
+            "WIKIPEDIA_BASE_URL": f"{self.base_url}/wiki",
+        }
+
+    def stats(self) -> dict:
+        return {"requests": dict(self.requests), "faults": dict(self.faults)}
+
+    # -----------------------------
+    # 💥 FAULTS
+    # -----------------------------
+
+    async def _faults(self, upstream: str, api_key: str | None) -> web.Response | None:
+        """
+        Applies latency and the configured faults. Returns the error response to send, if any.
+        """
+        self.requests[upstream] += 1
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+        roll = self.random.random()
+        if roll < self.timeout_rate:
+            self.faults[f"{upstream} timeout"] += 1
+            await asyncio.sleep(HANG_SECONDS)
+            return web.json_response(ERROR_BODIES[upstream](504), status=504)
+
+        await asyncio.sleep(delay)
+
+        if not self._within_quota(upstream, api_key):
+            self.faults[f"{upstream} quota"] += 1
+            return web.json_response(ERROR_BODIES[upstream](429), status=429, headers={"Retry-After": "1"})
+
+        roll -= self.timeout_rate
+        for status, rate in self.errors.items():
+            if roll < rate:
+                self.faults[f"{upstream} {status}"] += 1
+                return web.json_response(ERROR_BODIES[upstream](status), status=status)
+            roll -= rate
+        return None
+
+    def _within_quota(self, upstream: str, api_key: str | None) -> bool:
+        per_minute = self.quotas.get(upstream)
+        if per_minute is None:
+            return True
+        key = (upstream, api_key or "")
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # Same burst allowance the bot assumes for this upstream
+            burst = UPSTREAM_RATE_LIMITS.get(upstream, (60, 10))[1]
+            bucket = self._buckets[key] = TokenBucket(f"sim:{upstream}", per_minute / 60, burst)
+        return bucket.try_acquire()
+
+    # -----------------------------
+    # 🌦️ ENDPOINTS
+    # -----------------------------
+
+    def _owm_place(self, request: web.Request) -> tuple[str, float, float] | None:
+        query = request.query
+        if "q" in query:
+            place = resolve_city(query["q"])
+            return (place.name, place.lat, place.lon) if place else None
+        try:
+            return query.get("name", "Simulated"), float(query["lat"]), float(query["lon"])
+        except (KeyError, ValueError):
+            return None
+
+    async def _owm_current(self, request: web.Request) -> web.Response:
+        error = await self._faults("openweathermap", request.query.get("appid"))
+        if error is not None:
+            return error
+        place = self._owm_place(request)
+        if place is None:
+            return web.json_response({"cod": "404", "message": "city not found"}, status=404)
+
+        data = copy.deepcopy(self.current)
+        data["name"], data["coord"] = place[0], {"lat": place[1], "lon": place[2]}
+        return web.json_response(data)
+
+    async def _owm_forecast(self, request: web.Request) -> web.Response:
+        error = await self._faults("openweathermap", request.query.get("appid"))
+        if error is not None:
+            return error
+        place = self._owm_place(request)
+        if place is None:
+            return web.json_response({"cod": "404", "message": "city not found"}, status=404)
+
+        data = copy.deepcopy(self.forecast)
+        data["city"].update(name=place[0], coord={"lat": place[1], "lon": place[2]})
+        return web.json_response(data)
+
+    async def _air_quality(self, request: web.Request) -> web.Response:
+        error = await self._faults("rapidapi", request.headers.get("x-rapidapi-key"))
+        if error is not None:
+            return error
+        if "city" in request.query and resolve_city(request.query["city"]) is None:
+            # API Ninjas answers unknown places with an empty-ish 400
+            return web.json_response({"error": "Invalid city."}, status=400)
+        return web.json_response(self.air_quality)
+
+    async def _wiki(self, request: web.Request) -> web.Response:
+        error = await self._faults("wikipedia", None)
+        if error is not None:
+            return error
+        slug = request.match_info["title"]
+        title = re.sub(r"[_\s]+", " ", slug).strip().title()
+        body = self.wiki.replace("{title}", title).replace("{slug}", slug)
+        return web.Response(text=body, content_type="text/html")
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+def run_in_thread(simulator: UpstreamSimulator, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serves `simulator` from its own event loop on a daemon thread, so its work does not
+    show up as lag in the loop under test. Returns a function that stops it.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(simulator.start(host, port))
+        started.set()
+        loop.run_forever()
+        loop.run_until_complete(simulator.close())
+        loop.close()
+
+    thread = threading.Thread(target=run, name="upstream-sim", daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return stop
+
+def _pairs(values: list[str] | None, cast) -> dict:
+    pairs = {}
+    for value in values or []:
+        key, _, amount = value.partition("=")
+        pairs[cast(key)] = float(amount)
+    return pairs
+
+async def serve(args):
+    simulator = UpstreamSimulator(
+        latency=args.latency,
+        jitter=args.jitter,
+        errors=_pairs(args.error, int),
+        timeout_rate=args.timeouts,
+        quotas=_pairs(args.quota, str),
+        seed=args.seed,
+    )
+    await simulator.start(args.host, args.port)
+    for name, value in simulator.env().items():
+        print(f"export {name}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.close()
+        print(json.dumps(simulator.stats(), indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded weather, AQI and Wikipedia responses locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds added to the latency.")
+    parser.add_argument("--error", action="append", metavar="STATUS=RATE",
+                        help="Answer this fraction of requests with the status (e.g. 429=0.05, 503=0.02); repeatable.")
+    parser.add_argument("--timeouts", type=float, default=0.0, help="Fraction of requests that hang.")
+    parser.add_argument("--quota", action="append", metavar="UPSTREAM=PER_MINUTE",
+                        help="Per-key request quota for openweathermap, rapidapi or wikipedia; repeatable.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and fault rolls.")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
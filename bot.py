@@ -1,24 +1,122 @@
+import asyncio
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
+from discord.ext.commands.hybrid import HybridAppCommand
+import logging
 import os
-from config import load_env
+import time
+from config import (
+    load_env, get_force_tree_sync, get_shard_count, get_shard_ids, get_cluster_id, get_ipc_port, get_ipc_secret,
+    get_upstream_rate_limit, get_emoji_import_rate, UPSTREAM_RATE_LIMITS
+)
+from utils.http import HTTPService, set_http_service
+from utils.ipc import ClusterClient
+from utils.cache_profile import build_cache_profile
+from utils.log import setup_logging, bind, unbind, log_context
+from utils.metrics import metrics
+from utils.tree_sync import sync_if_changed
+from utils import transcode
+from utils.image_store import image_store
+
+# Startup phase timings are measured from here
+PROCESS_START = time.perf_counter()
 
 # Load environment variables from .env
 load_env()
+setup_logging()
+log = logging.getLogger("bot")
+
+# Quotas are read lazily; a bad one (e.g. a rate of 0) should stop startup, not the first request
+for upstream in UPSTREAM_RATE_LIMITS:
+    get_upstream_rate_limit(upstream)
+get_emoji_import_rate()
 
 # Get Discord token from environment
 TOKEN = os.getenv("DISCORD_TOKEN")
 
-# Setup bot with command prefix and intents
-intents = discord.Intents.default()
-intents.message_content = True  # Needed for reading commands
+# Intents and gateway caches come from CACHE_PROFILE (lean by default)
+cache_profile = build_cache_profile()
+
+class RishourceBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Links this process to the launcher's IPC hub; answers locally when run on its own
+        secret = get_ipc_secret()
+        self.cluster = ClusterClient(get_cluster_id(), get_ipc_port() if secret else None, secret)
+        self.cluster.register("guild_count", self._local_guild_count)
+
+    async def _local_guild_count(self) -> int:
+        return len(self.guilds)
+
+    async def total_guild_count(self) -> int:
+        """
+        Guilds across every cluster (just this process when not clustered).
+        """
+        return sum(await self.cluster.query("guild_count"))
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """
+        True if the guild lives on one of this process's shards.
+        """
+        if self.shard_ids is None:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    async def setup_hook(self):
+        # Runs after login, before the gateway connects: commands are ready by the time events arrive
+        login_done = time.perf_counter()
+        log.info("Logged in after %.2fs (cache profile: %s)", login_done - PROCESS_START, cache_profile.name)
+
+        # One pooled HTTP session for every cog and the weather package
+        self.http_service = HTTPService()
+        set_http_service(self.http_service)
+        self.cluster.start()
+
+        await asyncio.gather(*(self._load_timed(extension) for extension in initial_extensions))
+        loaded = time.perf_counter()
+        log.info("Loaded %d/%d extensions in %.2fs", len(self.extensions), len(initial_extensions), loaded - login_done)
+
+        # Every cluster registers the same commands; one sync is enough
+        if self.cluster.cluster_id != 0:
+            return
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+        try:
+            synced = await sync_if_changed(self.tree, self.application_id, force=get_force_tree_sync())
+        except discord.HTTPException as e:
+            log.error("Slash command sync failed: %s", e)
+        else:
+            state = "synced" if synced else "unchanged, sync skipped"
+            log.info("Slash commands %s (%.2fs)", state, time.perf_counter() - loaded)
+
+    async def _load_timed(self, extension: str):
+        started = time.perf_counter()
+        try:
+            await self.load_extension(extension)
+            log.info("Loaded %s (%.0f ms)", extension, (time.perf_counter() - started) * 1000)
+        except Exception:
+            log.exception("Failed to load %s", extension)
+
+    async def close(self):
+        await super().close()
+        await self.cluster.close()
+        if hasattr(self, "http_service"):
+            await self.http_service.close()
+            set_http_service(None)
+        transcode.shutdown_pool()
+        image_store.close()
+
+# SHARD_IDS/SHARD_COUNT are set per worker by launcher.py; unset means every shard, count from Discord
+bot = RishourceBot(
+    command_prefix='!', shard_count=get_shard_count(), shard_ids=get_shard_ids(), **cache_profile.client_options()
+)
+bot.cache_profile = cache_profile
 bot.remove_command("help")
 
 # ─── COGS TO LOAD ─── #
 initial_extensions = [
     "cogs.weather_cog",
+    "cogs.weather_report_cog",
     "cogs.help_cog",
     "cogs.air_cog",
     "cogs.moderation_cog",
@@ -29,16 +127,56 @@ initial_extensions = [
     "cogs.ping_cog",
     "cogs.steal_cog",
     "cogs.wiki_cog",
-    "cogs.emoji_cog"
+    "cogs.emoji_cog",
+    "cogs.import_cog",
+    "cogs.stats_cog"
 ]
 
+# ─── INSTRUMENTATION ─── #
+# Prefix commands and hybrid commands (both invocation styles) pass through these hooks.
+# Both hooks run in the command's task, so the bound log fields cover the whole command.
+@bot.before_invoke
+async def start_command_timer(ctx: commands.Context):
+    ctx.started_at = time.perf_counter()
+    ctx.log_token = bind(command=ctx.command.qualified_name, guild=ctx.guild.id if ctx.guild else None)
+    metrics.command_started(ctx.command.qualified_name)
+
+@bot.after_invoke
+async def record_command(ctx: commands.Context):
+    latency = time.perf_counter() - ctx.started_at
+    metrics.command_finished(ctx.command.qualified_name, latency, ok=not ctx.command_failed)
+    log.info("Command finished", extra={"context": {"latency_ms": round(latency * 1000), "ok": not ctx.command_failed}})
+    unbind(ctx.log_token)
+
+# Plain slash commands have no invoke hooks; time them from the interaction's creation
+def _interaction_age(interaction: discord.Interaction) -> float:
+    return (discord.utils.utcnow() - interaction.created_at).total_seconds()
+
+@bot.listen("on_app_command_completion")
+async def record_app_command(interaction: discord.Interaction, command):
+    if not isinstance(command, HybridAppCommand):
+        latency = _interaction_age(interaction)
+        metrics.command_finished(command.qualified_name, latency, ok=True, started=False)
+        log.info("Command finished", extra={"context": {
+            "command": command.qualified_name, "guild": interaction.guild_id, "latency_ms": round(latency * 1000), "ok": True
+        }})
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    command = interaction.command
+    if command is not None and not isinstance(command, HybridAppCommand):
+        metrics.command_finished(command.qualified_name, _interaction_age(interaction), ok=False, started=False)
+    # Keep the library's default error logging, tagged with the command
+    with log_context(command=command.qualified_name if command else None, guild=interaction.guild_id):
+        await app_commands.CommandTree.on_error(bot.tree, interaction, error)
+
 # ─── PRESENCE TASK ─── #
 @tasks.loop(minutes=5)
 async def update_presence():
     await bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,
-            name=f"{len(bot.guilds)} servers | 🌐 !help"
+            name=f"{await bot.total_guild_count()} servers | 🌐 !help"
         ),
         status=discord.Status.online
     )
@@ -50,25 +188,13 @@ async def before_presence():
 # ─── ON READY EVENT ─── #
 @bot.event
 async def on_ready():
-    print(f"✅ Bot is online as {bot.user}")
-
-    if not hasattr(bot, "cogs_loaded"):
-        for extension in initial_extensions:
-            try:
-                await bot.load_extension(extension)
-                print(f"✅ Loaded: {extension}")
-            except Exception as e:
-                print(f"❌ Failed to load: {extension}\n   ↳ Error: {e}")
-
-        await bot.tree.sync()
-        print("🔁 Slash commands synced.")
-        bot.cogs_loaded = True
+    log.info("Bot is online as %s (%.2fs after start)", bot.user, time.perf_counter() - PROCESS_START)
 
     # Initial presence
     await bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,
-            name=f"🌦️ | <:rishabh:1372620142894383134> by rizzhub.kr | {len(bot.guilds)} servers"
+            name=f"🌦️ | <:rishabh:1372620142894383134> by rizzhub.kr | {await bot.total_guild_count()} servers"
         ),
         status=discord.Status.online
     )
@@ -80,6 +206,6 @@ async def on_ready():
 # ─── RUN ─── #
 if __name__ == "__main__":
     if TOKEN:
-        bot.run(TOKEN)
+        bot.run(TOKEN, log_handler=None)  # logging is already routed through utils.log
     else:
-        print("❌ DISCORD_TOKEN not found in environment variables.")
+        log.error("DISCORD_TOKEN not found in environment variables.")
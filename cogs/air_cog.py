@@ -2,8 +2,10 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 
-from weather.air_quality import get_air_quality
+from weather.air_quality import fetch_air_quality
 from weather.formatter import format_air_quality
+from weather.gazetteer import resolve_city
+from utils.autocomplete import city_autocomplete
 from config import load_env
 
 load_env()  # Load environment variables
@@ -19,6 +21,10 @@ class AirQuality(commands.Cog):
         await interaction.response.defer()
         await self.send_air_quality(interaction, city, is_slash=True)
 
+    @air_slash.autocomplete("city")
+    async def air_city_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await city_autocomplete(interaction, current)
+
     # Text command
     @commands.command(name="air", help="Get air quality data for a city. Usage: !air <city>")
     async def air_text(self, ctx: commands.Context, *, city: str = None):
@@ -29,10 +35,11 @@ class AirQuality(commands.Cog):
 
     # Shared logic
     async def send_air_quality(self, context, city: str, is_slash: bool):
-        city_cleaned = city.strip().title()
+        place = resolve_city(city)
+        city_cleaned = place.name if place else city.strip().title()
 
         try:
-            data = get_air_quality(city_cleaned)
+            data = await fetch_air_quality(city_cleaned)
         except Exception as e:
             content = f"⚠️ An error occurred while fetching air quality data for **{city_cleaned}**."
         else:
@@ -2,21 +2,20 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
 import io
+import logging
 import re
+from collections import Counter
 from typing import List, Optional
 
-# ---------- Helper utilities ----------
-async def fetch_bytes_from_url(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
-    try:
-        async with session.get(url) as resp:
-            if resp.status == 200:
-                return await resp.read()
-    except Exception:
-        return None
-    return None
+from config import get_steal_concurrency, get_steal_max_bytes
+from utils.image_store import image_store
+from utils.images import download_image, download_images, url_identity, with_extension
+from utils.transcode import EMOJI, STICKER, TranscodeError, contact_sheet, transcode
+
+log = logging.getLogger(__name__)
 
+# ---------- Helper utilities ----------
 def sanitize_filename(name: str, fallback: str = "image.png") -> str:
     name = re.sub(r"[^A-Za-z0-9_\-\.]", "_", name)
     if not name:
@@ -26,6 +25,47 @@ def sanitize_filename(name: str, fallback: str = "image.png") -> str:
 def is_image_url(url: str) -> bool:
     return bool(re.search(r"\.(png|jpg|jpeg|webp|gif|apng|json)$", url, re.I))
 
+def collect_image_sources(message: discord.Message, max_bytes: int) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """
+    Image (url, filename) pairs from a message's attachments, embed images and thumbnails and
+    linked image URLs, each file once. Attachments already known to exceed `max_bytes` are
+    returned separately as (filename, reason) instead of being downloaded.
+    """
+    sources, skipped, seen = [], [], set()
+
+    def add(url: str, filename: str | None = None):
+        key = url_identity(url)
+        if key in seen:
+            return
+        seen.add(key)
+        sources.append((url, sanitize_filename(filename or url.split('?')[0].split('/')[-1] or "image.png")))
+
+    for att in message.attachments:
+        if att.size > max_bytes:
+            seen.add(url_identity(att.url))
+            skipped.append((att.filename, "too large"))
+        else:
+            add(att.url, att.filename)
+
+    links = []
+    for emb in message.embeds:
+        if emb.image and emb.image.url:
+            add(emb.image.url)
+        if emb.thumbnail and emb.thumbnail.url:
+            add(emb.thumbnail.url)
+        # sometimes images are in embed.description as raw links
+        if emb.description:
+            links += re.findall(r'(https?://\S+)', emb.description)
+
+    # Raw image links in the content are common with bots
+    if not sources and not skipped and message.content:
+        links += re.findall(r'(https?://\S+)', message.content)
+
+    for link in links:
+        if is_image_url(link.split('?')[0]):
+            add(link)
+    return sources, skipped
+
 # ---------- Modal definitions ----------
 class EmojiNameModal(discord.ui.Modal, title="Create Emoji"):
     emoji_name = discord.ui.TextInput(label="Emoji name", placeholder="myemoji", max_length=32)
@@ -59,7 +99,8 @@ class StickerCreateModal(discord.ui.Modal, title="Create Sticker"):
 class StealView(discord.ui.View):
     def __init__(self, bot: commands.Bot, ctx: commands.Context, images: List[dict], timeout: int = 300):
         """
-        images: list of dicts: {'bytes': b'...', 'filename': 'name.png', 'source': 'url or attachment'}
+        images: list of dicts: {'key': image_store key, 'filename': 'name.png', 'source': 'url or attachment'}
+        The view owns one image_store reference per image and releases them when it stops or times out.
         """
         super().__init__(timeout=timeout)
         self.bot = bot
@@ -68,22 +109,45 @@ class StealView(discord.ui.View):
         self.index = 0
         self.message: Optional[discord.Message] = None  # message sent by bot that contains the view
         self.user_id = ctx.author.id
+        self.released = False
+        self.has_sheet = False  # contact sheet attached to the first message
+
+    def release_images(self):
+        if not self.released:
+            self.released = True
+            for image in self.images:
+                image_store.release(image['key'])
+
+    def stop(self):
+        super().stop()
+        self.release_images()
 
     async def send_initial(self):
-        file = discord.File(io.BytesIO(self.images[0]['bytes']), filename=self.images[0]['filename'])
-        embed = self._build_embed()
-        # send as response in context
-        self.message = await self.ctx.reply(embed=embed, file=file, view=self)
+        # The only upload of the session: a numbered preview grid shown as the embed image.
+        # Pages keep referencing it and show the current image from its source URL, so
+        # turning one is an embed-only edit.
+        sheet = await contact_sheet([image_store.source(image['key']) for image in self.images])
+        if sheet is None:
+            self.message = await self.ctx.reply(embed=self._build_embed(), view=self)
+            return
+        self.has_sheet = True
+        self.message = await self.ctx.reply(embed=self._build_embed(), file=discord.File(io.BytesIO(sheet), filename="sheet.png"), view=self)
 
     def _build_embed(self) -> discord.Embed:
         i = self.index
         total = len(self.images)
+        selected = f"Selected: tile **{i + 1}** in the preview below.\n" if self.has_sheet else ""
         embed = discord.Embed(
             title=f"Steal — Image {i + 1}/{total}",
-            description=f"Source: `{self.images[i].get('source','unknown')}`\nChoose **Add as Emoji** or **Add as Sticker**.",
+            description=f"Source: `{self.images[i].get('source','unknown')}`\n{selected}Choose **Add as Emoji** or **Add as Sticker**.",
             color=discord.Color.blurple()
         )
-        embed.set_image(url=f"attachment://{self.images[i]['filename']}")
+        if self.has_sheet:
+            # The attachment must stay referenced, or Discord shows it again above the embed
+            embed.set_image(url="attachment://sheet.png")
+            embed.set_thumbnail(url=self.images[i]['source'])
+        else:
+            embed.set_image(url=self.images[i]['source'])
         return embed
 
     def _check_user(self, interaction: discord.Interaction) -> bool:
@@ -94,27 +158,23 @@ class StealView(discord.ui.View):
 
     # ----------- Pagination buttons -----------
     @discord.ui.button(label="⏮ Prev", style=discord.ButtonStyle.secondary)
-    async def prev_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not self._check_user(interaction):
             return await interaction.response.send_message("This is not your steal session.", ephemeral=True)
         # wrap-around to previous
         self.index = (self.index - 1) % len(self.images)
-        file = discord.File(io.BytesIO(self.images[self.index]['bytes']), filename=self.images[self.index]['filename'])
-        embed = self._build_embed()
-        await interaction.response.edit_message(embed=embed, attachments=[file])
+        await interaction.response.edit_message(embed=self._build_embed())
 
     @discord.ui.button(label="Next ⏭", style=discord.ButtonStyle.secondary)
-    async def next_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not self._check_user(interaction):
             return await interaction.response.send_message("This is not your steal session.", ephemeral=True)
         self.index = (self.index + 1) % len(self.images)
-        file = discord.File(io.BytesIO(self.images[self.index]['bytes']), filename=self.images[self.index]['filename'])
-        embed = self._build_embed()
-        await interaction.response.edit_message(embed=embed, attachments=[file])
+        await interaction.response.edit_message(embed=self._build_embed())
 
     # ----------- Add as Emoji -----------
     @discord.ui.button(label="Add as Emoji 🟡", style=discord.ButtonStyle.success)
-    async def add_emoji(self, button: discord.ui.Button, interaction: discord.Interaction):
+    async def add_emoji(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not self._check_user(interaction):
             return await interaction.response.send_message("This is not your steal session.", ephemeral=True)
 
@@ -129,7 +189,7 @@ class StealView(discord.ui.View):
 
     # ----------- Add as Sticker -----------
     @discord.ui.button(label="Add as Sticker 🟢", style=discord.ButtonStyle.primary)
-    async def add_sticker(self, button: discord.ui.Button, interaction: discord.Interaction):
+    async def add_sticker(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not self._check_user(interaction):
             return await interaction.response.send_message("This is not your steal session.", ephemeral=True)
 
@@ -143,7 +203,7 @@ class StealView(discord.ui.View):
 
     # ----------- Cancel -----------
     @discord.ui.button(label="Cancel ❌", style=discord.ButtonStyle.danger)
-    async def cancel(self, button: discord.ui.Button, interaction: discord.Interaction):
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not self._check_user(interaction):
             return await interaction.response.send_message("This is not your steal session.", ephemeral=True)
         await interaction.response.edit_message(content="Steal session cancelled.", embed=None, view=None, attachments=[])
@@ -151,6 +211,8 @@ class StealView(discord.ui.View):
 
     # ----------- Creation handlers -----------
     async def handle_create_emoji(self, interaction: discord.Interaction, name: str):
+        if self.released:  # the modal outlived the session
+            return await interaction.followup.send("⌛ This steal session has ended.", ephemeral=True)
         idx = self.index
         image = self.images[idx]
         # Validate name
@@ -159,21 +221,23 @@ class StealView(discord.ui.View):
             return await interaction.followup.send("❌ Emoji name cannot be empty.", ephemeral=True)
 
         try:
-            emoji = await self.ctx.guild.create_custom_emoji(name=name, image=image['bytes'])
+            fitted = await transcode(image_store.source(image['key']), EMOJI, image['key'])
+            emoji = await self.ctx.guild.create_custom_emoji(name=name, image=fitted.body)
             await interaction.followup.send(f"✅ Created emoji: <:{emoji.name}:{emoji.id}> (`:{emoji.name}:`)", ephemeral=True)
+        except TranscodeError as e:
+            await interaction.followup.send(f"❌ This image can't be used as an emoji: {e}", ephemeral=True)
         except discord.HTTPException as e:
             await interaction.followup.send(f"❌ Failed to create emoji: {e}", ephemeral=True)
 
     async def handle_create_sticker(self, interaction: discord.Interaction, name: str, description: str, emoji: str):
+        if self.released:
+            return await interaction.followup.send("⌛ This steal session has ended.", ephemeral=True)
         idx = self.index
         image = self.images[idx]
-        # Prepare file
-        file_bytes = image['bytes']
-        filename = image['filename']
-        # Discord sticker size/type constraints apply. We'll try to upload as png.
         try:
-            # discord.Guild.create_sticker accepts file=discord.File(...)
-            file_obj = discord.File(io.BytesIO(file_bytes), filename=filename)
+            # Resized and recompressed to Discord's sticker limits (PNG/APNG, 320px, 512 KB) when needed
+            fitted = await transcode(image_store.source(image['key']), STICKER, image['key'])
+            file_obj = discord.File(io.BytesIO(fitted.body), filename=with_extension(image['filename'], fitted.extension))
             # Some library versions require 'emoji' param to be a string, some accept None.
             sticker = await self.ctx.guild.create_sticker(
                 name=name,
@@ -182,11 +246,14 @@ class StealView(discord.ui.View):
                 file=file_obj
             )
             await interaction.followup.send(f"✅ Sticker created: `{sticker.name}` (ID `{sticker.id}`)", ephemeral=True)
+        except TranscodeError as e:
+            await interaction.followup.send(f"❌ This image can't be used as a sticker: {e}", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"❌ Failed to create sticker: {e}", ephemeral=True)
 
     # On timeout, remove view
     async def on_timeout(self):
+        self.release_images()
         try:
             if self.message and not self.message.deleted:
                 await self.message.edit(content="Steal session timed out.", embed=None, view=None, attachments=[])
@@ -222,26 +289,25 @@ class EmojiStickerCog(commands.Cog):
     @commands.has_guild_permissions(manage_emojis_and_stickers=True)
     async def emojiadd(self, ctx: commands.Context, name: str, url: str = None):
         # Determine image source
-        img_bytes = None
-        filename = "emoji.png"
         if url:
-            async with aiohttp.ClientSession() as session:
-                img_bytes = await fetch_bytes_from_url(session, url)
-                filename = sanitize_filename(url.split("/")[-1] or filename)
+            source = url
         elif ctx.message.attachments:
-            att = ctx.message.attachments[0]
-            img_bytes = await att.read()
-            filename = sanitize_filename(att.filename)
+            source = ctx.message.attachments[0].url
         else:
             return await ctx.reply("❌ Provide an image URL or attach an image.")
 
-        if not img_bytes:
-            return await ctx.reply("❌ Failed to download the image.")
+        await ctx.defer()
+        download = await download_image(self.bot.http_service, source, "emoji.png", get_steal_max_bytes())
+        if download.body is None:
+            return await ctx.reply(f"❌ Failed to download the image ({download.error}).")
 
         # Create emoji
         try:
-            emoji = await ctx.guild.create_custom_emoji(name=name, image=img_bytes)
+            fitted = await transcode(download.body, EMOJI)
+            emoji = await ctx.guild.create_custom_emoji(name=name, image=fitted.body)
             await ctx.reply(f"✅ Emoji created: <:{emoji.name}:{emoji.id}> (`:{emoji.name}:`)")
+        except TranscodeError as e:
+            await ctx.reply(f"❌ This image can't be used as an emoji: {e}")
         except discord.HTTPException as e:
             await ctx.reply(f"❌ Failed to create emoji: {e}")
 
@@ -286,12 +352,17 @@ class EmojiStickerCog(commands.Cog):
         if not ctx.message.attachments:
             return await ctx.reply("❌ Attach an image (PNG/APNG or Lottie JSON) with this command.")
         att = ctx.message.attachments[0]
-        img_bytes = await att.read()
-        filename = sanitize_filename(att.filename)
+        await ctx.defer()
+        download = await download_image(self.bot.http_service, att.url, sanitize_filename(att.filename), get_steal_max_bytes())
+        if download.body is None:
+            return await ctx.reply(f"❌ Failed to download the image ({download.error}).")
         try:
-            file_obj = discord.File(io.BytesIO(img_bytes), filename=filename)
+            fitted = await transcode(download.body, STICKER)
+            file_obj = discord.File(io.BytesIO(fitted.body), filename=with_extension(download.filename, fitted.extension))
             sticker = await ctx.guild.create_sticker(name=name, description=(description or None), emoji=(emoji or None), file=file_obj)
             await ctx.reply(f"✅ Sticker created: `{sticker.name}` (ID `{sticker.id}`)")
+        except TranscodeError as e:
+            await ctx.reply(f"❌ This image can't be used as a sticker: {e}")
         except Exception as e:
             await ctx.reply(f"❌ Failed to create sticker: {e}")
 
@@ -338,56 +409,34 @@ class EmojiStickerCog(commands.Cog):
         else:
             return await ctx.reply("❌ Reply to a message or provide a message ID containing images to steal.")
 
-        # Gather candidate image URLs / attachments
-        candidates = []  # list of (url_or_attachment, filename_hint)
-        # attachments
-        for att in target_msg.attachments:
-            # attachments are already binary accessible via .read()
-            candidates.append({'type': 'attachment', 'attachment': att, 'url': att.url, 'filename': att.filename})
-        # embed images (image or thumbnail)
-        for emb in target_msg.embeds:
-            # direct image url
-            if emb.image and emb.image.url:
-                candidates.append({'type': 'url', 'url': emb.image.url, 'filename': emb.image.url.split('/')[-1]})
-            if emb.thumbnail and emb.thumbnail.url:
-                candidates.append({'type': 'url', 'url': emb.thumbnail.url, 'filename': emb.thumbnail.url.split('/')[-1]})
-            # sometimes images are in embed.description as raw links
-            if emb.description:
-                for token in re.findall(r'(https?://\S+)', emb.description):
-                    if is_image_url(token):
-                        candidates.append({'type': 'url', 'url': token, 'filename': token.split('/')[-1]})
-
-        # If no candidates, try to parse raw content for image links (common with bots)
-        if not candidates and target_msg.content:
-            for token in re.findall(r'(https?://\S+)', target_msg.content):
-                if is_image_url(token):
-                    candidates.append({'type': 'url', 'url': token, 'filename': token.split('/')[-1]})
-
-        if not candidates:
+        max_bytes = get_steal_max_bytes()
+        sources, skipped = collect_image_sources(target_msg, max_bytes)
+        if not sources and not skipped:
             return await ctx.reply("⚠️ No images found in the target message (attachments or embed images).")
 
-        # Download bytes for each candidate
+        # Downloads can outlast the 3 s interaction window (defer is a no-op for prefix invocations)
+        await ctx.defer()
+        downloads = await download_images(self.bot.http_service, sources, max_bytes, get_steal_concurrency())
+
         images = []
-        async with aiohttp.ClientSession() as session:
-            for c in candidates:
-                if c['type'] == 'attachment':
-                    try:
-                        b = await c['attachment'].read()
-                        filename = sanitize_filename(c.get('filename') or c['attachment'].filename or "image.png")
-                        images.append({'bytes': b, 'filename': filename, 'source': c.get('url')})
-                    except Exception:
-                        continue
-                elif c['type'] == 'url':
-                    b = await fetch_bytes_from_url(session, c['url'])
-                    if b:
-                        filename = sanitize_filename(c.get('filename') or c['url'].split('/')[-1] or 'image.png')
-                        images.append({'bytes': b, 'filename': filename, 'source': c.get('url')})
+        for d in downloads:
+            if d.body is None:
+                skipped.append((d.filename, d.error))
+            else:
+                images.append({'key': await image_store.put(d.body), 'filename': d.filename, 'source': d.url})
+        if skipped:
+            log.info("Skipped %d steal candidates", len(skipped), extra={"context": {"reasons": dict(Counter(r for _, r in skipped))}})
         if not images:
-            return await ctx.reply("❌ Failed to download any images from the target message.")
+            reasons = ", ".join(f"`{name}` ({reason})" for name, reason in skipped[:5])
+            return await ctx.reply(f"❌ Failed to download any images from the target message: {reasons}")
 
         # Create and send the interactive StealView
         view = StealView(self.bot, ctx, images)
-        await view.send_initial()
+        try:
+            await view.send_initial()
+        except Exception:
+            view.stop()
+            raise
 
 # ---------- setup ----------
 async def setup(bot: commands.Bot):
@@ -0,0 +1,444 @@
+import asyncio
+import io
+import logging
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import get_emoji_import_rate, get_import_zip_max_bytes, get_steal_max_bytes
+from utils.emoji_import import (
+    DONE, FAILED, MAX_ITEMS, PENDING, SKIPPED, ArchiveError, counts, delete_job, extract_zip, files_dir,
+    items_from_guild, items_from_message, load_job, load_jobs, mark_existing, new_item, plan, save_job, slot_of,
+)
+from utils.images import download_image
+from utils.log import bind
+from utils.members import get_member
+from utils.ratelimit import BACKGROUND, TokenBucket
+from utils.transcode import EMOJI, TranscodeError, transcode
+
+log = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 5.0  # seconds between edits of the progress message
+SHOWN_PROBLEMS = 8  # failed/skipped items listed on the progress message
+DEFAULT_STICKER_EMOJI = "⭐"  # Discord requires a tag; used when the source has none
+
+# Discord error codes
+MAX_EMOJIS_REACHED = 30008
+MAX_STICKERS_REACHED = 30039
+
+BUSY_MESSAGE = ("❌ This server already has an import. Check it with `/emojiimport status`, "
+                "or use `/emojiimport resume` or `/emojiimport cancel`.")
+
+class PauseImport(Exception):
+    """Raised by an item that cannot go on without someone fixing something first."""
+
+def _problem_lines(items: list[dict]) -> list[str]:
+    problems = [item for item in items if item["status"] == FAILED] + [item for item in items if item["status"] == SKIPPED]
+    lines = [f"`{item['name']}` — {item['error']}" for item in problems[:SHOWN_PROBLEMS]]
+    if len(problems) > SHOWN_PROBLEMS:
+        lines.append(f"…and {len(problems) - SHOWN_PROBLEMS} more")
+    return lines
+
+def build_progress_embed(job: dict, rate_per_minute: float) -> discord.Embed:
+    items = job["items"]
+    c = counts(items)
+    if job.get("paused"):
+        state, color = f"⏸️ Paused: {job['paused']}\nRun `/emojiimport resume` to continue.", discord.Color.orange()
+    elif c[PENDING] == 0:
+        state, color = "🎉 Import finished.", discord.Color.green()
+    elif job.get("waiting_until"):
+        state, color = f"⏳ Discord asked us to slow down; continuing <t:{int(job['waiting_until'])}:R>.", discord.Color.orange()
+    else:
+        minutes = c[PENDING] / rate_per_minute
+        state, color = f"⚙️ Working… about {max(1, round(minutes))} min left.", discord.Color.blurple()
+
+    embed = discord.Embed(
+        title=f"📦 Emoji import from {job['source']}",
+        description=(
+            f"✅ Created **{c[DONE]}** · ❌ Failed **{c[FAILED]}** · ⏭️ Skipped **{c[SKIPPED]}** · "
+            f"⏳ Left **{c[PENDING]}** of {len(items)}\n\n{state}"
+        ),
+        color=color
+    )
+    problems = _problem_lines(items)
+    if problems:
+        embed.add_field(name="Not imported", value="\n".join(problems)[:1024], inline=False)
+    return embed
+
+class ImportProgress:
+    """
+    The one status message of an import. `touch` marks it stale and a ticker edits it at most
+    once per PROGRESS_INTERVAL, however fast items complete; `flush` edits it right away
+    (start, pause, finish). A deleted message is replaced by a new one in the same channel.
+    """
+
+    def __init__(self, bot: commands.Bot, job: dict, rate_per_minute: float):
+        self.bot = bot
+        self.job = job
+        self.rate_per_minute = rate_per_minute
+        self.dirty = False
+
+    def touch(self):
+        self.dirty = True
+
+    async def tick(self):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if self.dirty:
+                await self.flush()
+
+    async def flush(self):
+        self.dirty = False
+        embed = build_progress_embed(self.job, self.rate_per_minute)
+        channel = self.bot.get_partial_messageable(self.job["channel_id"], guild_id=self.job["guild_id"])
+        try:
+            try:
+                await channel.get_partial_message(self.job["message_id"]).edit(embed=embed)
+            except discord.NotFound:
+                message = await channel.send(embed=embed)
+                self.job["message_id"] = message.id
+                await asyncio.to_thread(save_job, self.job)
+        except discord.HTTPException as e:
+            log.warning("Could not update import progress: %s", e)
+
+class EmojiImport(commands.Cog):
+    """
+    Bulk emoji and sticker imports. Each server gets one sequential worker, paced by a token
+    bucket below Discord's per-server emoji route limits so the library rarely has to sit out
+    a 429, with its state saved after every item so restarts pick up where they stopped.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.workers: dict[int, asyncio.Task] = {}
+        self.preparing: set[int] = set()  # servers where a command is setting up or resuming an import
+        self.buckets: dict[int, TokenBucket] = {}
+        self._resumer: asyncio.Task | None = None
+
+    async def cog_load(self):
+        self._resumer = asyncio.create_task(self._resume_interrupted())
+
+    async def cog_unload(self):
+        if self._resumer:
+            self._resumer.cancel()
+        # State is saved after every item; the next start resumes these
+        for worker in self.workers.values():
+            worker.cancel()
+
+    async def _resume_interrupted(self):
+        await self.bot.wait_until_ready()
+        for job in await asyncio.to_thread(load_jobs):
+            if job.get("paused") or not self.bot.owns_guild(job["guild_id"]):
+                continue
+            if self._start(job):
+                log.info("Resuming emoji import", extra={"context": {"guild": job["guild_id"], "left": counts(job["items"])[PENDING]}})
+
+    # ─── WORKER ─── #
+    def _bucket(self, guild_id: int) -> TokenBucket:
+        bucket = self.buckets.get(guild_id)
+        if bucket is None:
+            per_minute, burst = get_emoji_import_rate()
+            bucket = self.buckets[guild_id] = TokenBucket(f"emoji_import:{guild_id}", per_minute / 60, burst)
+        return bucket
+
+    def _start(self, job: dict) -> bool:
+        guild = self.bot.get_guild(job["guild_id"])
+        if guild is None or guild.id in self.workers:
+            return False
+        worker = asyncio.create_task(self._run(guild, job))
+        self.workers[guild.id] = worker
+        worker.add_done_callback(lambda _: self.workers.pop(guild.id, None))
+        return True
+
+    async def _run(self, guild: discord.Guild, job: dict):
+        bind(guild=guild.id, command="emojiimport")
+        # State is saved after each create returns; one that went through just before a restart
+        # is still pending, so count whatever the server now has as done instead of re-creating it
+        if mark_existing(job["items"], guild):
+            await asyncio.to_thread(save_job, job)
+        bucket = self._bucket(guild.id)
+        progress = ImportProgress(self.bot, job, bucket.rate * 60)
+        await progress.flush()
+        ticker = asyncio.create_task(progress.tick())
+        try:
+            for item in job["items"]:
+                if item["status"] != PENDING:
+                    continue
+                try:
+                    await self._import_item(guild, job, item, bucket, progress)
+                except PauseImport as e:
+                    job["paused"] = str(e)
+                    break
+                finally:
+                    await asyncio.to_thread(save_job, job)
+                progress.touch()
+        except Exception:
+            log.exception("Emoji import failed")
+            job["paused"] = "something went wrong on my side"
+            await asyncio.to_thread(save_job, job)
+        finally:
+            ticker.cancel()
+
+        if not job.get("paused"):
+            await asyncio.to_thread(delete_job, guild.id)
+        await progress.flush()
+
+    async def _import_item(self, guild: discord.Guild, job: dict, item: dict, bucket: TokenBucket, progress: ImportProgress):
+        body, error = await self._load(item)
+        if body is None:
+            item.update(status=FAILED, error=error)
+            return
+        try:
+            fitted = await transcode(body, item["kind"])
+        except TranscodeError as e:
+            item.update(status=FAILED, error=str(e))
+            return
+
+        reason = f"Emoji import by {job['author_id']}"
+        while True:
+            # Queue for a token well past the bucket's refill time; the worker has nothing else to do
+            await bucket.acquire(priority=BACKGROUND, deadline=2 / bucket.rate + 60)
+            try:
+                if item["kind"] == EMOJI:
+                    await guild.create_custom_emoji(name=item["name"], image=fitted.body, reason=reason)
+                else:
+                    await guild.create_sticker(
+                        name=item["name"],
+                        description=item.get("description") or "",
+                        emoji=item.get("emoji") or DEFAULT_STICKER_EMOJI,
+                        file=discord.File(io.BytesIO(fitted.body), filename=f"sticker.{fitted.extension}"),
+                        reason=reason
+                    )
+            except discord.RateLimited as e:
+                # Only raised when the client caps how long the library itself may wait out a 429
+                await self._wait_out(job, bucket, progress, e.retry_after)
+                continue
+            except discord.Forbidden:
+                raise PauseImport("I need the `Manage Emojis and Stickers` permission") from None
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    await self._wait_out(job, bucket, progress, float(e.response.headers.get("Retry-After", 60)))
+                    continue
+                if e.code in (MAX_EMOJIS_REACHED, MAX_STICKERS_REACHED):
+                    self._skip_slot(job, slot_of(item))
+                else:
+                    item.update(status=FAILED, error=e.text or f"HTTP {e.status}")
+                return
+            item.update(status=DONE, error=None)
+            return
+
+    async def _load(self, item: dict) -> tuple[bytes | None, str | None]:
+        if item.get("path"):
+            try:
+                return await asyncio.to_thread(_read_file, item["path"]), None
+            except FileNotFoundError:
+                return None, "extracted file is gone"
+        download = await download_image(self.bot.http_service, item["url"], item["name"], get_steal_max_bytes())
+        return download.body, download.error
+
+    async def _wait_out(self, job: dict, bucket: TokenBucket, progress: ImportProgress, retry_after: float):
+        bucket.tokens = 0  # nothing else goes out for this server until the bucket refills
+        job["waiting_until"] = time.time() + retry_after
+        await progress.flush()
+        await asyncio.sleep(retry_after)
+        job.pop("waiting_until", None)
+        progress.touch()
+
+    def _skip_slot(self, job: dict, slot: str):
+        # The server filled up (slots were taken meanwhile, or an image changed kind on upload)
+        for item in job["items"]:
+            if item["status"] == PENDING and slot_of(item) == slot:
+                item.update(status=SKIPPED, error=f"no free {slot} slot")
+
+    # ─── COMMANDS ─── #
+    @contextmanager
+    def _claim(self, guild_id: int):
+        """
+        Reserves the server for the enclosed setup, yielding False if an import is already
+        running or being set up there. Taken before the command's first await, so two commands
+        can never both pass the checks and then write the same state and files.
+        """
+        if guild_id in self.preparing or guild_id in self.workers:
+            yield False
+            return
+        self.preparing.add(guild_id)
+        try:
+            yield True
+        finally:
+            self.preparing.discard(guild_id)
+
+    async def _ensure_idle(self, ctx: commands.Context) -> bool:
+        if not ctx.guild.me.guild_permissions.manage_emojis_and_stickers:
+            await ctx.reply("❌ I need the `Manage Emojis and Stickers` permission to import.")
+            return False
+        if await asyncio.to_thread(load_job, ctx.guild.id):
+            await ctx.reply(BUSY_MESSAGE)
+            return False
+        return True
+
+    async def _begin(self, ctx: commands.Context, source: str, items: list[dict], skipped: list[tuple[str, str]] | None = None):
+        if len(items) > MAX_ITEMS:
+            skipped = (skipped or []) + [(item["name"], f"only {MAX_ITEMS} items per import") for item in items[MAX_ITEMS:]]
+            items = items[:MAX_ITEMS]
+        plan(items, ctx.guild)
+        job = {
+            "guild_id": ctx.guild.id,
+            "channel_id": ctx.channel.id,
+            "author_id": ctx.author.id,
+            "message_id": None,
+            "source": source,
+            "items": items + [{**new_item(EMOJI, name), "status": SKIPPED, "error": reason} for name, reason in skipped or []],
+        }
+        per_minute, _ = get_emoji_import_rate()
+        message = await ctx.reply(embed=build_progress_embed(job, per_minute))
+        if not counts(job["items"])[PENDING]:
+            await asyncio.to_thread(delete_job, ctx.guild.id)
+            return
+        job["message_id"] = message.id
+        await asyncio.to_thread(save_job, job)
+        self._start(job)
+
+    @commands.hybrid_group(name="emojiimport", description="Bulk-import emojis and stickers into this server.", fallback="status")
+    @commands.guild_only()
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport(self, ctx: commands.Context):
+        job = await asyncio.to_thread(load_job, ctx.guild.id)
+        if job is None:
+            return await ctx.reply("ℹ️ No import in progress. Start one with `/emojiimport message`, `guild` or `zip`.")
+        await ctx.reply(embed=build_progress_embed(job, self._bucket(ctx.guild.id).rate * 60))
+
+    @emojiimport.command(name="message", description="Import every custom emoji and sticker in a message.")
+    @app_commands.describe(message_id="Message to import from (optional). You can also reply to the message.")
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport_message(self, ctx: commands.Context, message_id: Optional[str] = None):
+        with self._claim(ctx.guild.id) as claimed:
+            if not claimed:
+                return await ctx.reply(BUSY_MESSAGE)
+            if await self._ensure_idle(ctx):
+                await self._import_from_message(ctx, message_id)
+
+    async def _import_from_message(self, ctx: commands.Context, message_id: Optional[str] = None):
+        if ctx.message.reference and isinstance(ctx.message.reference.resolved, discord.Message):
+            target = ctx.message.reference.resolved
+        elif message_id and message_id.isdigit():
+            await ctx.defer()
+            try:
+                target = await ctx.channel.fetch_message(int(message_id))
+            except discord.HTTPException as e:
+                return await ctx.reply(f"❌ Could not fetch message ID {message_id}: {e}")
+        else:
+            return await ctx.reply("❌ Reply to a message or pass its ID.")
+
+        items = items_from_message(target)
+        if not items:
+            return await ctx.reply("⚠️ That message has no custom emojis or stickers.")
+        await self._begin(ctx, "a message", items)
+
+    @emojiimport.command(name="guild", description="Import the emojis and stickers of another server we share.")
+    @app_commands.describe(server_id="ID of the server to copy from.")
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport_guild(self, ctx: commands.Context, server_id: str):
+        with self._claim(ctx.guild.id) as claimed:
+            if not claimed:
+                return await ctx.reply(BUSY_MESSAGE)
+            if await self._ensure_idle(ctx):
+                await self._import_from_guild(ctx, server_id)
+
+    async def _import_from_guild(self, ctx: commands.Context, server_id: str):
+        if not server_id.isdigit() or int(server_id) == ctx.guild.id:
+            return await ctx.reply("❌ Give the ID of another server.")
+        await ctx.defer()
+
+        try:
+            # In cluster mode the server may live on another process's shards
+            source = self.bot.get_guild(int(server_id)) or await self.bot.fetch_guild(int(server_id))
+            member = await get_member(source, ctx.author.id)
+        except discord.HTTPException:
+            source = member = None
+        if member is None:
+            # Also covers servers the bot is in but the caller is not: no copying from strangers
+            return await ctx.reply("❌ We need to both be in that server.")
+
+        try:
+            emojis = await source.fetch_emojis()
+            stickers = await source.fetch_stickers()
+        except discord.HTTPException as e:
+            return await ctx.reply(f"❌ Failed to list that server's emojis: {e}")
+        items = items_from_guild(emojis, stickers)
+        if not items:
+            return await ctx.reply("⚠️ That server has no emojis or stickers.")
+        await self._begin(ctx, f"**{discord.utils.escape_markdown(source.name)}**", items)
+
+    @emojiimport.command(name="zip", description="Import images from a zip (files in a stickers/ folder become stickers).")
+    @app_commands.describe(archive="Zip of PNG, GIF, JPEG or WebP images, named as the emojis should be.")
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport_zip(self, ctx: commands.Context, archive: discord.Attachment):
+        with self._claim(ctx.guild.id) as claimed:
+            if not claimed:
+                return await ctx.reply(BUSY_MESSAGE)
+            if await self._ensure_idle(ctx):
+                await self._import_from_zip(ctx, archive)
+
+    async def _import_from_zip(self, ctx: commands.Context, archive: discord.Attachment):
+        max_bytes = get_import_zip_max_bytes()
+        if archive.size > max_bytes:
+            return await ctx.reply(f"❌ The zip is larger than {max_bytes // (1024 * 1024)} MB.")
+        await ctx.defer()
+
+        data, error = await self.bot.http_service.get_bytes_capped(
+            archive.url, max_bytes=max_bytes, check_head=lambda head: head.startswith(b"PK\x03\x04")
+        )
+        if data is None:
+            return await ctx.reply(f"❌ Failed to download the zip ({error}).")
+        try:
+            items, skipped = await asyncio.to_thread(extract_zip, data, files_dir(ctx.guild.id), MAX_ITEMS, get_steal_max_bytes())
+        except ArchiveError as e:
+            return await ctx.reply(f"❌ {e}.")
+        if not items:
+            await asyncio.to_thread(delete_job, ctx.guild.id)
+            return await ctx.reply("⚠️ No usable images in that zip.")
+        await self._begin(ctx, f"`{discord.utils.escape_markdown(archive.filename)}`", items, skipped)
+
+    @emojiimport.command(name="resume", description="Continue a paused or interrupted import.")
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport_resume(self, ctx: commands.Context):
+        with self._claim(ctx.guild.id) as claimed:
+            if not claimed:
+                return await ctx.reply("ℹ️ The import is already running.")
+            job = await asyncio.to_thread(load_job, ctx.guild.id)
+            if job is None:
+                return await ctx.reply("ℹ️ There is no import to resume.")
+            job.pop("paused", None)
+            job["channel_id"] = ctx.channel.id
+            message = await ctx.reply(embed=build_progress_embed(job, self._bucket(ctx.guild.id).rate * 60))
+            job["message_id"] = message.id
+            await asyncio.to_thread(save_job, job)
+            self._start(job)
+
+    @emojiimport.command(name="cancel", description="Stop the running import and forget what is left.")
+    @commands.has_guild_permissions(manage_emojis_and_stickers=True)
+    async def emojiimport_cancel(self, ctx: commands.Context):
+        if ctx.guild.id in self.preparing:
+            return await ctx.reply("⏳ An import is being set up right now; try again in a moment.")
+        worker = self.workers.get(ctx.guild.id)
+        if worker is not None:
+            worker.cancel()
+            # Let it write its last state before that is deleted
+            await asyncio.gather(worker, return_exceptions=True)
+        job = await asyncio.to_thread(load_job, ctx.guild.id)
+        if job is None and worker is None:
+            return await ctx.reply("ℹ️ There is no import to cancel.")
+        await asyncio.to_thread(delete_job, ctx.guild.id)
+        done = counts(job["items"])[DONE] if job else 0
+        await ctx.reply(f"🛑 Import cancelled after {done} item(s) were created.")
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(EmojiImport(bot))
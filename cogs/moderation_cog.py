@@ -2,6 +2,8 @@ import discord
 from discord.ext import commands
 from discord.ext.commands import Context, Bot, hybrid_command, has_permissions
 
+from utils.members import LazyMember
+
 class Moderation(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
@@ -9,7 +11,7 @@ class Moderation(commands.Cog):
     # Kick Command
     @hybrid_command(name="kick", description="Kick a member from the server.")
     @has_permissions(kick_members=True)
-    async def kick(self, ctx: Context, member: discord.Member, *, reason: str = "No reason provided"):
+    async def kick(self, ctx: Context, member: LazyMember, *, reason: str = "No reason provided"):
         await ctx.defer()
         try:
             await member.kick(reason=reason)
@@ -20,7 +22,7 @@ class Moderation(commands.Cog):
     # Ban Command
     @hybrid_command(name="ban", description="Ban a member from the server.")
     @has_permissions(ban_members=True)
-    async def ban(self, ctx: Context, member: discord.Member, *, reason: str = "No reason provided"):
+    async def ban(self, ctx: Context, member: LazyMember, *, reason: str = "No reason provided"):
         await ctx.defer()
         try:
             await member.ban(reason=reason)
@@ -45,7 +47,7 @@ class Moderation(commands.Cog):
     # Mute Command
     @hybrid_command(name="mute", description="Mute a member by assigning the 'Muted' role.")
     @has_permissions(manage_roles=True)
-    async def mute(self, ctx: Context, member: discord.Member, *, reason: str = "No reason provided"):
+    async def mute(self, ctx: Context, member: LazyMember, *, reason: str = "No reason provided"):
         await ctx.defer()
         muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
 
@@ -66,7 +68,7 @@ class Moderation(commands.Cog):
     # Unmute Command
     @hybrid_command(name="unmute", description="Unmute a member by removing the 'Muted' role.")
     @has_permissions(manage_roles=True)
-    async def unmute(self, ctx: Context, member: discord.Member):
+    async def unmute(self, ctx: Context, member: LazyMember):
         await ctx.defer()
         muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
 
@@ -1,12 +1,74 @@
+import asyncio
+
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context, Bot, hybrid_command
 
+from utils.members import get_member
+
+# Without a member cache every membership check is a REST call, so the scan is bounded
+SCAN_CONCURRENCY = 4  # member lookups in flight per process
+SCAN_BUDGET = 25.0  # seconds; the launcher stops waiting for a cluster after 30
+
 class MutualGuilds(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
         self.owner_id = 1177102238490050641  # Rishabh's user ID
 
+    async def cog_load(self):
+        self.bot.cluster.register("mutual_guilds", self._scan_local)
+
+    async def _scan_local(self, owner_id: int, user_id: int) -> dict:
+        """
+        Mutual guilds on this process's shards as [name, invite url or None] pairs, plus
+        how many guilds could not be checked within SCAN_BUDGET.
+        """
+        semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+
+        async def check(guild: discord.Guild) -> list | None:
+            async with semaphore:
+                # Fetched on demand (and remembered briefly) rather than kept in the member cache
+                try:
+                    both = await get_member(guild, owner_id) and await get_member(guild, user_id)
+                except discord.HTTPException:
+                    return None
+                if not both:
+                    return None
+                return [guild.name, await self._invite_url(guild)]
+
+        tasks = [asyncio.create_task(check(guild)) for guild in self.bot.guilds]
+        if not tasks:
+            return {"guilds": [], "unchecked": 0}
+        done, pending = await asyncio.wait(tasks, timeout=SCAN_BUDGET)
+        for task in pending:
+            task.cancel()
+
+        mutual_guilds = [
+            task.result() for task in tasks
+            if task in done and task.exception() is None and task.result() is not None
+        ]
+        return {"guilds": mutual_guilds, "unchecked": len(pending)}
+
+    async def _invite_url(self, guild: discord.Guild) -> str | None:
+        try:
+            bot_member = guild.me
+
+            # Check if bot has Manage Guild and Create Instant Invite
+            perms = guild.me.guild_permissions
+            if perms.manage_guild and perms.create_instant_invite:
+                invites = await guild.invites()
+
+                if invites:
+                    return invites[0].url
+                # Create a new invite from the first available text channel
+                text_channels = [c for c in guild.text_channels if c.permissions_for(bot_member).create_instant_invite]
+                if text_channels:
+                    invite = await text_channels[0].create_invite(reason="Mutual command by owner", max_age=0, max_uses=0)
+                    return invite.url
+        except Exception:
+            pass  # silently fail if invite fetching/creation fails
+        return None
+
     @hybrid_command(name="mutual", description="List mutual servers between you and another user.")
     async def mutual(self, ctx: Context, user: discord.User):
         if ctx.author.id != self.owner_id:
@@ -15,38 +77,18 @@ class MutualGuilds(commands.Cog):
         if user.bot:
             return await ctx.reply(embed=self._error_embed("🤖 Bots aren't supported for mutual guild lookup."))
 
-        mutual_guilds = []
-
-        for guild in self.bot.guilds:
-            me = guild.get_member(self.owner_id)
-            target = guild.get_member(user.id)
+        await ctx.defer()
 
-            if me and target:
-                invite_url = None
-
-                try:
-                    bot_member = guild.me
-
-                    # Check if bot has Manage Guild and Create Instant Invite
-                    perms = guild.me.guild_permissions
-                    if perms.manage_guild and perms.create_instant_invite:
-                        invites = await guild.invites()
-
-                        if invites:
-                            invite_url = invites[0].url
-                        else:
-                            # Create a new invite from the first available text channel
-                            text_channels = [c for c in guild.text_channels if c.permissions_for(bot_member).create_instant_invite]
-                            if text_channels:
-                                invite = await text_channels[0].create_invite(reason="Mutual command by owner", max_age=0, max_uses=0)
-                                invite_url = invite.url
-                except Exception:
-                    invite_url = None  # silently fail if invite fetching/creation fails
-
-                mutual_guilds.append((guild.name, invite_url))
+        # Each cluster scans the guilds on its own shards; invite lookups can be slow
+        results = await self.bot.cluster.query("mutual_guilds", timeout=30, owner_id=self.owner_id, user_id=user.id)
+        mutual_guilds = [tuple(entry) for result in results for entry in result["guilds"]]
+        unchecked = sum(result["unchecked"] for result in results)
 
         if not mutual_guilds:
-            return await ctx.reply(embed=self._error_embed(f"🔍 No mutual servers found between you and {user.mention}."))
+            message = f"🔍 No mutual servers found between you and {user.mention}."
+            if unchecked:
+                message += f"\n⚠️ {unchecked} servers could not be checked in time."
+            return await ctx.reply(embed=self._error_embed(message))
 
         embed = discord.Embed(
             title=f"🔗 Mutual Servers with {user}",
@@ -57,6 +99,8 @@ class MutualGuilds(commands.Cog):
         for name, invite in mutual_guilds:
             display = f"[{name}]({invite})" if invite else f"{name} *(invite unavailable)*"
             embed.add_field(name="Server", value=display, inline=False)
+        if unchecked:
+            embed.set_footer(text=f"⚠️ {unchecked} servers could not be checked in time.")
 
         await ctx.reply(embed=embed)
 
@@ -0,0 +1,143 @@
+import logging
+import discord
+from aiohttp import web
+from discord.ext import commands
+from discord.ext.commands import Context, Bot, hybrid_command
+
+from utils.image_store import image_store
+from utils.members import member_cache
+from utils.memory import guild_cache_report, process_cache_report
+from utils.metrics import metrics
+from utils.ratelimit import limiter_stats
+from utils.resilience import guard_stats
+from utils import transcode
+from weather import air_quality, fetcher
+from config import get_cluster_metrics_port, get_cluster_id
+
+TOP_COMMANDS = 10
+TOP_GUILDS = 10
+
+log = logging.getLogger(__name__)
+
+def collect_caches() -> list[dict]:
+    return fetcher.cache_stats() + air_quality.cache_stats() + transcode.cache_stats() + [member_cache.stats(), image_store.stats()]
+
+def render_metrics() -> str:
+    return metrics.render(caches=collect_caches(), guards=guard_stats(), limiters=limiter_stats())
+
+def _mb(size: int | None) -> str:
+    return "—" if size is None else f"{size / 1024 / 1024:.1f} MB"
+
+def _ms(seconds: float | None) -> str:
+    if seconds is None:
+        return "—"
+    return ">30s" if seconds == float("inf") else f"≤{seconds * 1000:.0f}ms"
+
+class StatsCog(commands.Cog):
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self._runner: web.AppRunner | None = None
+
+    async def cog_load(self):
+        port = get_cluster_metrics_port(get_cluster_id())  # one endpoint per worker process
+        if not port:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            # Loopback only: scrape it from the same host or through an SSH tunnel
+            await web.TCPSite(self._runner, "127.0.0.1", port).start()
+            log.info("Metrics at http://127.0.0.1:%d/metrics", port)
+        except OSError as e:
+            log.warning("Metrics endpoint disabled, port %d unavailable: %s", port, e)
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def cog_unload(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _metrics_handler(self, request: web.Request) -> web.Response:
+        return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+    @hybrid_command(name="stats", description="Show command, upstream and cache metrics (owner only).", hidden=True)
+    @commands.is_owner()
+    async def stats(self, ctx: Context):
+        embed = discord.Embed(title="📈 Bot Metrics", color=discord.Color.blurple(), timestamp=discord.utils.utcnow())
+
+        busiest = sorted(metrics.commands.items(), key=lambda item: item[1].latency.count, reverse=True)[:TOP_COMMANDS]
+        embed.add_field(
+            name="⌨️ Commands (runs · errors · p50 · p95 · peak concurrency)",
+            value="\n".join(
+                f"`{name}` {s.latency.count} · {s.errors} · {_ms(s.latency.quantile(0.5))} · "
+                f"{_ms(s.latency.quantile(0.95))} · {s.max_in_flight}"
+                for name, s in busiest
+            ) or "No commands run yet.",
+            inline=False
+        )
+
+        embed.add_field(
+            name="🌐 Upstreams (requests · errors · p95)",
+            value="\n".join(
+                f"`{host}` {s.latency.count} · {s.errors} · {_ms(s.latency.quantile(0.95))}"
+                for host, s in sorted(metrics.upstreams.items())
+            ) or "No outbound requests yet.",
+            inline=False
+        )
+
+        embed.add_field(
+            name="🗃️ Caches (hit rate · entries)",
+            value="\n".join(
+                f"`{c['name']}` {c['hit_rate']:.0%} · {c['size']}" for c in collect_caches()
+            ),
+            inline=False
+        )
+
+        circuits = guard_stats()
+        if circuits:
+            embed.add_field(
+                name="⚡ Circuits",
+                value="\n".join(f"`{g['name']}` {g['state']} (opened {g['opened']}×)" for g in circuits),
+                inline=False
+            )
+
+        await ctx.reply(embed=embed, ephemeral=True)
+
+    @hybrid_command(name="memory", description="Show gateway cache memory per server (owner only).", hidden=True)
+    @commands.is_owner()
+    async def memory(self, ctx: Context):
+        await ctx.defer(ephemeral=True)
+        # Runs on the loop on purpose: the caches it walks are mutated by gateway events
+        guilds = guild_cache_report(self.bot)
+        process = process_cache_report(self.bot)
+        profile = self.bot.cache_profile
+
+        embed = discord.Embed(
+            title="🧠 Cache Memory",
+            description=(
+                f"Profile `{profile.name}` · RSS {_mb(process['rss'])}\n"
+                f"Guild caches ≈ {_mb(sum(g['bytes'] for g in guilds))} across {len(guilds)} servers\n"
+                f"Messages: {process['messages']} (≈ {_mb(process['message_bytes'])}) · "
+                f"Users: {process['users']} (≈ {_mb(process['user_bytes'])}) · "
+                f"Fetched members: {len(member_cache)}\n"
+                f"Steal images: {len(image_store)} ({_mb(image_store.memory_bytes)} in memory, "
+                f"{_mb(image_store.spilled_bytes)} on disk)"
+            ),
+            color=discord.Color.blurple()
+        )
+        for g in guilds[:TOP_GUILDS]:
+            embed.add_field(
+                name=f"{g['name']} (≈ {_mb(g['bytes'])})",
+                value=(
+                    f"{g['members']} members · {g['channels']} channels · {g['threads']} threads · "
+                    f"{g['roles']} roles · {g['emojis']} emojis · {g['stickers']} stickers"
+                ),
+                inline=False
+            )
+        await ctx.reply(embed=embed, ephemeral=True)
+
+async def setup(bot: Bot):
+    await bot.add_cog(StatsCog(bot))
@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord.ext.commands import Context, Bot, hybrid_command
 from datetime import datetime
 
+from utils.members import get_member
+
 class UserInfoCog(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
@@ -19,9 +21,14 @@ class UserInfoCog(commands.Cog):
 
         banner_url = profile.banner.url if hasattr(profile, "banner") and profile.banner else None
         avatar_url = user.display_avatar.url
-        member = ctx.guild.get_member(user.id) if ctx.guild else None
+        try:
+            member = await get_member(ctx.guild, user.id) if ctx.guild else None
+        except discord.HTTPException:
+            member = None
 
-        shared_servers = sum(1 for guild in self.bot.guilds if guild.get_member(user.id))
+        # Counting needs every guild's member list, which lean cache profiles don't keep
+        member_cache_enabled = self.bot.cache_profile.member_cache_flags.joined
+        shared_servers = sum(1 for guild in self.bot.guilds if guild.get_member(user.id)) if member_cache_enabled else None
 
         embed = discord.Embed(
             title=f"🌌 {user.name}'s Profile Overview",
@@ -46,7 +53,8 @@ class UserInfoCog(commands.Cog):
                 embed.add_field(name="🚀 Boosting Since", value=f"<t:{int(member.premium_since.timestamp())}:F>", inline=True)
 
         # ─── Bot-wide Info ─── #
-        embed.add_field(name="🌐 Shared Servers", value=f"`{shared_servers}`", inline=True)
+        if shared_servers is not None:
+            embed.add_field(name="🌐 Shared Servers", value=f"`{shared_servers}`", inline=True)
 
         await ctx.send(embed=embed)
 
@@ -1,42 +1,30 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime
-import pytz
-
-from weather.fetcher import get_current_weather, get_forecast
-from weather.formatter import format_current_weather, format_forecast, generate_weather_tip
-
-def convert_to_ist(dt_utc):
-    ist = pytz.timezone("Asia/Kolkata")
-    return dt_utc.astimezone(ist).strftime("%b %d, %Y | %I:%M %p IST")
-
-def get_weather_emoji(condition: str) -> str:
-    condition = condition.lower()
-    if "clear" in condition:
-        return "☀️"
-    elif "cloud" in condition:
-        return "☁️"
-    elif "rain" in condition:
-        return "🌧️"
-    elif "thunder" in condition:
-        return "⛈️"
-    elif "snow" in condition:
-        return "❄️"
-    elif "mist" in condition or "fog" in condition:
-        return "🌫️"
-    elif "wind" in condition:
-        return "🌪️"
-    else:
-        return "🌡️"
+from typing import Optional
+
+from weather.fetcher import fetch_weather_bundle, fetch_forecast, fetch_current_weather_many
+from weather.formatter import build_comparison_embed, build_outlook_embed, build_weather_embed, format_forecast
+from utils.autocomplete import city_autocomplete
+from utils.ratelimit import BATCH, request_priority
+from config import get_weather_batch_concurrency
+
+MAX_BATCH_CITIES = 10
 
 class WeatherCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
     @commands.hybrid_command(name="weather", description="Get detailed weather and forecast.")
-    @app_commands.describe(city="City name, or use 'lat:<value> lon:<value>' for coordinates.")
-    async def weather(self, ctx: commands.Context, *, city: str = "Muzaffarpur"):
+    @app_commands.describe(
+        city="City name, or use 'lat:<value> lon:<value>' for coordinates.",
+        cities=f"Compare several cities instead: comma-separated names, up to {MAX_BATCH_CITIES} (e.g. Delhi,Patna,Mumbai)."
+    )
+    async def weather(self, ctx: commands.Context, *, city: str = "Muzaffarpur", cities: Optional[str] = None):
+        # `city` takes the rest of a prefix command's message, so `cities` is slash-only;
+        # prefix users compare with !weathercompare
+        if cities is not None:
+            return await self._compare(ctx, cities)
         await ctx.defer()
 
         # Check for lat/lon override
@@ -49,47 +37,13 @@ class WeatherCog(commands.Cog):
             except ValueError:
                 return await ctx.reply("❌ Invalid `lat:` or `lon:` format. Use `lat:<value> lon:<value>`.")
         
-        current = get_current_weather(city=city, lat=lat, lon=lon)
-        forecast = get_forecast(city=city, lat=lat, lon=lon)
+        # Current conditions and forecast are requested concurrently
+        current, forecast = await fetch_weather_bundle(city=city, lat=lat, lon=lon)
 
         if not current:
             return await ctx.reply("❌ Failed to fetch weather. Please check your input or try again.")
 
-        # Emoji based on weather condition
-        condition = current['weather'][0]['description']
-        emoji = get_weather_emoji(condition)
-
-        # IST time conversion
-        dt_ist = convert_to_ist(datetime.utcfromtimestamp(current['dt']))
-
-        # Basic data
-        temp = round(current['main']['temp'])
-        feels_like = round(current['main']['feels_like'])
-        humidity = current['main']['humidity']
-        wind_speed = current['wind']['speed']
-        pressure = current['main']['pressure']
-        visibility_km = current.get('visibility', 0) / 1000
-
-        weather_desc = (
-            f"{emoji} **{condition.title()}**\n"
-            f"🌡️ Temp: `{temp}°C` | Feels like: `{feels_like}°C`\n"
-            f"💧 Humidity: `{humidity}%` | 💨 Wind: `{wind_speed} m/s`\n"
-            f"🧭 Pressure: `{pressure} hPa` | 👁️ Visibility: `{visibility_km} km`\n"
-            f"🕒 Last updated: `{dt_ist}`"
-        )
-
-        tip = generate_weather_tip(current)
-
-        embed = discord.Embed(
-            title=f"{emoji} Weather in {current['name']}",
-            description=f"{weather_desc}\n\n{tip}",
-            color=discord.Color.blurple()
-        )
-
-        icon_code = current['weather'][0]['icon']
-        embed.set_thumbnail(url=f"https://openweathermap.org/img/wn/{icon_code}@2x.png")
-        embed.set_footer(text="Powered by OpenWeatherMap")
-
+        embed = build_weather_embed(current)
         await ctx.reply(embed=embed)
 
         if forecast:
@@ -98,5 +52,49 @@ class WeatherCog(commands.Cog):
         else:
             await ctx.send("⚠️ No forecast data available.")
 
+    @weather.autocomplete("city")
+    async def weather_city_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await city_autocomplete(interaction, current)
+
+    @commands.hybrid_command(name="forecast", description="Get a 5-day weather outlook with daily highs, lows and rain chance.")
+    @app_commands.describe(city="City name to get the 5-day outlook for.")
+    async def forecast(self, ctx: commands.Context, *, city: str = "Muzaffarpur"):
+        await ctx.defer()
+
+        forecast = await fetch_forecast(city=city)
+        if not forecast:
+            return await ctx.reply("❌ Failed to fetch forecast. Please check your input or try again.")
+
+        await ctx.reply(embed=build_outlook_embed(forecast, days=5))
+
+    @forecast.autocomplete("city")
+    async def forecast_city_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await city_autocomplete(interaction, current)
+
+    @commands.hybrid_command(name="weathercompare", description="Compare current weather across several cities.")
+    @app_commands.describe(cities=f"Comma-separated city names, up to {MAX_BATCH_CITIES} (e.g. Delhi,Patna,Mumbai).")
+    async def weathercompare(self, ctx: commands.Context, *, cities: str):
+        await self._compare(ctx, cities)
+
+    async def _compare(self, ctx: commands.Context, cities: str):
+        await ctx.defer()
+
+        # Split, trim and de-duplicate while keeping the user's order
+        names = list(dict.fromkeys(name.strip() for name in cities.split(",") if name.strip()))
+        if not names:
+            return await ctx.reply("❌ Provide at least one city, e.g. `Delhi,Patna,Mumbai`.")
+        if len(names) > MAX_BATCH_CITIES:
+            return await ctx.reply(f"❌ You can compare up to {MAX_BATCH_CITIES} cities at once.")
+
+        with request_priority(BATCH):
+            results = await fetch_current_weather_many(names, concurrency=get_weather_batch_concurrency())
+        found = [(name, data) for name, data in results if data]
+        failed = [name for name, data in results if not data]
+
+        if not found:
+            return await ctx.reply("❌ Failed to fetch weather for every city. Please check your input or try again.")
+
+        await ctx.reply(embed=build_comparison_embed(found, failed))
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(WeatherCog(bot))
\ No newline at end of file
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+import discord
+from discord.ext import commands
+from discord import app_commands
+from typing import Optional
+
+from weather.formatter import build_weather_embed
+from weather.fetcher import fetch_current_weather, fetch_current_weather_many
+from weather.subscriptions import ReportWheel, Subscription, SubscriptionStore, parse_local_time, MINUTES_PER_DAY
+from utils.autocomplete import city_autocomplete
+from utils.ratelimit import SCHEDULED, request_priority
+from config import get_weather_batch_concurrency
+
+MAX_SUBSCRIPTIONS_PER_GUILD = 10
+MAX_CATCHUP_MINUTES = 5  # minutes replayed if the loop was delayed
+
+log = logging.getLogger(__name__)
+
+class WeatherReports(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.store: SubscriptionStore | None = None
+        self.wheel = ReportWheel()
+        self._runner: asyncio.Task | None = None
+        self._dispatches: set[asyncio.Task] = set()
+        # Local date each subscription last posted on. When DST ends the offset shrinks and the
+        # report moves an hour later, into a slot that is still ahead the same local day.
+        self._posted_on: dict[int, date] = {}
+
+    async def cog_load(self):
+        self.store = await asyncio.to_thread(SubscriptionStore)
+        subs = await asyncio.to_thread(self.store.all)
+        # In cluster mode each process only posts reports for guilds on its own shards
+        self.wheel = ReportWheel([sub for sub in subs if self.bot.owns_guild(sub.guild_id)])
+        self._runner = asyncio.create_task(self._run())
+
+    async def cog_unload(self):
+        if self._runner:
+            self._runner.cancel()
+        for task in self._dispatches:
+            task.cancel()
+        if self.store:
+            self.store.close()
+
+    # ─── SCHEDULER ─── #
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        last_minute = int(time.time() // 60)
+
+        while True:
+            # Wake just after the next minute boundary
+            await asyncio.sleep(60 - time.time() % 60 + 0.5)
+            current_minute = int(time.time() // 60)
+
+            for minute in range(max(last_minute + 1, current_minute - MAX_CATCHUP_MINUTES), current_minute + 1):
+                task = asyncio.create_task(self.dispatch(minute % MINUTES_PER_DAY))
+                self._dispatches.add(task)
+                task.add_done_callback(self._dispatch_done)
+            last_minute = current_minute
+
+    def _dispatch_done(self, task: asyncio.Task):
+        self._dispatches.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Scheduled report dispatch failed", exc_info=task.exception())
+
+    async def dispatch(self, utc_minute: int):
+        """
+        Posts every report due at `utc_minute`. Each distinct city is fetched once
+        and its embed fanned out to all subscribed channels.
+        """
+        groups = self.wheel.due(utc_minute)
+        if not groups:
+            return
+
+        locations = [subs[0].location for subs in groups.values()]
+        with request_priority(SCHEDULED):
+            results = await fetch_current_weather_many(locations, concurrency=get_weather_batch_concurrency())
+
+        deliveries = []
+        for subs, (_, current) in zip(groups.values(), results):
+            if not current:
+                log.warning("Scheduled report skipped, no weather for %s (%d channels)", subs[0].label, len(subs))
+                continue
+
+            # OpenWeatherMap names a coordinate after whatever is nearest; show the city as added
+            embed = build_weather_embed({**current, "name": subs[0].label})
+            utc_offset = current.get("timezone", subs[0].utc_offset)
+            local_date = (datetime.now(timezone.utc) + timedelta(seconds=utc_offset)).date()
+            for sub in subs:
+                if self._posted_on.get(sub.id) == local_date:
+                    continue  # already posted today, before the offset changed
+                self._posted_on[sub.id] = local_date
+                deliveries.append(self._deliver(sub, embed))
+                await self._track_offset(sub, current.get("timezone"))
+
+        await asyncio.gather(*deliveries)
+
+    async def _deliver(self, sub: Subscription, embed: discord.Embed):
+        channel = self.bot.get_channel(sub.channel_id)
+        try:
+            if channel is None:
+                channel = await self.bot.fetch_channel(sub.channel_id)
+            await channel.send(embed=embed)
+        except (discord.NotFound, discord.Forbidden):
+            # Channel deleted or bot lost access: drop the subscription
+            log.info("Removing weather report #%d, channel %d is unavailable", sub.id, sub.channel_id,
+                     extra={"context": {"guild": sub.guild_id}})
+            self.wheel.remove(sub.id)
+            self._posted_on.pop(sub.id, None)
+            await asyncio.to_thread(self.store.remove, sub.id)
+        except discord.HTTPException as e:
+            log.error("Failed to post weather report #%d: %s", sub.id, e, extra={"context": {"guild": sub.guild_id}})
+
+    async def _track_offset(self, sub: Subscription, utc_offset: int | None):
+        # Cities with daylight saving change offset twice a year
+        if utc_offset is None or utc_offset == sub.utc_offset:
+            return
+        self.wheel.add(sub._replace(utc_offset=utc_offset))
+        await asyncio.to_thread(self.store.update_offset, sub.id, utc_offset)
+
+    # ─── COMMANDS ─── #
+    @commands.hybrid_group(name="weatherreport", description="Manage scheduled daily weather reports.", fallback="list")
+    @commands.guild_only()
+    async def weatherreport(self, ctx: commands.Context):
+        subs = await asyncio.to_thread(self.store.for_guild, ctx.guild.id)
+        if not subs:
+            return await ctx.reply("ℹ️ No weather reports scheduled. Add one with `/weatherreport add`.")
+
+        embed = discord.Embed(title="📬 Scheduled Weather Reports", color=discord.Color.blurple())
+        for sub in sorted(subs, key=lambda s: s.local_minute):
+            embed.add_field(
+                name=f"#{sub.id} — {sub.label}",
+                value=f"<#{sub.channel_id}> every day at `{sub.local_time}` local time",
+                inline=False
+            )
+        await ctx.reply(embed=embed)
+
+    @weatherreport.command(name="add", description="Post the weather for a city every day at a local time.")
+    @app_commands.describe(
+        city="City to report on.",
+        at="Local time of the city, 24h HH:MM (e.g. 08:00).",
+        channel="Channel to post in (defaults to this one)."
+    )
+    @commands.has_guild_permissions(manage_guild=True)
+    async def weatherreport_add(self, ctx: commands.Context, city: str, at: str, channel: Optional[discord.TextChannel] = None):
+        await ctx.defer()
+        channel = channel or ctx.channel
+
+        local_minute = parse_local_time(at)
+        if local_minute is None:
+            return await ctx.reply("❌ Invalid time. Use 24h `HH:MM`, e.g. `08:00`.")
+
+        existing = await asyncio.to_thread(self.store.for_guild, ctx.guild.id)
+        if len(existing) >= MAX_SUBSCRIPTIONS_PER_GUILD:
+            return await ctx.reply(f"❌ This server already has {MAX_SUBSCRIPTIONS_PER_GUILD} weather reports.")
+
+        # Validates the city and gives us its coordinates and UTC offset
+        current = await fetch_current_weather(city=city)
+        if not current:
+            return await ctx.reply("❌ Failed to fetch weather. Please check your input or try again.")
+
+        coord = current.get("coord", {})
+        sub = await asyncio.to_thread(
+            self.store.add, ctx.guild.id, channel.id, current["name"], local_minute,
+            current.get("timezone", 0), ctx.author.id,
+            coord.get("lat"), coord.get("lon"), current.get("sys", {}).get("country"),
+        )
+        self.wheel.add(sub)
+        await ctx.reply(f"✅ Report #{sub.id}: weather for **{sub.label}** in {channel.mention} every day at `{sub.local_time}` local time.")
+
+    @weatherreport_add.autocomplete("city")
+    async def weatherreport_city_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await city_autocomplete(interaction, current)
+
+    @weatherreport.command(name="remove", description="Cancel a scheduled weather report.")
+    @app_commands.describe(report_id="Report number from /weatherreport list.")
+    @commands.has_guild_permissions(manage_guild=True)
+    async def weatherreport_remove(self, ctx: commands.Context, report_id: int):
+        removed = await asyncio.to_thread(self.store.remove, report_id, ctx.guild.id)
+        if not removed:
+            return await ctx.reply("❌ No such weather report in this server.")
+        self.wheel.remove(report_id)
+        self._posted_on.pop(report_id, None)
+        await ctx.reply(f"🗑️ Weather report #{report_id} cancelled.")
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(WeatherReports(bot))
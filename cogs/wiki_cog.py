@@ -1,8 +1,14 @@
+import asyncio
+import logging
 import discord
 from discord.ext import commands
-import requests
+import aiohttp
 from urllib.parse import quote
 
+from config import get_upstream_url
+
+log = logging.getLogger(__name__)
+
 class WikiDebug(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -12,24 +18,21 @@ class WikiDebug(commands.Cog):
         await ctx.defer()
 
         encoded_topic = quote(topic.strip())
-        url = f"https://en.wikipedia.org/wiki/{encoded_topic}"
+        url = f"{get_upstream_url('wikipedia')}/{encoded_topic}"
 
         try:
-            response = requests.get(url, timeout=10)
-        except requests.exceptions.RequestException as e:
-            await ctx.send(f":x: Request failed: `{e}`")
+            status, html_data = await self.bot.http_service.get_text(url, timeout=aiohttp.ClientTimeout(total=10))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await ctx.send(f":x: Request failed: `{e!r}`")
             return
 
-        if response.status_code != 200:
-            await ctx.send(f":x: Wikipedia returned status code {response.status_code}")
+        if status != 200:
+            await ctx.send(f":x: Wikipedia returned status code {status}")
             return
 
-        html_data = response.text
-
-        # Print to console for debugging
-        print("\n=== RAW HTML START ===\n")
-        print(html_data[:2000])  # First 2000 characters
-        print("\n=== RAW HTML END ===\n")
+        # The raw dump is only useful when debugging; LOG_LEVEL=DEBUG turns it on
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Raw HTML for %s (first 2000 characters):\n%s", url, html_data[:2000])
 
         await ctx.send(f"✅ Fetched {len(html_data)} characters from Wikipedia for `{topic}`.\nURL: {url}")
 
@@ -12,3 +12,147 @@ def get_weather_api_key():
 
 def get_rapidapi_key():
     return os.getenv("RAPIDAPI_KEY")
+
+# Max upstream weather lookups a single multi-city command may run at once
+def get_weather_batch_concurrency() -> int:
+    return int(os.getenv("WEATHER_BATCH_CONCURRENCY", "4"))
+
+# Directory for the bot's persistent state (subscriptions, caches)
+def get_data_dir() -> str:
+    path = os.getenv("DATA_DIR", "data")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# Client-side request quotas per upstream: (requests per minute, burst)
+UPSTREAM_RATE_LIMITS = {
+    "openweathermap": (60, 10),
+    "rapidapi": (30, 5),
+}
+
+def get_upstream_rate_limit(upstream: str) -> tuple[float, int]:
+    per_minute, burst = UPSTREAM_RATE_LIMITS.get(upstream, (60, 10))
+    prefix = upstream.upper()
+    return (
+        _positive(f"{prefix}_RATE_PER_MINUTE", float(os.getenv(f"{prefix}_RATE_PER_MINUTE", per_minute))),
+        _positive(f"{prefix}_RATE_BURST", int(os.getenv(f"{prefix}_RATE_BURST", burst))),
+    )
+
+# Token buckets refill at rate/60 per second and need a whole token to pass anything
+def _positive(name: str, value):
+    if value <= 0:
+        raise ValueError(f"{name} must be greater than 0, got {value}")
+    return value
+
+# Upstream API base URLs; point them at benchmarks/upstream_sim.py to run offline
+UPSTREAM_BASE_URLS = {
+    "openweathermap": "https://api.openweathermap.org/data/2.5",
+    "rapidapi": "https://air-quality-by-api-ninjas.p.rapidapi.com/v1/airquality",
+    "wikipedia": "https://en.wikipedia.org/wiki",
+}
+
+def get_upstream_url(upstream: str) -> str:
+    return os.getenv(f"{upstream.upper()}_BASE_URL", UPSTREAM_BASE_URLS[upstream]).rstrip("/")
+
+# Send a second upstream request when the first exceeds the p95 latency
+def get_hedging_enabled() -> bool:
+    return os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes")
+
+# Local Prometheus endpoint (127.0.0.1 only); 0 disables it
+def get_metrics_port() -> int:
+    return int(os.getenv("METRICS_PORT", 9108))
+
+# Push slash commands to Discord even if their signatures look unchanged
+def get_force_tree_sync() -> bool:
+    return os.getenv("FORCE_TREE_SYNC", "false").lower() in ("1", "true", "yes")
+
+# Total gateway shards; unset lets Discord recommend a count
+def get_shard_count() -> int | None:
+    value = os.getenv("SHARD_COUNT")
+    return int(value) if value else None
+
+# Shards this process runs, e.g. "0-3" or "0,2,4"; unset runs all of them
+def get_shard_ids() -> list[int] | None:
+    value = os.getenv("SHARD_IDS")
+    if not value:
+        return None
+    ids = []
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+# Worker processes the launcher spreads shards across
+def get_cluster_count() -> int:
+    return int(os.getenv("CLUSTERS", 1))
+
+# Set by the launcher for each worker process
+def get_cluster_id() -> int:
+    return int(os.getenv("CLUSTER_ID", 0))
+
+# Loopback port of the launcher's IPC hub
+def get_ipc_port() -> int:
+    return int(os.getenv("IPC_PORT", 9120))
+
+# Metrics port of one worker: METRICS_PORT + cluster id, stepping over the IPC port; 0 when disabled
+def get_cluster_metrics_port(cluster_id: int) -> int:
+    base = get_metrics_port()
+    if not base:
+        return 0
+    port = base + cluster_id
+    return port + 1 if base <= get_ipc_port() <= port else port
+
+# Shared secret workers present to the IPC hub; only set when running under the launcher
+def get_ipc_secret() -> str | None:
+    return os.getenv("IPC_SECRET")
+
+# Gateway cache profile: "lean" (default) or "full"; see utils/cache_profile.py
+def get_cache_profile() -> str:
+    return os.getenv("CACHE_PROFILE", "lean").lower()
+
+# Per-setting overrides on top of the cache profile; None keeps the profile's value
+def get_cache_overrides() -> dict:
+    overrides = {}
+    if os.getenv("MAX_MESSAGES") is not None:
+        value = int(os.environ["MAX_MESSAGES"])
+        overrides["max_messages"] = value or None  # 0 disables the message cache
+    if os.getenv("CHUNK_GUILDS_AT_STARTUP") is not None:
+        overrides["chunk_guilds_at_startup"] = os.environ["CHUNK_GUILDS_AT_STARTUP"].lower() in ("1", "true", "yes")
+    if os.getenv("INTENTS"):
+        overrides["intents"] = [name.strip() for name in os.environ["INTENTS"].split(",") if name.strip()]
+    return overrides
+
+# /steal: images downloaded at once, and the largest body accepted (shrunk to Discord's limits on upload)
+def get_steal_concurrency() -> int:
+    return int(os.getenv("STEAL_CONCURRENCY", "4"))
+
+def get_steal_max_bytes() -> int:
+    return int(os.getenv("STEAL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Memory the shared steal image store may use before writing images to a temp directory
+def get_image_store_memory() -> int:
+    return int(os.getenv("IMAGE_STORE_MEMORY", str(32 * 1024 * 1024)))
+
+# Worker processes that resize and recompress images for emoji/sticker uploads
+def get_transcode_workers() -> int:
+    return int(os.getenv("TRANSCODE_WORKERS", "2"))
+
+# Bulk emoji import: creations per minute and burst per server, paced below Discord's emoji route limits
+def get_emoji_import_rate() -> tuple[float, int]:
+    return (
+        _positive("EMOJI_IMPORT_RATE_PER_MINUTE", float(os.getenv("EMOJI_IMPORT_RATE_PER_MINUTE", "10"))),
+        _positive("EMOJI_IMPORT_BURST", int(os.getenv("EMOJI_IMPORT_BURST", "3"))),
+    )
+
+# Largest zip accepted by /emojiimport zip
+def get_import_zip_max_bytes() -> int:
+    return int(os.getenv("IMPORT_ZIP_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Logging: level name, "text" or "json" lines, and an optional rotating log file
+def get_log_level() -> str:
+    return os.getenv("LOG_LEVEL", "INFO").upper()
+
+def get_log_format() -> str:
+    return os.getenv("LOG_FORMAT", "text").lower()
+
+def get_log_file() -> str | None:
+    return os.getenv("LOG_FILE")
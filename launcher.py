@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import os
+import signal
+import sys
+
+from config import load_env, get_discord_token, get_shard_count, get_cluster_count, get_ipc_port, get_cluster_metrics_port
+from utils.http import HTTPService
+from utils.ipc import IPCHub, new_secret
+from utils.log import setup_logging
+
+# Runs the bot as several worker processes, each owning a contiguous range of shards:
+#   CLUSTERS=4 python launcher.py
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_DELAY = 5  # seconds, doubled per consecutive crash
+MAX_RESTART_DELAY = 300
+STABLE_AFTER = 60  # a worker that ran this long resets its crash backoff
+
+load_env()
+setup_logging()
+log = logging.getLogger("launcher")
+
+async def recommended_shards(token: str) -> int:
+    async with HTTPService() as http:
+        status, data = await http.get_json(GATEWAY_URL, headers={"Authorization": f"Bot {token}"})
+    if status != 200:
+        raise RuntimeError(f"Could not get the recommended shard count (HTTP {status}): {data}")
+    return data["shards"]
+
+def split_shards(shard_count: int, clusters: int) -> list[list[int]]:
+    """
+    Splits shard ids into `clusters` contiguous, near-equal ranges.
+    """
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    groups, start = [], 0
+    for i in range(clusters):
+        end = start + size + (i < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+async def run_worker(cluster_id: int, shards: list[int], shard_count: int, env: dict, stopping: asyncio.Event):
+    delay = RESTART_DELAY
+    worker_env = {
+        **env,
+        "CLUSTER_ID": str(cluster_id),
+        "SHARD_IDS": ",".join(map(str, shards)),
+        "SHARD_COUNT": str(shard_count),
+    }
+
+    while not stopping.is_set():
+        log.info("Starting cluster %d with shards %d-%d", cluster_id, shards[0], shards[-1])
+        started = asyncio.get_running_loop().time()
+        process = await asyncio.create_subprocess_exec(sys.executable, "bot.py", env=worker_env)
+
+        waiter = asyncio.ensure_future(process.wait())
+        stop = asyncio.ensure_future(stopping.wait())
+        await asyncio.wait({waiter, stop}, return_when=asyncio.FIRST_COMPLETED)
+
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            waiter.cancel()
+            return
+        stop.cancel()
+
+        ran_for = asyncio.get_running_loop().time() - started
+        if ran_for > STABLE_AFTER:
+            delay = RESTART_DELAY
+        log.error("Cluster %d exited with code %s, restarting in %ds", cluster_id, process.returncode, delay)
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, MAX_RESTART_DELAY)
+
+async def main():
+    token = get_discord_token()
+    if not token:
+        log.error("DISCORD_TOKEN not found in environment variables.")
+        return
+
+    shard_count = get_shard_count() or await recommended_shards(token)
+    groups = split_shards(shard_count, get_cluster_count())
+    log.info("%d shards across %d clusters", shard_count, len(groups))
+    if get_cluster_metrics_port(0):
+        ports = [get_cluster_metrics_port(cluster_id) for cluster_id in range(len(groups))]
+        log.info("Metrics ports %s (IPC on %d)", ", ".join(map(str, ports)), get_ipc_port())
+
+    secret = new_secret()
+    hub = IPCHub(get_ipc_port(), secret)
+    await hub.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    env = {**os.environ, "IPC_SECRET": secret}
+    try:
+        await asyncio.gather(*(
+            run_worker(cluster_id, shards, shard_count, env, stopping)
+            for cluster_id, shards in enumerate(groups)
+        ))
+    finally:
+        await hub.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
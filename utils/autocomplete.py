@@ -0,0 +1,14 @@
+import discord
+from discord import app_commands
+
+from weather.gazetteer import complete_city
+
+async def city_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    """
+    Suggests gazetteer cities for a `city` argument. Values are canonical names,
+    so the command resolves them without a fuzzy lookup.
+    """
+    return [
+        app_commands.Choice(name=city.label, value=city.name)
+        for city in complete_city(current, limit=25)
+    ]
@@ -0,0 +1,58 @@
+from typing import NamedTuple
+
+import discord
+
+from config import get_cache_profile, get_cache_overrides
+
+class CacheProfile(NamedTuple):
+    name: str
+    intents: discord.Intents
+    member_cache_flags: discord.MemberCacheFlags
+    max_messages: int | None
+    chunk_guilds_at_startup: bool
+
+    def client_options(self) -> dict:
+        return {
+            "intents": self.intents,
+            "member_cache_flags": self.member_cache_flags,
+            "max_messages": self.max_messages,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+        }
+
+def _full() -> CacheProfile:
+    # The library defaults: everything the default intents deliver is cached
+    intents = discord.Intents.default()
+    intents.message_content = True  # Needed for reading commands
+    return CacheProfile("full", intents, discord.MemberCacheFlags.from_intents(intents), 1000, True)
+
+def _lean() -> CacheProfile:
+    # Only the events our commands read. Members are fetched on demand (utils/members.py)
+    # and no message history is kept, since no cog looks at edits or deletions.
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    intents.message_content = True
+    intents.emojis_and_stickers = True  # emoji and sticker commands read guild.emojis/stickers
+    return CacheProfile("lean", intents, discord.MemberCacheFlags.none(), None, False)
+
+PROFILES = {"full": _full, "lean": _lean}
+
+def build_cache_profile() -> CacheProfile:
+    """
+    Builds the profile named by CACHE_PROFILE, then applies MAX_MESSAGES,
+    CHUNK_GUILDS_AT_STARTUP and INTENTS overrides.
+    """
+    name = get_cache_profile()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown CACHE_PROFILE {name!r}, expected one of: {', '.join(PROFILES)}")
+    profile = PROFILES[name]()
+
+    overrides = get_cache_overrides()
+    if "intents" in overrides:
+        intents = discord.Intents(**{flag: True for flag in overrides.pop("intents")})
+        overrides["intents"] = intents
+        # A caching profile caches whatever the new intents deliver; a non-caching one stays off
+        if profile.member_cache_flags.value:
+            overrides["member_cache_flags"] = discord.MemberCacheFlags.from_intents(intents)
+    return profile._replace(**overrides)
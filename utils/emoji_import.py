@@ -0,0 +1,243 @@
+import io
+import json
+import os
+import re
+import shutil
+import zipfile
+from collections import Counter
+
+import discord
+
+from config import get_data_dir
+from utils.images import sniff_image_type
+from utils.transcode import EMOJI, STICKER, is_animated
+
+# Item states
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+MAX_ITEMS = 250  # per import; a boosted server has at most 250 emojis per kind anyway
+MAX_ARCHIVE_BYTES = 100 * 1024 * 1024  # uncompressed total read from one zip
+
+CUSTOM_EMOJI_RE = re.compile(r"<(a?):([A-Za-z0-9_]{2,32}):(\d{15,22})>")
+STICKER_FOLDERS = {"sticker", "stickers"}
+
+class ArchiveError(Exception):
+    """Raised when an uploaded archive is not a readable zip."""
+
+def new_item(kind: str, name: str, *, url: str | None = None, path: str | None = None,
+             animated: bool = False, emoji: str | None = None, description: str | None = None) -> dict:
+    """
+    One emoji or sticker to create, in the JSON-friendly form the import state is saved in.
+    The image comes from `url`, or from `path` for files extracted from an archive.
+    """
+    return {
+        "kind": kind,
+        "name": name,
+        "url": url,
+        "path": path,
+        "animated": animated,
+        "emoji": emoji,  # sticker tag
+        "description": description,
+        "status": PENDING,
+        "error": None,
+    }
+
+def sanitize_name(name: str, kind: str) -> str | None:
+    """
+    `name` made acceptable to Discord: emoji names are 2-32 of [A-Za-z0-9_], sticker
+    names 2-30 characters of anything. None if nothing usable is left.
+    """
+    if kind == STICKER:
+        name = " ".join(name.split())[:30]
+    else:
+        name = re.sub(r"[^A-Za-z0-9_]+", "_", name).strip("_")[:32]
+    if len(name) == 1:
+        name += "_"
+    return name or None
+
+# -----------------------------
+# 📥 SOURCES
+# -----------------------------
+
+def items_from_message(message: discord.Message) -> list[dict]:
+    """
+    Custom emojis written in a message (content and embed descriptions) and its stickers.
+    """
+    text = "\n".join([message.content or ""] + [embed.description or "" for embed in message.embeds])
+    items, seen = [], set()
+    for animated, name, emoji_id in CUSTOM_EMOJI_RE.findall(text):
+        if emoji_id in seen:
+            continue
+        seen.add(emoji_id)
+        url = discord.PartialEmoji(name=name, id=int(emoji_id), animated=bool(animated)).url
+        items.append(new_item(EMOJI, name, url=url, animated=bool(animated)))
+    for sticker in message.stickers:
+        items.append(new_item(STICKER, sticker.name, url=sticker.url))
+    return items
+
+def items_from_guild(emojis: list[discord.Emoji], stickers: list[discord.GuildSticker]) -> list[dict]:
+    items = [new_item(EMOJI, emoji.name, url=emoji.url, animated=emoji.animated) for emoji in emojis]
+    items += [
+        new_item(STICKER, sticker.name, url=sticker.url, emoji=sticker.emoji or None, description=sticker.description or None)
+        for sticker in stickers
+    ]
+    return items
+
+def extract_zip(data: bytes, directory: str, max_items: int, max_entry_bytes: int) -> tuple[list[dict], list[tuple[str, str]]]:
+    """
+    Unpacks the images in a zip into `directory` and returns (items, skipped), with skipped
+    entries as (filename, reason). Files under a top-level "stickers/" folder become stickers,
+    everything else emojis named after the file. Sizes are enforced while reading, not taken
+    from the archive's headers. Blocking; run it through asyncio.to_thread.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise ArchiveError("not a valid zip file") from None
+
+    os.makedirs(directory, exist_ok=True)
+    items, skipped, total = [], [], 0
+    with archive:
+        for info in archive.infolist():
+            parts = info.filename.replace("\\", "/").split("/")
+            filename = parts[-1]
+            if info.is_dir() or "__MACOSX" in parts or not filename or filename.startswith("."):
+                continue
+            if len(items) == max_items:
+                skipped.append((filename, f"only {max_items} items per import"))
+                continue
+            if info.file_size > max_entry_bytes:
+                skipped.append((filename, "too large"))
+                continue
+
+            try:
+                with archive.open(info) as entry:
+                    body = entry.read(max_entry_bytes + 1)
+            except (RuntimeError, zipfile.BadZipFile, OSError):  # encrypted or corrupt entries
+                skipped.append((filename, "unreadable"))
+                continue
+            if len(body) > max_entry_bytes:
+                skipped.append((filename, "too large"))
+                continue
+            total += len(body)
+            if total > MAX_ARCHIVE_BYTES:
+                skipped.append((filename, "archive too large"))
+                break
+
+            extension = sniff_image_type(body[:32])
+            kind = STICKER if len(parts) > 1 and parts[0].lower() in STICKER_FOLDERS else EMOJI
+            if extension is None or (extension == "json" and kind != STICKER):
+                skipped.append((filename, "unsupported format"))
+                continue
+
+            path = os.path.join(directory, f"{len(items):04d}.{extension}")
+            with open(path, "wb") as f:
+                f.write(body)
+            # From the frames, not the extension: animated PNG/WebP take an animated emoji slot too
+            animated = extension != "json" and is_animated(body)
+            items.append(new_item(kind, os.path.splitext(filename)[0], path=path, animated=animated))
+    return items, skipped
+
+# -----------------------------
+# 🧮 PLANNING
+# -----------------------------
+
+def free_slots(guild: discord.Guild) -> dict[str, int]:
+    animated = sum(1 for emoji in guild.emojis if emoji.animated)
+    return {
+        "static": guild.emoji_limit - (len(guild.emojis) - animated),
+        "animated": guild.emoji_limit - animated,
+        "sticker": guild.sticker_limit - len(guild.stickers),
+    }
+
+def slot_of(item: dict) -> str:
+    if item["kind"] == STICKER:
+        return "sticker"
+    return "animated" if item["animated"] else "static"
+
+def plan(items: list[dict], guild: discord.Guild):
+    """
+    Marks items that cannot be created as skipped before anything is sent to Discord:
+    unusable or already taken names, and everything past the server's free slots.
+    """
+    taken = {EMOJI: {emoji.name for emoji in guild.emojis}, STICKER: {sticker.name for sticker in guild.stickers}}
+    free = free_slots(guild)
+    for item in items:
+        name = sanitize_name(item["name"], item["kind"])
+        if name is None:
+            item.update(status=SKIPPED, error="no usable name")
+            continue
+        item["name"] = name
+        if name in taken[item["kind"]]:
+            item.update(status=SKIPPED, error="name already in use")
+            continue
+        slot = slot_of(item)
+        if free[slot] <= 0:
+            item.update(status=SKIPPED, error=f"no free {slot} slot")
+            continue
+        free[slot] -= 1
+        taken[item["kind"]].add(name)
+
+def mark_existing(items: list[dict], guild: discord.Guild) -> int:
+    """
+    Marks pending items whose name the server already has as done. A resumed import cannot
+    tell whether the item it was on when it stopped got created, and Discord allows
+    duplicate names, so the server's current emojis and stickers decide. Returns how many.
+    """
+    existing = {EMOJI: {emoji.name for emoji in guild.emojis}, STICKER: {sticker.name for sticker in guild.stickers}}
+    marked = 0
+    for item in items:
+        if item["status"] == PENDING and item["name"] in existing[item["kind"]]:
+            item.update(status=DONE, error=None)
+            marked += 1
+    return marked
+
+def counts(items: list[dict]) -> Counter:
+    return Counter(item["status"] for item in items)
+
+# -----------------------------
+# 💾 RESUMABLE STATE
+# -----------------------------
+# One JSON file per server with every item and its status, rewritten after each item, plus a
+# directory for files extracted from an uploaded zip. All blocking; run through asyncio.to_thread.
+
+def _imports_dir() -> str:
+    path = os.path.join(get_data_dir(), "imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def files_dir(guild_id: int) -> str:
+    return os.path.join(_imports_dir(), str(guild_id))
+
+def _job_path(guild_id: int) -> str:
+    return os.path.join(_imports_dir(), f"{guild_id}.json")
+
+def save_job(job: dict):
+    path = _job_path(job["guild_id"])
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(path + ".tmp", path)  # a crash mid-write leaves the previous state intact
+
+def load_job(guild_id: int) -> dict | None:
+    try:
+        with open(_job_path(guild_id), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def load_jobs() -> list[dict]:
+    directory = _imports_dir()
+    return [
+        job for job in (load_job(int(name[:-5])) for name in os.listdir(directory) if name.endswith(".json") and name[:-5].isdigit())
+        if job is not None
+    ]
+
+def delete_job(guild_id: int):
+    try:
+        os.remove(_job_path(guild_id))
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(files_dir(guild_id), ignore_errors=True)
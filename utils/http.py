@@ -0,0 +1,236 @@
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+import aiohttp
+
+from utils.metrics import metrics
+from utils.ratelimit import RateLimitTimeout
+
+# Defaults for every outbound request the bot makes
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
+TOTAL_CONNECTIONS = 100
+CONNECTIONS_PER_HOST = 20
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept for reuse
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STREAM_CHUNK = 64 * 1024
+HEAD_BYTES = 32  # enough to recognise any file signature we check
+RETRY_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+MAX_RETRY_AFTER = 10.0  # seconds; a 429 asking for a longer wait is returned instead of retried
+
+class HostStats:
+    __slots__ = ("requests", "errors", "seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+class HTTPService:
+    """
+    Bot-wide outbound HTTP: one aiohttp session with per-host connection limits,
+    a DNS cache, keep-alive and default timeouts. Created in the bot's setup_hook
+    and closed on shutdown; every cog and the weather package go through it.
+    """
+
+    def __init__(self, limit: int = TOTAL_CONNECTIONS, limit_per_host: int = CONNECTIONS_PER_HOST,
+                 timeout: aiohttp.ClientTimeout = DEFAULT_TIMEOUT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session: aiohttp.ClientSession | None = None
+        self.hosts: defaultdict[str, HostStats] = defaultdict(HostStats)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+            # Give the connector a moment to close TLS transports cleanly
+            await asyncio.sleep(0.25)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _record(self, url: str, started: float, ok: bool):
+        host = urlsplit(url).hostname or "unknown"
+        elapsed = time.perf_counter() - started
+        stats = self.hosts[host]
+        stats.requests += 1
+        stats.seconds += elapsed
+        if not ok:
+            stats.errors += 1
+        metrics.observe_upstream(host, elapsed, ok)
+
+    async def get_json(self, url: str, *, params: dict | None = None, headers: dict | None = None,
+                       retries: int = 1, timeout: aiohttp.ClientTimeout | None = None,
+                       before_retry=None) -> tuple[int, object]:
+        """
+        GETs `url` and decodes the body as JSON. 429/5xx answers and transport errors are
+        retried up to `retries` attempts with exponential backoff, waiting at least as long
+        as a 429's Retry-After (a 429 asking for more than MAX_RETRY_AFTER is returned as is).
+        `before_retry` is awaited before every retry, so a client-side rate limiter's `acquire`
+        charges retries like first attempts; if it raises RateLimitTimeout, retrying stops.
+        Returns (status, data); transport errors after the last attempt are raised.
+        """
+        delay = RETRY_BACKOFF
+        for attempt in range(1, retries + 1):
+            started = time.perf_counter()
+            last, error, wait = None, None, delay
+            try:
+                async with self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout) as response:
+                    data = await response.json(content_type=None)
+                    self._record(url, started, response.status < 500)
+                    if response.status not in RETRY_STATUSES or attempt == retries:
+                        return response.status, data
+                    if response.status == 429:
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        if retry_after is not None:
+                            if retry_after > MAX_RETRY_AFTER:
+                                return response.status, data
+                            wait = max(wait, retry_after)
+                    last = response.status, data
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                self._record(url, started, False)
+                if attempt == retries:
+                    raise
+                error = e
+
+            await asyncio.sleep(wait)
+            delay *= 2
+            if before_retry is not None:
+                try:
+                    await before_retry()
+                except RateLimitTimeout:
+                    if last is not None:
+                        return last
+                    raise error from None
+
+    async def get_text(self, url: str, *, headers: dict | None = None,
+                       timeout: aiohttp.ClientTimeout | None = None) -> tuple[int, str]:
+        """
+        GETs `url` and returns (status, body text). Transport errors are raised.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, headers=headers, timeout=timeout or self.timeout) as response:
+                text = await response.text()
+                self._record(url, started, response.status < 500)
+                return response.status, text
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._record(url, started, False)
+            raise
+
+    async def get_bytes(self, url: str, *, timeout: aiohttp.ClientTimeout | None = None) -> bytes | None:
+        """
+        GETs `url` and returns the body, or None on a non-200 answer or transport error.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, timeout=timeout or self.timeout) as response:
+                body = await response.read() if response.status == 200 else None
+                self._record(url, started, response.status == 200)
+                return body
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._record(url, started, False)
+            return None
+
+    async def get_bytes_capped(self, url: str, *, max_bytes: int, check_head=None,
+                               timeout: aiohttp.ClientTimeout | None = None) -> tuple[bytes | None, str | None]:
+        """
+        Streams `url` and returns (body, None), or (None, reason) on a non-200 answer, a body
+        over `max_bytes`, a start that `check_head(first bytes)` rejects, or a transport error.
+        Reading stops as soon as the outcome is known, so oversized or wrong files cost at
+        most one chunk.
+        """
+        started = time.perf_counter()
+        try:
+            async with self.session.get(url, timeout=timeout or self.timeout) as response:
+                if response.status != 200:
+                    self._record(url, started, response.status < 500)
+                    return None, f"HTTP {response.status}"
+                if response.content_length is not None and response.content_length > max_bytes:
+                    self._record(url, started, True)
+                    return None, "too large"
+
+                body = bytearray()
+                checked = check_head is None
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK):
+                    body += chunk
+                    if len(body) > max_bytes:
+                        self._record(url, started, True)
+                        return None, "too large"
+                    if not checked and len(body) >= HEAD_BYTES:
+                        if not check_head(bytes(body[:HEAD_BYTES])):
+                            self._record(url, started, True)
+                            return None, "unsupported format"
+                        checked = True
+
+                self._record(url, started, True)
+                if not checked and not check_head(bytes(body)):
+                    return None, "unsupported format"
+                return bytes(body), None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._record(url, started, False)
+            return None, type(e).__name__
+
+    def stats(self) -> dict:
+        return {
+            host: {
+                "requests": s.requests,
+                "errors": s.errors,
+                "avg_ms": s.seconds / s.requests * 1000 if s.requests else 0.0,
+            }
+            for host, s in self.hosts.items()
+        }
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Seconds from a Retry-After header given in seconds; None if absent or an HTTP date.
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+# -----------------------------
+# 🌐 PROCESS-WIDE INSTANCE
+# -----------------------------
+
+_service: HTTPService | None = None
+
+def set_http_service(service: HTTPService | None):
+    """
+    Registers the bot-owned service so library code (e.g. the weather package) can reach it.
+    """
+    global _service
+    _service = service
+
+def get_http_service() -> HTTPService:
+    """
+    Returns the bot-owned service, or a lazily created standalone one for scripts.
+    """
+    global _service
+    if _service is None:
+        _service = HTTPService()
+    return _service
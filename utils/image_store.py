@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import itertools
+import os
+import shutil
+import tempfile
+
+from config import get_image_store_memory
+
+SPILL_THRESHOLD = 256 * 1024  # blobs at least this large always live on disk
+
+class _Blob:
+    __slots__ = ("refs", "size", "data", "path")
+
+    def __init__(self, size: int):
+        self.refs = 0
+        self.size = size
+        self.data: bytes | None = None  # in-memory blobs, and spilled ones until their file is written
+        self.path: str | None = None  # spilled blobs
+
+    @property
+    def on_disk(self) -> bool:
+        return self.path is not None and self.data is None
+
+def _write(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+class ImageStore:
+    """
+    Content-addressed store for downloaded images shared by every steal session.
+    `put` returns the image's SHA-256 key and takes a reference; `release` drops it and
+    the blob is freed with its last reference, so sessions holding the same image share
+    one copy. Small blobs stay in memory up to `memory_budget` bytes; larger ones, and
+    anything over budget, are written to a temp directory off the event loop. Spilled images
+    are only ever read by the transcode workers, straight from their files (see `source`).
+    """
+
+    def __init__(self, memory_budget: int, spill_threshold: int = SPILL_THRESHOLD):
+        self.memory_budget = memory_budget
+        self.spill_threshold = spill_threshold
+        self._blobs: dict[str, _Blob] = {}
+        self._dir: str | None = None
+        self._names = itertools.count()  # a freed and re-added image never reuses a file still being written
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+
+        self.hits = 0  # puts that found the image already stored
+        self.misses = 0
+        self.spills = 0
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._blobs
+
+    async def put(self, data: bytes) -> str:
+        if len(data) >= self.spill_threshold:
+            key = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())  # hashlib releases the GIL
+        else:
+            key = hashlib.sha256(data).hexdigest()
+        blob = self._blobs.get(key)
+        if blob is not None:
+            self.hits += 1
+            blob.refs += 1
+            return key
+
+        self.misses += 1
+        blob = self._blobs[key] = _Blob(len(data))
+        blob.refs = 1
+        blob.data = data
+        if len(data) >= self.spill_threshold or self.memory_bytes + len(data) > self.memory_budget:
+            await self._spill(key, blob)
+        else:
+            self.memory_bytes += len(data)
+        return key
+
+    def acquire(self, key: str):
+        """
+        Takes another reference to a stored image (e.g. a second view over the same list).
+        """
+        self._blobs[key].refs += 1
+
+    def release(self, key: str):
+        blob = self._blobs.get(key)
+        if blob is None:
+            return
+        blob.refs -= 1
+        if blob.refs > 0:
+            return
+
+        del self._blobs[key]
+        if blob.path is None:
+            self.memory_bytes -= blob.size
+        elif blob.on_disk:
+            os.unlink(blob.path)
+            self.spilled_bytes -= blob.size
+        # else: still being written; `_spill` removes the file once it is done
+
+    def source(self, key: str) -> bytes | str:
+        """
+        A stored image for the transcode pool: the bytes of an in-memory image, or the path
+        of a spilled one so the worker reads the file itself instead of the loop copying it
+        out. Valid only while the caller holds a reference.
+        """
+        blob = self._blobs[key]
+        return blob.path if blob.on_disk else blob.data
+
+    async def _spill(self, key: str, blob: _Blob):
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="rishource-images-")
+        blob.path = os.path.join(self._dir, f"{key[:16]}-{next(self._names)}")
+        try:
+            await asyncio.to_thread(_write, blob.path, blob.data)
+        except OSError:
+            self._unlink(blob.path)
+            blob.path = None
+            if self._blobs.get(key) is blob:
+                self.memory_bytes += blob.size  # disk full or similar: keep it in memory over budget
+            return
+
+        if self._blobs.get(key) is not blob:  # released (or the store closed) while writing
+            self._unlink(blob.path)
+            return
+        blob.data = None
+        self.spilled_bytes += blob.size
+        self.spills += 1
+
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self._blobs.clear()
+        self.memory_bytes = self.spilled_bytes = 0
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def stats(self) -> dict:
+        puts = self.hits + self.misses
+        return {
+            "name": "images",
+            "size": len(self._blobs),
+            "bytes": self.memory_bytes,
+            "max_bytes": self.memory_budget,
+            "spilled_bytes": self.spilled_bytes,
+            "spills": self.spills,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / puts if puts else 0.0,
+        }
+
+image_store = ImageStore(get_image_store_memory())
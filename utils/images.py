@@ -0,0 +1,90 @@
+import asyncio
+import os
+from typing import NamedTuple
+from urllib.parse import urlsplit, urlunsplit
+
+from utils.http import HTTPService
+
+# Discord's upload limits
+EMOJI_MAX_BYTES = 256 * 1024
+STICKER_MAX_BYTES = 512 * 1024
+
+# CDN hosts that serve the same file under either name, with per-link signature parameters
+DISCORD_MEDIA_HOSTS = {"cdn.discordapp.com", "media.discordapp.net"}
+
+# -----------------------------
+# 🔎 FORMAT SNIFFING
+# -----------------------------
+
+def sniff_image_type(head: bytes) -> str | None:
+    """
+    File extension for the format the leading bytes belong to ("png", "gif", "jpg",
+    "webp" or "json" for Lottie stickers), or None if it is none of those.
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head.lstrip()[:1] == b"{":
+        return "json"
+    return None
+
+def with_extension(filename: str, extension: str) -> str:
+    """
+    `filename` with its extension replaced by the sniffed one, so a PNG served as
+    "image.jpg" (or with no extension at all) is uploaded under the right name.
+    """
+    stem, _ = os.path.splitext(filename)
+    return f"{stem or 'image'}.{extension}"
+
+# -----------------------------
+# 🔗 URL DEDUPLICATION
+# -----------------------------
+
+def url_identity(url: str) -> str:
+    """
+    Key under which two URLs point at the same file. Discord CDN links differ only by
+    host alias and expiring signature parameters; other URLs lose only their fragment.
+    """
+    parts = urlsplit(url)
+    if parts.hostname in DISCORD_MEDIA_HOSTS:
+        return f"discord:{parts.path}"
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+
+# -----------------------------
+# ⬇️ DOWNLOADS
+# -----------------------------
+
+class Download(NamedTuple):
+    url: str
+    filename: str
+    body: bytes | None
+    error: str | None  # why `body` is None
+
+async def download_image(http: HTTPService, url: str, filename: str, max_bytes: int) -> Download:
+    """
+    Streams one image, giving up once it exceeds `max_bytes` or its first bytes are not
+    a format Discord accepts for emojis or stickers.
+    """
+    body, error = await http.get_bytes_capped(url, max_bytes=max_bytes, check_head=sniff_image_type)
+    if body is not None:
+        filename = with_extension(filename, sniff_image_type(body))
+    return Download(url, filename, body, error)
+
+async def download_images(http: HTTPService, sources: list[tuple[str, str]], max_bytes: int,
+                          concurrency: int) -> list[Download]:
+    """
+    Downloads (url, filename) pairs at most `concurrency` at a time. Results keep the
+    order of `sources`.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(url: str, filename: str) -> Download:
+        async with semaphore:
+            return await download_image(http, url, filename, max_bytes)
+
+    return await asyncio.gather(*(one(url, filename) for url, filename in sources))
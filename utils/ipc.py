@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import json
+import secrets
+
+# Newline-delimited JSON over a loopback TCP socket.
+#
+#   cluster -> hub   {"op": "hello", "cluster": 0, "secret": "..."}
+#   cluster -> hub   {"op": "query", "id": 1, "method": "guild_count", "args": {}}
+#   hub -> clusters  {"op": "call", "id": 7, "method": "guild_count", "args": {}}
+#   cluster -> hub   {"op": "reply", "id": 7, "result": 42}   (or "error": "...")
+#   hub -> cluster   {"op": "result", "id": 1, "results": [42, 17], "missing": 0}
+
+QUERY_TIMEOUT = 5.0  # default seconds the hub waits for every cluster to answer
+RECONNECT_DELAY = 2.0
+STREAM_LIMIT = 4 * 1024 * 1024  # longest accepted message line
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+def new_secret() -> str:
+    return secrets.token_urlsafe(24)
+
+_background: set[asyncio.Task] = set()
+
+def _spawn(coro):
+    # Hold a reference so in-flight handlers are not garbage collected
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+class IPCHub:
+    """
+    Runs in the launcher. Fans each query out to every connected cluster
+    (the asking one included) and returns the collected answers.
+    """
+
+    def __init__(self, port: int, secret: str):
+        self.port = port
+        self.secret = secret
+        self._server: asyncio.AbstractServer | None = None
+        self._clusters: dict[int, asyncio.StreamWriter] = {}
+        self._pending: dict[int, tuple[asyncio.Future, dict[int, object], set[int]]] = {}
+        self._ids = itertools.count(1)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port, limit=STREAM_LIMIT)
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for writer in self._clusters.values():
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        cluster_id = None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("op") != "hello" or not secrets.compare_digest(str(hello.get("secret", "")), self.secret):
+                return
+            cluster_id = int(hello["cluster"])
+            self._clusters[cluster_id] = writer
+
+            while line := await reader.readline():
+                message = json.loads(line)
+                if message["op"] == "query":
+                    _spawn(self._fan_out(cluster_id, message))
+                elif message["op"] == "reply":
+                    self._collect(cluster_id, message)
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            if cluster_id is not None and self._clusters.get(cluster_id) is writer:
+                del self._clusters[cluster_id]
+                # Nobody is going to answer for this cluster any more
+                for future, results, waiting in self._pending.values():
+                    waiting.discard(cluster_id)
+                    if not waiting and not future.done():
+                        future.set_result(None)
+            writer.close()
+
+    def _collect(self, cluster_id: int, message: dict):
+        pending = self._pending.get(message["id"])
+        if pending is None:
+            return
+        future, results, waiting = pending
+        if "result" in message:
+            results[cluster_id] = message["result"]
+        waiting.discard(cluster_id)
+        if not waiting and not future.done():
+            future.set_result(None)
+
+    async def _fan_out(self, origin: int, query: dict):
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        targets = dict(self._clusters)
+        results: dict[int, object] = {}
+        self._pending[call_id] = (future, results, set(targets))
+
+        call = {"op": "call", "id": call_id, "method": query["method"], "args": query.get("args", {})}
+        for writer in targets.values():
+            try:
+                await _send(writer, call)
+            except ConnectionError:
+                pass
+
+        try:
+            await asyncio.wait_for(future, query.get("timeout", QUERY_TIMEOUT))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._pending[call_id]
+
+        origin_writer = self._clusters.get(origin)
+        if origin_writer is not None:
+            ordered = [results[cid] for cid in sorted(results)]
+            try:
+                await _send(origin_writer, {
+                    "op": "result", "id": query["id"], "results": ordered, "missing": len(targets) - len(results)
+                })
+            except ConnectionError:
+                pass
+
+class ClusterClient:
+    """
+    A cluster's link to the launcher's hub. Cogs register handlers for methods other
+    clusters may ask about; `query` runs a method on every cluster and returns all answers.
+    Without a hub (single process), queries are answered locally.
+    """
+
+    def __init__(self, cluster_id: int = 0, port: int | None = None, secret: str | None = None):
+        self.cluster_id = cluster_id
+        self.port = port
+        self.secret = secret
+        self.handlers: dict = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def clustered(self) -> bool:
+        return self.port is not None and self.secret is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def register(self, method: str, handler):
+        """
+        Registers `handler(**args)`, a coroutine function returning JSON-serialisable data.
+        """
+        self.handlers[method] = handler
+
+    def start(self):
+        if self.clustered and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._writer:
+            self._writer.close()
+
+    async def query(self, method: str, timeout: float = QUERY_TIMEOUT, **args) -> list:
+        """
+        Runs `method` on every cluster and returns their answers. Clusters that fail or do
+        not answer within `timeout` seconds are left out. Falls back to this cluster alone
+        when disconnected.
+        """
+        if not self.connected:
+            return [await self.handlers[method](**args)]
+
+        query_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[query_id] = future
+        try:
+            await _send(self._writer, {"op": "query", "id": query_id, "method": method, "args": args, "timeout": timeout})
+            return await asyncio.wait_for(future, timeout + 1)
+        except (ConnectionError, asyncio.TimeoutError):
+            return [await self.handlers[method](**args)]
+        finally:
+            self._pending.pop(query_id, None)
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", self.port, limit=STREAM_LIMIT)
+            except OSError:
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            self._writer = writer
+            try:
+                await _send(writer, {"op": "hello", "cluster": self.cluster_id, "secret": self.secret})
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    if message["op"] == "call":
+                        _spawn(self._answer(message))
+                    elif message["op"] == "result":
+                        future = self._pending.get(message["id"])
+                        if future and not future.done():
+                            future.set_result(message["results"])
+            except (ConnectionError, ValueError, KeyError):
+                pass
+            finally:
+                self._writer = None
+                writer.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _answer(self, call: dict):
+        handler = self.handlers.get(call["method"])
+        reply = {"op": "reply", "id": call["id"]}
+        try:
+            if handler is None:
+                raise LookupError(f"no handler for {call['method']}")
+            reply["result"] = await handler(**call["args"])
+        except Exception as e:
+            reply["error"] = repr(e)
+        try:
+            await _send(self._writer, reply)
+        except (AttributeError, ConnectionError):
+            pass  # disconnected meanwhile; the hub stops waiting for us
@@ -0,0 +1,158 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from contextlib import contextmanager
+
+from config import get_log_level, get_log_format, get_log_file
+
+# Fields attached to every record logged while they are bound (command, guild, upstream, ...)
+_context: contextvars.ContextVar[dict] = contextvars.ContextVar("log_context", default={})
+
+# Repeated warnings and errors: the first SAMPLE_BURST per key per window are kept
+SAMPLE_WINDOW = 60.0  # seconds
+SAMPLE_BURST = 5
+
+def bind(**fields):
+    """
+    Adds fields to the logging context of the current task (and tasks it spawns later).
+    Returns a token for `unbind`.
+    """
+    return _context.set({**_context.get(), **fields})
+
+def unbind(token):
+    _context.reset(token)
+
+@contextmanager
+def log_context(**fields):
+    """
+    Binds fields for the enclosed block.
+    """
+    token = bind(**fields)
+    try:
+        yield
+    finally:
+        unbind(token)
+
+class ContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = {**_context.get(), **getattr(record, "context", {})}
+        return True
+
+class SamplingFilter(logging.Filter):
+    """
+    Drops warnings and errors that repeat more than SAMPLE_BURST times per window
+    (same logger, message template and exception type). The first record after the
+    window reports how many were dropped.
+    """
+
+    def __init__(self, window: float = SAMPLE_WINDOW, burst: int = SAMPLE_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self._seen: dict[tuple, list] = {}  # key -> [window start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+        key = (record.name, record.msg, exc_type)
+        now = time.monotonic()
+        state = self._seen.get(key)
+
+        if state is None or now - state[0] > self.window:
+            if state is not None and state[2]:
+                record.context = {**getattr(record, "context", {}), "suppressed": state[2]}
+            self._seen[key] = [now, 1, 0]
+            if len(self._seen) > 4096:  # forget old keys
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] <= self.window}
+            return True
+
+        state[1] += 1
+        if state[1] <= self.burst:
+            return True
+        state[2] += 1
+        return False
+
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves traceback formatting to the listener thread; only the
+    message itself is rendered on the calling (event loop) thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        record.asctime = self.formatTime(record)
+        line = self.formatMessage(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " | " + " ".join(f"{key}={value}" for key, value in context.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        if record.stack_info:
+            line += "\n" + self.formatStack(record.stack_info)
+        return line
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+_listener: logging.handlers.QueueListener | None = None
+
+def setup_logging():
+    """
+    Routes every logger (ours and discord.py's) through a queue drained by a background
+    thread, so writing to stdout or a file never blocks the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JSONFormatter() if get_log_format() == "json" else TextFormatter()
+    outputs = [logging.StreamHandler(sys.stdout)]
+    if get_log_file():
+        outputs.append(logging.handlers.RotatingFileHandler(
+            get_log_file(), maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        ))
+    for handler in outputs:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = LoopQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(get_log_level())
+    # discord.py's gateway chatter at DEBUG is rarely what we are after
+    logging.getLogger("discord").setLevel(max(root.level, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *outputs, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
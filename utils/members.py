@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+# Small on purpose: only members someone just asked about end up here
+MAX_ENTRIES = 512
+TTL = 300  # seconds; roles and nicknames may change meanwhile
+
+class MemberLRU:
+    """
+    LRU of members fetched over REST, keyed by (guild id, user id).
+    Stores None for users that are not in the guild, so repeat lookups stay free too.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[int, int], tuple[float, discord.Member | None]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple[int, int]) -> tuple[bool, discord.Member | None]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def set(self, key: tuple[int, int], member: discord.Member | None):
+        self._entries[key] = (time.monotonic(), member)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, guild_id: int, user_id: int):
+        self._entries.pop((guild_id, user_id), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": "members",
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+member_cache = MemberLRU()
+
+async def get_member(guild: discord.Guild, user_id: int) -> discord.Member | None:
+    """
+    Returns the guild member for `user_id`: from the library's cache when it has it,
+    else from the LRU, else fetched over REST. None if the user is not in the guild.
+    """
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+
+    key = (guild.id, user_id)
+    found, member = member_cache.get(key)
+    if found:
+        return member
+
+    try:
+        member = await guild.fetch_member(user_id)
+    except discord.NotFound:
+        member = None
+    member_cache.set(key, member)
+    return member
+
+class LazyMember(app_commands.Transformer, commands.MemberConverter):
+    """
+    Drop-in for a `discord.Member` parameter of hybrid commands. Slash invocations get the
+    member Discord resolved for us; prefix invocations look IDs and mentions up through
+    `get_member` instead of a gateway member query, which needs the members intent.
+    """
+
+    @property
+    def type(self) -> discord.AppCommandOptionType:
+        return discord.AppCommandOptionType.user
+
+    async def transform(self, interaction: discord.Interaction, value: discord.Member | discord.User) -> discord.Member:
+        # A user option also resolves people who are not in the server; those arrive as plain Users
+        if not isinstance(value, discord.Member):
+            raise app_commands.TransformerError(value, self.type, self)
+        return value
+
+    async def query_member_by_id(self, bot, guild: discord.Guild, user_id: int) -> discord.Member | None:
+        try:
+            return await get_member(guild, user_id)
+        except discord.HTTPException:
+            return None
+
+    async def query_member_named(self, guild: discord.Guild, argument: str) -> discord.Member | None:
+        # Name search goes through the gateway and needs the members intent
+        if not guild._state._intents.members:
+            return None
+        return await super().query_member_named(guild, argument)
@@ -0,0 +1,85 @@
+import sys
+
+import discord
+
+SAMPLE_SIZE = 20  # objects measured per kind; the rest are assumed to be the same size
+
+# Attributes pointing at shared state (client, guild, cache) rather than owned data
+SHARED_ATTRIBUTES = {"_state", "guild", "_guild", "_client", "_http", "_cs_guild", "parent"}
+
+def deep_sizeof(obj, depth: int = 3, seen: set | None = None) -> int:
+    """
+    Approximate bytes owned by `obj`: itself plus its slots, attributes and container items,
+    `depth` levels down, without following links to shared objects.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, (discord.Client, discord.Guild, type)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth == 0 or isinstance(obj, (str, bytes, int, float, bool)):
+        return size
+
+    if isinstance(obj, dict):
+        children = [*obj.keys(), *obj.values()]
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        children = list(obj)
+    else:
+        names = [name for cls in type(obj).__mro__ for name in getattr(cls, "__slots__", ())]
+        names += list(getattr(obj, "__dict__", {}))
+        children = [getattr(obj, name, None) for name in names if name not in SHARED_ATTRIBUTES]
+
+    return size + sum(deep_sizeof(child, depth - 1, seen) for child in children)
+
+def _estimate(objects) -> tuple[int, int]:
+    objects = list(objects)
+    if not objects:
+        return 0, 0
+    sample = objects[:SAMPLE_SIZE]
+    average = sum(deep_sizeof(obj) for obj in sample) / len(sample)
+    return len(objects), int(average * len(objects))
+
+def guild_cache_report(bot: discord.Client) -> list[dict]:
+    """
+    Estimated cache cost per guild, largest first.
+    """
+    rows = []
+    for guild in bot.guilds:
+        row = {"id": guild.id, "name": guild.name, "bytes": 0}
+        for kind, objects in (
+            ("members", guild.members),
+            ("channels", guild.channels),
+            ("threads", guild.threads),
+            ("roles", guild.roles),
+            ("emojis", guild.emojis),
+            ("stickers", guild.stickers),
+        ):
+            count, size = _estimate(objects)
+            row[kind] = count
+            row["bytes"] += size
+        rows.append(row)
+    return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+def rss_bytes() -> int | None:
+    """
+    Current resident set size (Linux), or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def process_cache_report(bot: discord.Client) -> dict:
+    messages, message_bytes = _estimate(bot.cached_messages)
+    users, user_bytes = _estimate(bot.users)
+    return {
+        "rss": rss_bytes(),
+        "messages": messages,
+        "message_bytes": message_bytes,
+        "users": users,
+        "user_bytes": user_bytes,
+    }
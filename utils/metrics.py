@@ -0,0 +1,150 @@
+import bisect
+from collections import defaultdict
+
+# Upper bounds in seconds; covers a cached embed (~ms) up to a slow upstream with retries
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, rendered in Prometheus' cumulative format.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Upper bound of the bucket holding the q-th observation (None when empty).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self):
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            yield bound, seen
+
+class CommandStats:
+    __slots__ = ("latency", "errors", "in_flight", "max_in_flight")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+class UpstreamStats:
+    __slots__ = ("latency", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+
+class MetricsRegistry:
+    """
+    In-process counters for commands and outbound calls. Recording is a few
+    integer updates, so it is safe to call from every command and request.
+    """
+
+    def __init__(self):
+        self.commands: defaultdict[str, CommandStats] = defaultdict(CommandStats)
+        self.upstreams: defaultdict[str, UpstreamStats] = defaultdict(UpstreamStats)
+
+    def command_started(self, name: str):
+        stats = self.commands[name]
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+    def command_finished(self, name: str, seconds: float, ok: bool, started: bool = True):
+        """
+        Records one command run. `started` is False for commands that had no start hook
+        (plain app commands), so the in-flight gauge is left alone.
+        """
+        stats = self.commands[name]
+        if started:
+            stats.in_flight = max(0, stats.in_flight - 1)
+        stats.latency.observe(seconds)
+        if not ok:
+            stats.errors += 1
+
+    def observe_upstream(self, host: str, seconds: float, ok: bool):
+        stats = self.upstreams[host]
+        stats.latency.observe(seconds)
+        if not ok:
+            stats.errors += 1
+
+    def render(self, caches: list[dict] = (), guards: list[dict] = (), limiters: list[dict] = ()) -> str:
+        """
+        Renders everything in the Prometheus text exposition format. Cache, circuit and
+        rate-limiter stats are passed in as the `stats()` dicts their owners already expose.
+        """
+        lines = []
+
+        def histogram(metric: str, help_text: str, label: str, series: dict):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in sorted(series.items()):
+                labels = f'{label}="{_escape(name)}"'
+                for bound, count in stats.latency.cumulative():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{metric}_sum{{{labels}}} {stats.latency.sum}")
+                lines.append(f"{metric}_count{{{labels}}} {stats.latency.count}")
+
+        def scalar(metric: str, help_text: str, kind: str, samples: list[tuple[str, object]]):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(f"{metric}{{{labels}}} {value}" for labels, value in samples)
+
+        histogram("bot_command_duration_seconds", "Command latency.", "command", self.commands)
+        scalar("bot_command_errors_total", "Commands that raised.", "counter",
+               [(f'command="{_escape(n)}"', s.errors) for n, s in sorted(self.commands.items())])
+        scalar("bot_command_in_flight", "Commands currently running.", "gauge",
+               [(f'command="{_escape(n)}"', s.in_flight) for n, s in sorted(self.commands.items())])
+        scalar("bot_command_max_in_flight", "Highest concurrent runs seen.", "gauge",
+               [(f'command="{_escape(n)}"', s.max_in_flight) for n, s in sorted(self.commands.items())])
+
+        histogram("bot_upstream_duration_seconds", "Outbound HTTP request latency.", "host", self.upstreams)
+        scalar("bot_upstream_errors_total", "Outbound requests that failed or returned 5xx.", "counter",
+               [(f'host="{_escape(h)}"', s.errors) for h, s in sorted(self.upstreams.items())])
+
+        for field, kind in (("hits", "counter"), ("stale_hits", "counter"), ("misses", "counter"),
+                            ("evictions", "counter"), ("hit_rate", "gauge"), ("size", "gauge")):
+            scalar(f"bot_cache_{field}" + ("_total" if kind == "counter" else ""),
+                   f"Cache {field.replace('_', ' ')}.", kind,
+                   [(f'cache="{_escape(c["name"])}"', c.get(field, 0)) for c in caches])
+
+        scalar("bot_circuit_open", "1 when the upstream circuit is not closed.", "gauge",
+               [(f'upstream="{_escape(g["name"])}"', int(g["state"] != "closed")) for g in guards])
+        scalar("bot_circuit_rejected_total", "Calls failed fast by an open circuit.", "counter",
+               [(f'upstream="{_escape(g["name"])}"', g["rejected"]) for g in guards])
+        scalar("bot_ratelimit_queue_depth", "Requests waiting for a rate-limit token.", "gauge",
+               [(f'limiter="{_escape(l["name"])}"', l["queue_depth"]) for l in limiters])
+        scalar("bot_ratelimit_timeouts_total", "Requests dropped after their queue deadline.", "counter",
+               [(f'limiter="{_escape(l["name"])}"', l["timeouts"]) for l in limiters])
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Process-wide registry; the bot's invoke hooks and HTTPService write to it
+metrics = MetricsRegistry()
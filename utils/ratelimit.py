@@ -0,0 +1,165 @@
+import asyncio
+import contextvars
+import hashlib
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+
+from config import get_upstream_rate_limit
+
+# Request priorities, lower runs first
+INTERACTIVE = 0  # a user is waiting on a command
+BATCH = 1  # multi-city and other fan-out commands
+SCHEDULED = 2  # timed reports
+BACKGROUND = 3  # cache refreshes nobody is waiting on
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", SCHEDULED: "scheduled", BACKGROUND: "background"}
+
+# How long each priority may queue before giving up, in seconds
+DEFAULT_DEADLINES = {INTERACTIVE: 10.0, BATCH: 20.0, SCHEDULED: 120.0, BACKGROUND: 30.0}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+@contextmanager
+def request_priority(level: int):
+    """
+    Runs the enclosed block (and tasks it spawns) at the given request priority.
+    """
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+class RateLimitTimeout(Exception):
+    """Raised when a request could not get a token before its deadline."""
+
+class TokenBucket:
+    """
+    Client-side token bucket. Callers that find it empty wait in a priority queue
+    (interactive before batch before scheduled) until a token frees up or their deadline passes.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: list = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._pump: asyncio.Task | None = None
+
+        self.granted = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a token only if one is free right now and nobody is queued for it.
+        """
+        self._refill()
+        if self._waiters or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.granted += 1
+        return True
+
+    async def acquire(self, priority: int | None = None, deadline: float | None = None):
+        """
+        Takes one token, queueing for up to `deadline` seconds.
+        Raises RateLimitTimeout if no token became available in time.
+        """
+        priority = current_priority() if priority is None else priority
+        deadline = DEFAULT_DEADLINES.get(priority, 10.0) if deadline is None else deadline
+        started = time.monotonic()
+
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+
+        try:
+            await asyncio.wait_for(future, timeout=deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RateLimitTimeout(f"{self.name}: no capacity within {deadline:.0f}s") from None
+
+        waited = time.monotonic() - started
+        self.granted += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    async def _run_pump(self):
+        while self._waiters:
+            self._refill()
+            while self._waiters and self.tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():  # skip callers that already timed out
+                    self.tokens -= 1
+                    future.set_result(None)
+
+            if self._waiters:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def stats(self) -> dict:
+        queued = {}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+
+        waited = self.granted or 1
+        return {
+            "name": self.name,
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "queue_depth": sum(queued.values()),
+            "queued": queued,
+            "granted": self.granted,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.wait_seconds / waited * 1000,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+# -----------------------------
+# 🗂️ LIMITER REGISTRY
+# -----------------------------
+
+_limiters: dict[tuple[str, str], TokenBucket] = {}
+
+def get_limiter(upstream: str, api_key: str | None) -> TokenBucket:
+    """
+    Returns the bucket for an upstream and API key; quotas are per key, so each key gets its own.
+    """
+    key_id = hashlib.sha256((api_key or "").encode()).hexdigest()[:8]
+    limiter = _limiters.get((upstream, key_id))
+    if limiter is None:
+        per_minute, burst = get_upstream_rate_limit(upstream)
+        limiter = TokenBucket(f"{upstream}:{key_id}", rate=per_minute / 60, burst=burst)
+        _limiters[(upstream, key_id)] = limiter
+    return limiter
+
+def limiter_stats() -> list[dict]:
+    return [limiter.stats() for limiter in _limiters.values()]
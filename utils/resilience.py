@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config import get_hedging_enabled
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+log = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+class CircuitBreaker:
+    """
+    Opens when the error rate over the last `window` seconds crosses `failure_rate`
+    (with at least `min_calls` calls seen), fails fast for `open_seconds`, then lets a
+    single probe through; a successful probe closes the circuit again.
+    Every call gets a ticket naming the generation (one per state change) it was admitted
+    in. Results from an earlier generation, such as slow calls admitted while closed that
+    finish after the circuit opened, are ignored.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, min_calls: int = 10,
+                 window: float = 60.0, open_seconds: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._generation = 0
+        self._calls: deque = deque()  # (timestamp, ok)
+        self.opened_count = 0
+        self.rejected = 0
+
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        """
+        Cheap pre-check: would a call be let through right now?
+        """
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            return True
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self._probing)
+
+    def before_call(self) -> tuple[int, bool]:
+        """
+        Admits a call or raises CircuitOpen. After the cool-down only one probe is admitted.
+        Returns the call's (generation, is probe) ticket for `record` or `release`.
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpen(f"{self.name} circuit is open")
+            self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpen(f"{self.name} circuit is half-open, probe in flight")
+            self._probing = True
+            return self._generation, True
+        return self._generation, False
+
+    def release(self, ticket: tuple[int, bool]):
+        """
+        Frees the probe slot of a call that ended without an outcome (e.g. cancellation).
+        """
+        generation, probe = ticket
+        if probe and generation == self._generation:
+            self._probing = False
+
+    def record(self, ok: bool, ticket: tuple[int, bool]):
+        generation, probe = ticket
+        if generation != self._generation:
+            return  # admitted before the circuit last changed state
+        now = time.monotonic()
+
+        if probe:
+            self._probing = False
+            if ok:
+                self.state = CLOSED
+                self._generation += 1
+                self._calls.clear()
+            else:
+                self._open(now)
+            return
+
+        self._calls.append((now, ok))
+        self._trim(now)
+        failures = sum(1 for _, call_ok in self._calls if not call_ok)
+        if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_rate:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._generation += 1
+        self._opened_at = now
+        self.opened_count += 1
+        self._calls.clear()
+        log.warning("Circuit for %s opened, failing fast for %.0fs", self.name, self.open_seconds)
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies, for percentile-based hedge delays.
+    """
+
+    def __init__(self, size: int = 200):
+        self._samples: deque = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+async def hedged(fn, delay: float, can_hedge=lambda: True):
+    """
+    Awaits `fn()`; if it has not finished after `delay` seconds (and `can_hedge()` agrees),
+    starts a second `fn()` and returns whichever succeeds first. The loser is cancelled.
+    Returns (result, hedged, hedge_won).
+    """
+    first = asyncio.ensure_future(fn())
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done or not can_hedge():
+            return await first, False, False
+
+        second = asyncio.ensure_future(fn())
+        tasks.append(second)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), True, task is second
+                error = task.exception()
+        raise error
+    finally:
+        # The loser, or everything if the caller was cancelled while waiting
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+class UpstreamGuard:
+    """
+    Circuit breaker plus optional hedging for one upstream API.
+    """
+
+    MIN_HEDGE_SAMPLES = 20
+    MIN_HEDGE_DELAY = 0.05  # seconds
+
+    def __init__(self, name: str, hedge: bool = False):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def allow(self) -> bool:
+        return self.breaker.allow()
+
+    def hedge_delay(self) -> float | None:
+        if not self.hedge or len(self.latency) < self.MIN_HEDGE_SAMPLES:
+            return None
+        return max(self.MIN_HEDGE_DELAY, self.latency.percentile(0.95))
+
+    async def call(self, fn, is_failure=lambda result: False, can_hedge=lambda: True):
+        """
+        Runs `fn()` through the breaker, hedging it after the p95 latency when enabled.
+        Exceptions and results for which `is_failure(result)` is true count as failures.
+        Raises CircuitOpen without calling `fn` when the circuit is open.
+        """
+        ticket = self.breaker.before_call()
+        started = time.perf_counter()
+        delay = self.hedge_delay()
+
+        try:
+            if delay is None:
+                result = await fn()
+            else:
+                result, was_hedged, hedge_won = await hedged(fn, delay, can_hedge)
+                self.hedges += was_hedged
+                self.hedge_wins += hedge_won
+        except asyncio.CancelledError:
+            self.breaker.release(ticket)  # the caller gave up; says nothing about the upstream
+            raise
+        except Exception:
+            self.breaker.record(False, ticket)
+            raise
+
+        failed = is_failure(result)
+        self.breaker.record(not failed, ticket)
+        if not failed:
+            self.latency.add(time.perf_counter() - started)
+        return result
+
+    def stats(self) -> dict:
+        p95 = self.latency.percentile(0.95)
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "opened": self.breaker.opened_count,
+            "rejected": self.breaker.rejected,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+# -----------------------------
+# 🗂️ GUARD REGISTRY
+# -----------------------------
+
+_guards: dict[str, UpstreamGuard] = {}
+
+def get_guard(upstream: str) -> UpstreamGuard:
+    guard = _guards.get(upstream)
+    if guard is None:
+        guard = _guards[upstream] = UpstreamGuard(upstream, hedge=get_hedging_enabled())
+    return guard
+
+def guard_stats() -> list[dict]:
+    return [guard.stats() for guard in _guards.values()]
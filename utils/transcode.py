@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+
+try:
+    from PIL import Image, ImageDraw, ImageSequence, UnidentifiedImageError
+except ImportError:  # Pillow is optional; without it images are passed through unchanged
+    Image = None
+
+from config import get_transcode_workers
+from utils.images import EMOJI_MAX_BYTES, STICKER_MAX_BYTES, sniff_image_type
+from weather.cache import TTLCache
+from weather.singleflight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+MAX_FRAMES = 300  # longer animations are cut; Discord rejects most of them anyway
+MAX_PIXELS = 4096 * 4096  # per frame; anything larger is refused before it is decoded
+MAX_TOTAL_PIXELS = 64 * 1024 * 1024  # width x height x frames decoded for one image
+
+SHEET_CELL = 128  # px per contact sheet tile
+SHEET_COLUMNS = 5
+
+class Target(NamedTuple):
+    max_bytes: int
+    sides: tuple[int, ...]  # longest edge to try, largest first
+    formats: frozenset[str]  # Pillow format names accepted as-is
+    animated_format: str  # what animations are re-encoded as
+
+EMOJI = "emoji"
+STICKER = "sticker"
+
+TARGETS = {
+    EMOJI: Target(EMOJI_MAX_BYTES, (128, 96, 64, 48), frozenset({"PNG", "GIF", "JPEG", "WEBP"}), "GIF"),
+    STICKER: Target(STICKER_MAX_BYTES, (320, 256, 192, 160), frozenset({"PNG"}), "PNG"),
+}
+
+class TranscodeError(Exception):
+    """Raised when an image cannot be decoded or squeezed under the target limits."""
+
+class Transcoded(NamedTuple):
+    body: bytes
+    extension: str
+    changed: bool
+
+# -----------------------------
+# 🖼️ WORKER SIDE (runs in the process pool)
+# -----------------------------
+
+def _encode(frames: list, durations: list[int], fmt: str, quantize: bool) -> bytes:
+    if quantize:
+        frames = [frame.quantize(256, method=Image.Quantize.FASTOCTREE) for frame in frames]
+    out = io.BytesIO()
+    if len(frames) == 1:
+        frames[0].save(out, format=fmt, optimize=True)
+    else:
+        # GIF frames are restored to transparent between draws; APNG keeps the default, as
+        # Pillow cannot composite palette frames with per-frame palettes
+        extra = {"disposal": 2} if fmt == "GIF" else {}
+        frames[0].save(out, format=fmt, save_all=True, append_images=frames[1:], duration=durations,
+                       loop=0, optimize=True, **extra)
+    return out.getvalue()
+
+def _open_checked(data: bytes | str) -> "Image.Image":
+    """
+    Opens `data`, or the file at that path (only the header is read), and refuses images
+    whose decoded frames would exceed MAX_PIXELS each or MAX_TOTAL_PIXELS together.
+    """
+    try:
+        image = Image.open(data if isinstance(data, str) else io.BytesIO(data))
+        width, height = image.size
+        if width * height > MAX_PIXELS:
+            raise TranscodeError(f"too many pixels ({width}×{height})")
+        frames = min(getattr(image, "n_frames", 1), MAX_FRAMES)
+        if width * height * frames > MAX_TOTAL_PIXELS:
+            raise TranscodeError(f"animation too large to convert ({width}×{height}, {frames} frames)")
+        return image
+    except Image.DecompressionBombError:
+        raise TranscodeError("too many pixels") from None
+    except (UnidentifiedImageError, OSError) as e:
+        raise TranscodeError(f"not a readable image ({e})") from None
+
+def _fit(data: bytes, kind: str) -> tuple[bytes, str]:
+    """
+    Re-encodes `data` to fit TARGETS[kind]: the largest side from `sides` first, then the
+    same with a 256-colour palette, then smaller sides, then (for animations) every other frame.
+    Frames are shrunk to the largest side as they are decoded, so only one full-size frame
+    is ever held in memory.
+    """
+    target = TARGETS[kind]
+    largest = target.sides[0]
+    image = _open_checked(data)
+    try:
+        image.draft("RGB", (largest, largest))  # JPEGs decode at a reduced scale
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(image):
+            durations.append(frame.info.get("duration", 100))
+            frame = frame.convert("RGBA")
+            frame.thumbnail((largest, largest), Image.Resampling.LANCZOS)
+            frames.append(frame)
+            if len(frames) == MAX_FRAMES:
+                break
+    except (UnidentifiedImageError, OSError) as e:
+        raise TranscodeError(f"not a readable image ({e})") from None
+
+    animated = len(frames) > 1
+    fmt = target.animated_format if animated else "PNG"
+    attempts = [(side, quantize, 1) for side in target.sides for quantize in (False, True)]
+    if animated:
+        attempts += [(side, True, 2) for side in target.sides]
+
+    for side, quantize, step in attempts:
+        picked = frames[::step]
+        resized = []
+        for frame in picked:
+            frame = frame.copy()
+            frame.thumbnail((side, side), Image.Resampling.LANCZOS)
+            resized.append(frame)
+        body = _encode(resized, [d * step for d in durations[::step]], fmt, quantize)
+        if len(body) <= target.max_bytes:
+            return body, fmt.lower()
+
+    raise TranscodeError(f"could not get it under {target.max_bytes // 1024} KB")
+
+def _read(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise TranscodeError("the image is no longer available") from None
+
+def _file_digest(path: str) -> str:
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except FileNotFoundError:
+        raise TranscodeError("the image is no longer available") from None
+
+def _fit_bytes(data: bytes, kind: str) -> Transcoded:
+    body, extension = _fit(data, kind)
+    return Transcoded(body, extension, True)
+
+def _fit_file(path: str, kind: str) -> Transcoded:
+    """
+    `transcode` for an image on disk: the worker reads the file itself, so large spilled
+    images never pass through the event loop or the pool's pipe.
+    """
+    data = _read(path)
+    as_is = _as_is(data, TARGETS[kind], kind)
+    return as_is if as_is is not None else _fit_bytes(data, kind)
+
+def _contact_sheet(images: list[bytes | str]) -> bytes:
+    """
+    One PNG with a numbered thumbnail of every image (bytes or a file path; first frame
+    for animations), SHEET_COLUMNS to a row. Unreadable images get an empty numbered tile.
+    """
+    columns = min(SHEET_COLUMNS, len(images))
+    rows = -(-len(images) // columns)
+    sheet = Image.new("RGBA", (columns * SHEET_CELL, rows * SHEET_CELL), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sheet)
+
+    for i, data in enumerate(images):
+        x, y = (i % columns) * SHEET_CELL, (i // columns) * SHEET_CELL
+        try:
+            with _open_checked(data) as image:
+                image.draft("RGB", (SHEET_CELL, SHEET_CELL))
+                tile = image.convert("RGBA")
+            tile.thumbnail((SHEET_CELL - 8, SHEET_CELL - 8), Image.Resampling.LANCZOS)
+            sheet.paste(tile, (x + (SHEET_CELL - tile.width) // 2, y + (SHEET_CELL - tile.height) // 2), tile)
+        except (TranscodeError, UnidentifiedImageError, OSError):
+            pass
+        draw.rectangle((x + 2, y + 2, x + 22, y + 18), fill=(0, 0, 0, 180))
+        draw.text((x + 6, y + 4), str(i + 1), fill=(255, 255, 255, 255))
+
+    out = io.BytesIO()
+    sheet.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+# -----------------------------
+# ⚙️ LOOP SIDE
+# -----------------------------
+
+# Keyed by (kind, sha256 of the input): re-adding the same image costs a hash
+results = TTLCache(ttl=3600, max_entries=256, name="transcode",
+                   max_bytes=32 * 1024 * 1024, sizeof=lambda value: len(value.body))
+flights = SingleFlight()
+
+_pool: ProcessPoolExecutor | None = None
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Forked workers start instantly and never re-import bot.py the way spawned ones would.
+        # They only run Pillow code, never the loop, sockets or log handlers they inherit.
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        _pool = ProcessPoolExecutor(max_workers=get_transcode_workers(), mp_context=multiprocessing.get_context(method))
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _fits_as_is(data: bytes, target: Target) -> str | None:
+    """
+    The extension to upload `data` under if it already meets `target`, else None.
+    Only reads the image header, so it is cheap enough for the event loop.
+    """
+    if len(data) > target.max_bytes:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format in target.formats and max(image.size) <= target.sides[0]:
+                return sniff_image_type(data)
+    except (Image.DecompressionBombError, UnidentifiedImageError, OSError):
+        pass  # `_fit` reports why
+    return None
+
+def _as_is(data: bytes, target: Target, kind: str) -> Transcoded | None:
+    """
+    `data` unchanged if it can be uploaded as it is, None if it needs converting.
+    Raises TranscodeError for files that can only ever be uploaded as-is and cannot be.
+    """
+    extension = sniff_image_type(data[:32])
+    if extension == "json":  # Lottie stickers are uploaded as-is
+        if kind != STICKER or len(data) > target.max_bytes:
+            raise TranscodeError("Lottie files can only be stickers of up to 512 KB")
+        return Transcoded(data, extension, False)
+
+    if Image is None:
+        if len(data) > target.max_bytes:
+            raise TranscodeError(f"larger than {target.max_bytes // 1024} KB (install Pillow to shrink images automatically)")
+        return Transcoded(data, extension or "png", False)
+
+    extension = _fits_as_is(data, target)
+    return Transcoded(data, extension, False) if extension is not None else None
+
+def is_animated(data: bytes) -> bool:
+    """
+    Whether `data` has more than one frame, read from the image itself so animated PNG and
+    WebP count as well as GIF. Without Pillow only GIFs are taken as animated. Walks every
+    GIF frame header; run it through asyncio.to_thread for large files.
+    """
+    if Image is None:
+        return sniff_image_type(data[:32]) == "gif"
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return getattr(image, "is_animated", False)
+    except (Image.DecompressionBombError, UnidentifiedImageError, OSError):
+        return False  # `_fit` reports why
+
+async def transcode(data: bytes | str, kind: str, digest: str | None = None) -> Transcoded:
+    """
+    Returns `data` ready for upload as an emoji or sticker (EMOJI or STICKER): unchanged when
+    it already fits, otherwise resized and recompressed in the process pool. `data` may also
+    be the path of a file holding the image, which is then only read by the worker. `digest`
+    is the SHA-256 hex digest of the image when the caller already has it (image store keys).
+    Raises TranscodeError when that is not possible.
+    """
+    if isinstance(data, str):
+        if Image is None:
+            return await transcode(await asyncio.to_thread(_read, data), kind, digest)
+        if digest is None:
+            digest = await asyncio.to_thread(_file_digest, data)
+        fn, args, in_bytes = _fit_file, (data, kind), None
+    else:
+        as_is = _as_is(data, TARGETS[kind], kind)
+        if as_is is not None:
+            return as_is
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+        fn, args, in_bytes = _fit_bytes, (data, kind), len(data)
+    key = (kind, digest)
+
+    cached, _ = results.get(key)
+    if cached is not None:
+        return cached
+
+    async def run() -> Transcoded:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(get_pool(), fn, *args)
+        except BrokenProcessPool:
+            shutdown_pool()  # a worker died (e.g. out of memory); the next call starts a fresh pool
+            raise TranscodeError("the image converter crashed on this file") from None
+        results.set(key, result)
+        log.debug("Transcoded image for %s", kind, extra={"context": {"in_bytes": in_bytes, "out_bytes": len(result.body)}})
+        return result
+
+    return await flights.do(key, run)
+
+async def contact_sheet(images: list[bytes | str]) -> bytes | None:
+    """
+    A numbered preview grid of `images` (bytes or file paths), rendered in the process pool.
+    None without Pillow or if rendering failed; callers then go without a preview.
+    """
+    if Image is None or not images:
+        return None
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_pool(), _contact_sheet, images)
+    except BrokenProcessPool:
+        shutdown_pool()
+        return None
+    except Exception:
+        log.exception("Contact sheet rendering failed")
+        return None
+
+def cache_stats() -> list[dict]:
+    return [results.stats()]
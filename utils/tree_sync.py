@@ -0,0 +1,44 @@
+import asyncio
+import hashlib
+import json
+import os
+
+from discord import app_commands
+
+from config import get_data_dir
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """
+    Hashes the payload Discord would receive for the global commands, so any change to
+    names, descriptions, options or permissions produces a different hash.
+    """
+    payload = sorted((command.to_dict() for command in tree.get_commands()), key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _hash_path(application_id: int) -> str:
+    return os.path.join(get_data_dir(), f"command_tree-{application_id}.sha256")
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def _write(path: str, digest: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(digest)
+
+async def sync_if_changed(tree: app_commands.CommandTree, application_id: int, force: bool = False) -> bool:
+    """
+    Syncs the global command tree only when its hash differs from the last successful sync.
+    Returns True if a sync was sent.
+    """
+    digest = command_tree_hash(tree)
+    path = _hash_path(application_id)
+    if not force and await asyncio.to_thread(_read, path) == digest:
+        return False
+
+    await tree.sync()
+    await asyncio.to_thread(_write, path, digest)
+    return True
@@ -1,7 +1,26 @@
-import http.client
-import json
+import asyncio
+import logging
+import time
 import urllib.parse
-from config import get_rapidapi_key
+import aiohttp
+from config import get_rapidapi_key, get_upstream_url
+from utils.http import HTTPService, get_http_service
+from utils.log import log_context
+from utils.ratelimit import RateLimitTimeout, get_limiter
+from utils.resilience import CircuitOpen, get_guard
+from weather.cache import TTLCache, json_sizeof, make_key
+from weather.gazetteer import resolve_city
+from weather.singleflight import SingleFlight
+
+API_HOST = "air-quality-by-api-ninjas.p.rapidapi.com"
+
+# Request tuning for RapidAPI calls
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=4, sock_read=6)
+
+# Outcomes of a single upstream query
+OK, NO_DATA, ERROR = "ok", "no_data", "error"
+
+log = logging.getLogger(__name__)
 
 # AQI category thresholds and messages
 AQI_LEVELS = [
@@ -22,35 +41,175 @@ def get_aqi_level(aqi: float | int):
             return label, message
     return "Unknown", "⚠️ AQI is out of range. Stay cautious."
 
-def get_air_quality(city: str) -> dict | None:
+def build_query(city: str = None, lat: float = None, lon: float = None) -> str | None:
     """
-    Fetch air quality data for the given city using the API Ninjas Air Quality API.
-    Returns parsed JSON data or None on failure.
+    Builds the API Ninjas query string. Known cities are looked up by gazetteer coordinates,
+    anything else by name.
+    """
+    if city:
+        place = resolve_city(city)
+        if place:
+            lat, lon = place.lat, place.lon
+        else:
+            return "city=" + urllib.parse.quote_plus(city.strip())  # Handles spaces like "new delhi"
+
+    if lat is not None and lon is not None:
+        return f"lat={lat}&lon={lon}"
+    return None
+
+def enrich(json_data: dict) -> dict | None:
+    """
+    Appends the AQI category and health tip to an API response, or returns None if it carries no AQI.
+    """
+    if "overall_aqi" not in json_data:
+        return None
+
+    label, tip = get_aqi_level(json_data["overall_aqi"])
+    json_data["category"] = label
+    json_data["tip"] = tip
+    return json_data
+
+class AirQualityClient:
     """
-    conn = http.client.HTTPSConnection("air-quality-by-api-ninjas.p.rapidapi.com")
+    Async API Ninjas client. Requests go through the bot-wide HTTPService, which keeps
+    a pool of keep-alive connections to the RapidAPI host.
+    """
+
+    def __init__(self, http: HTTPService | None = None):
+        self._http = http
+
+    @property
+    def http(self) -> HTTPService:
+        return self._http or get_http_service()
+
+    async def query(self, city: str = None, lat: float = None, lon: float = None) -> tuple[str, dict | None]:
+        """
+        Runs one upstream query and returns (outcome, data), where outcome is OK, NO_DATA
+        (the API answered but has no AQI for that place) or ERROR (transport or decode failure).
+        """
+        query = build_query(city, lat, lon)
+        if query is None:
+            log.warning("No valid city or coordinates provided.")
+            return ERROR, None
+
+        headers = {
+            'x-rapidapi-key': get_rapidapi_key(),
+            'x-rapidapi-host': API_HOST
+        }
+
+        with log_context(upstream="rapidapi"):
+            return await self._guarded_query(query, headers, city or (lat, lon))
+
+    async def _guarded_query(self, query: str, headers: dict, place) -> tuple[str, dict | None]:
+        guard = get_guard("rapidapi")
+        if not guard.allow():
+            log.warning("Skipped air quality request, circuit is open")
+            return ERROR, None
 
-    headers = {
-        'x-rapidapi-key': get_rapidapi_key(),
-        'x-rapidapi-host': "air-quality-by-api-ninjas.p.rapidapi.com"
-    }
+        limiter = get_limiter("rapidapi", headers['x-rapidapi-key'])
+        try:
+            await limiter.acquire()
+        except RateLimitTimeout as e:
+            log.warning("Skipped air quality request, quota exhausted: %s", e)
+            return ERROR, None
 
-    try:
-        encoded_city = urllib.parse.quote_plus(city.strip())  # Handles spaces like "new delhi"
-        conn.request("GET", f"/v1/airquality?city={encoded_city}", headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        json_data = json.loads(data.decode("utf-8"))
+        started = time.perf_counter()
+        try:
+            status, json_data = await guard.call(
+                lambda: self.http.get_json(f"{get_upstream_url('rapidapi')}?{query}", headers=headers, timeout=REQUEST_TIMEOUT,
+                                           before_retry=limiter.acquire),
+                is_failure=lambda result: result[0] >= 500,
+                can_hedge=limiter.try_acquire,
+            )
+        except CircuitOpen as e:
+            log.warning("Skipped air quality request: %s", e)
+            return ERROR, None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log.error("Air quality request failed: %r", e)
+            return ERROR, None
 
-        if "overall_aqi" not in json_data:
-            print(f"[AirQuality] No AQI data for: {city}")
-            return None
+        context = {"status": status, "latency_ms": round((time.perf_counter() - started) * 1000)}
+        data = enrich(json_data) if isinstance(json_data, dict) else None
+        if data is not None:
+            log.debug("Fetched air quality for %s", place, extra={"context": context})
+            return OK, data
 
-        # Append level + tip into the response
-        label, tip = get_aqi_level(json_data["overall_aqi"])
-        json_data["category"] = label
-        json_data["tip"] = tip
-        return json_data
+        log.info("No AQI data for %s", place, extra={"context": context})
+        # 4xx means the API rejected the place itself; anything else may be transient
+        rejected = status == 200 or (400 <= status < 500 and status != 429)
+        return (NO_DATA if rejected else ERROR), None
 
-    except Exception as e:
-        print(f"[AirQuality] Error fetching air quality data: {e}")
+    async def air_quality(self, city: str = None, lat: float = None, lon: float = None) -> dict | None:
+        """
+        Fetch air quality data for the given city or coordinates.
+        Returns the enriched JSON data or None on failure.
+        """
+        _, data = await self.query(city=city, lat=lat, lon=lon)
+        return data
+
+# -----------------------------
+# 🗃️ RESPONSE CACHES
+# -----------------------------
+
+# API Ninjas refreshes its readings about once an hour; "no data" answers are retried sooner
+aqi_cache = TTLCache(ttl=3600, stale_ttl=900, max_entries=1024, name="aqi",
+                     max_bytes=2 * 1024 * 1024, sizeof=json_sizeof)
+no_data_cache = TTLCache(ttl=600, max_entries=2048, name="aqi.no_data")
+
+# Identical lookups that miss the cache at the same time share one upstream request
+flights = SingleFlight()
+
+def cache_stats() -> list[dict]:
+    return [aqi_cache.stats(), no_data_cache.stats()]
+
+# -----------------------------
+# 🌐 SHARED CLIENT
+# -----------------------------
+
+_client: AirQualityClient | None = None
+
+def get_client() -> AirQualityClient:
+    global _client
+    if _client is None:
+        _client = AirQualityClient()
+    return _client
+
+async def fetch_air_quality(city: str = None, lat: float = None, lon: float = None) -> dict | None:
+    """
+    Fetches air quality data without blocking the event loop.
+    Served from the AQI cache when possible; places known to have no data are not re-queried
+    until their negative cache entry expires.
+    """
+    if city:
+        place = resolve_city(city)
+        if place:
+            city, lat, lon = None, place.lat, place.lon
+
+    key = make_key("aqi", city, lat, lon)
+    if key is None:
+        return await get_client().air_quality(city=city, lat=lat, lon=lon)
+
+    known_missing, _ = no_data_cache.get(key)
+    if known_missing:
         return None
+
+    async def fetch():
+        outcome, data = await get_client().query(city=city, lat=lat, lon=lon)
+        if outcome == NO_DATA:
+            no_data_cache.set(key, True)
+        return data
+
+    data = await aqi_cache.get_or_fetch(key, lambda: flights.do(key, fetch))
+    # Upstream down or circuit open: the last known reading beats an error
+    return data if data is not None else aqi_cache.peek(key)
+
+def get_air_quality(city: str = None, lat: float = None, lon: float = None) -> dict | None:
+    """
+    Blocking wrapper around AirQualityClient, for scripts outside the bot's event loop.
+    Returns parsed JSON data or None on failure.
+    """
+    async def run():
+        async with HTTPService() as http:
+            return await AirQualityClient(http).air_quality(city=city, lat=lat, lon=lon)
+
+    return asyncio.run(run())
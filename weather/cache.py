@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from utils.ratelimit import BACKGROUND, request_priority
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# 🔑 CACHE KEYS
+# -----------------------------
+
+COORD_PRECISION = 2  # ~0.01° ≈ 1.1 km
+
+def normalize_city(city: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a city name ("  New  Delhi " -> "new delhi").
+    """
+    return " ".join(city.split()).casefold()
+
+def make_key(kind: str, city: str = None, lat: float = None, lon: float = None) -> tuple | None:
+    """
+    Builds a cache key from a normalized city name or coordinates rounded to ~0.01°.
+    """
+    if city:
+        return (kind, "city", normalize_city(city))
+    if lat is not None and lon is not None:
+        return (kind, "coord", round(float(lat), COORD_PRECISION), round(float(lon), COORD_PRECISION))
+    return None
+
+def json_sizeof(value) -> int:
+    """
+    Approximate memory cost of a JSON payload: the length of its compact encoding.
+    """
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+# -----------------------------
+# 🗃️ LRU + TTL CACHE
+# -----------------------------
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries are fresh for `ttl` seconds and may then be served
+    stale for another `stale_ttl` seconds while a background refresh replaces them.
+    When `max_bytes` is set, `sizeof(value)` is charged against it and the least recently
+    used entries are evicted to stay under budget.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 256, name: str = "cache",
+                 max_bytes: int | None = None, sizeof=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.name = name
+        self._entries: OrderedDict = OrderedDict()  # key -> (stored_at, value, size)
+        self._refreshing: dict = {}  # key -> asyncio.Task
+        self.bytes = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _age(self, key) -> float | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[0]
+
+    def get(self, key):
+        """
+        Returns (value, is_stale) for a usable entry, or (None, False) on a miss.
+        Expired entries stay in place until they are evicted or overwritten.
+        """
+        age = self._age(key)
+        if age is None or age > self.ttl + self.stale_ttl:
+            self.misses += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        if age <= self.ttl:
+            self.hits += 1
+            return self._entries[key][1], False
+
+        self.stale_hits += 1
+        return self._entries[key][1], True
+
+    def peek(self, key):
+        """
+        Returns the stored value regardless of age (or None), without touching LRU order or counters.
+        Used as a last-known fallback when the upstream is unavailable.
+        """
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key, value):
+        self.invalidate(key)
+        size = self.sizeof(value)
+        self._entries[key] = (time.monotonic(), value, size)
+        self.bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    async def get_or_fetch(self, key, fetch):
+        """
+        Serves `key` from the cache, calling the `fetch` coroutine function on a miss.
+        Stale entries are returned immediately and refreshed in the background.
+        `None` results are never cached.
+        """
+        value, is_stale = self.get(key)
+
+        if value is not None:
+            if is_stale:
+                self._schedule_refresh(key, fetch)
+            return value
+
+        value = await fetch()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key, fetch):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                # Nobody is waiting on a refresh, so it queues behind user requests
+                with request_priority(BACKGROUND):
+                    value = await fetch()
+                if value is not None:
+                    self.set(key, value)
+                    self.refreshes += 1
+            except Exception as e:
+                log.warning("Background refresh failed for %s: %r", key, e, extra={"context": {"cache": self.name}})
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
@@ -1,55 +1,241 @@
-import requests
-from config import get_weather_api_key
+import asyncio
+import logging
+import time
+import aiohttp
+from config import get_upstream_url, get_weather_api_key
+from utils.http import HTTPService, get_http_service
+from utils.log import log_context
+from utils.ratelimit import RateLimitTimeout, get_limiter
+from utils.resilience import CircuitOpen, get_guard
+from weather.cache import TTLCache, make_key
+from weather.gazetteer import City, resolve_city
+from weather.singleflight import SingleFlight
 
-BASE_URL = "https://api.openweathermap.org/data/2.5"
+# Request tuning for OpenWeatherMap calls
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=4, sock_read=6)
+MAX_RETRIES = 3
 
-def get_current_weather(city: str = None, lat: float = None, lon: float = None) -> dict:
-    api_key = get_weather_api_key()
+log = logging.getLogger(__name__)
 
-    if city:
-        url = f"{BASE_URL}/weather?q={city}&appid={api_key}&units=metric"
-    elif lat is not None and lon is not None:
-        url = f"{BASE_URL}/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-    else:
-        print("❌ No valid city or coordinates provided.")
-        return None
+class WeatherClient:
+    """
+    asyncio-native OpenWeatherMap client.
+    Requests go through the bot-wide HTTPService (keep-alive, DNS cache) and
+    transient failures are retried with backoff.
+    """
 
-    try:
-        response = requests.get(url)
-        data = response.json()
-        if response.status_code == 200:
-            return data
-        else:
-            print(f"❌ Error fetching current weather: {data.get('message', 'Unknown error')}")
+    def __init__(self, http: HTTPService | None = None):
+        self._http = http
+
+    @property
+    def http(self) -> HTTPService:
+        return self._http or get_http_service()
+
+    async def _request(self, endpoint: str, params: dict, label: str) -> dict | None:
+        with log_context(upstream="openweathermap", endpoint=endpoint):
+            return await self._guarded_request(endpoint, params, label)
+
+    async def _guarded_request(self, endpoint: str, params: dict, label: str) -> dict | None:
+        guard = get_guard("openweathermap")
+        if not guard.allow():
+            log.warning("Skipped %s request, circuit is open", label)
+            return None
+
+        limiter = get_limiter("openweathermap", params["appid"])
+        try:
+            await limiter.acquire()
+        except RateLimitTimeout as e:
+            log.warning("Skipped %s request, quota exhausted: %s", label, e)
             return None
-    except Exception as e:
-        print(f"❌ Exception occurred while fetching current weather: {e}")
+
+        started = time.perf_counter()
+        try:
+            status, data = await guard.call(
+                lambda: self.http.get_json(
+                    f"{get_upstream_url('openweathermap')}/{endpoint}", params=params, retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT,
+                    before_retry=limiter.acquire  # retries count against the quota too
+                ),
+                is_failure=lambda result: result[0] >= 500,
+                can_hedge=limiter.try_acquire,
+            )
+        except CircuitOpen as e:
+            log.warning("Skipped %s request: %s", label, e)
+            return None
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log.error("Request for %s failed: %r", label, e)
+            return None
+
+        latency_ms = round((time.perf_counter() - started) * 1000)
+        if status == 200:
+            log.debug("Fetched %s", label, extra={"context": {"latency_ms": latency_ms}})
+            return data
+
+        message = data.get('message', 'Unknown error') if isinstance(data, dict) else f"HTTP {status}"
+        log.error("Error fetching %s: %s", label, message, extra={"context": {"status": status, "latency_ms": latency_ms}})
         return None
 
+    async def current_weather(self, city: str = None, lat: float = None, lon: float = None) -> dict | None:
+        params = build_params(city, lat, lon)
+        if params is None:
+            return None
+        return await self._request("weather", params, "current weather")
 
-def get_forecast(city: str = None, lat: float = None, lon: float = None) -> dict:
+    async def forecast(self, city: str = None, lat: float = None, lon: float = None) -> dict | None:
+        params = build_params(city, lat, lon)
+        if params is None:
+            return None
+        return await self._request("forecast", params, "forecast")
+
+def build_params(city: str = None, lat: float = None, lon: float = None) -> dict | None:
     """
-    Fetches 5-day/3-hour weather forecast by city name or coordinates.
-    Returns JSON response or None if failed.
+    Builds the OpenWeatherMap query parameters for a city name or a coordinate pair.
     """
-    api_key = get_weather_api_key()
+    params = {"appid": get_weather_api_key(), "units": "metric"}
 
     if city:
-        url = f"{BASE_URL}/forecast?q={city}&appid={api_key}&units=metric"
+        params["q"] = city
     elif lat is not None and lon is not None:
-        url = f"{BASE_URL}/forecast?lat={lat}&lon={lon}&appid={api_key}&units=metric"
+        params["lat"] = lat
+        params["lon"] = lon
     else:
-        print("❌ No valid city or coordinates provided.")
+        log.warning("No valid city or coordinates provided.")
         return None
 
-    try:
-        response = requests.get(url)
-        data = response.json()
-        if response.status_code == 200:
-            return data
-        else:
-            print(f"❌ Error fetching forecast: {data.get('message', 'Unknown error')}")
-            return None
-    except Exception as e:
-        print(f"❌ Exception occurred while fetching forecast: {e}")
-        return None
+    return params
+
+# -----------------------------
+# 🗃️ RESPONSE CACHES
+# -----------------------------
+
+# OpenWeatherMap refreshes current conditions roughly every 10 minutes and forecasts every 3 hours
+current_cache = TTLCache(ttl=600, stale_ttl=1200, max_entries=512, name="weather.current")
+forecast_cache = TTLCache(ttl=1800, stale_ttl=3600, max_entries=256, name="weather.forecast")
+
+# Identical lookups that miss the cache at the same time share one upstream request
+flights = SingleFlight()
+
+def cache_stats() -> list[dict]:
+    return [current_cache.stats(), forecast_cache.stats()]
+
+# -----------------------------
+# 🌐 SHARED CLIENT
+# -----------------------------
+
+_client: WeatherClient | None = None
+
+def get_client() -> WeatherClient:
+    global _client
+    if _client is None:
+        _client = WeatherClient()
+    return _client
+
+def resolve_location(city: str = None, lat: float = None, lon: float = None) -> tuple[str | None, float | None, float | None, City | None]:
+    """
+    Maps a free-text city onto gazetteer coordinates so every spelling of a known city
+    shares one upstream query and one cache entry. Unknown names fall through unchanged.
+    Returns (city, lat, lon, place).
+    """
+    if city:
+        place = resolve_city(city)
+        if place:
+            return None, place.lat, place.lon, place
+        return city.strip(), None, None, None
+    return None, lat, lon, None
+
+async def fetch_current_weather(city: str = None, lat: float = None, lon: float = None) -> dict | None:
+    """
+    Fetches current weather by city name or coordinates without blocking the event loop.
+    Served from the TTL cache when possible.
+    """
+    city, lat, lon, place = resolve_location(city, lat, lon)
+    key = make_key("current", city, lat, lon)
+
+    async def fetch():
+        data = await get_client().current_weather(city=city, lat=lat, lon=lon)
+        if data and place:
+            data["name"] = place.name
+        return data
+
+    if key is None:
+        return await fetch()
+    data = await current_cache.get_or_fetch(key, lambda: flights.do(key, fetch))
+    # Upstream down or circuit open: the last known value beats an error
+    return data if data is not None else current_cache.peek(key)
+
+async def fetch_forecast(city: str = None, lat: float = None, lon: float = None) -> dict | None:
+    """
+    Fetches 5-day/3-hour weather forecast by city name or coordinates without blocking the event loop.
+    Served from the TTL cache when possible.
+    """
+    city, lat, lon, place = resolve_location(city, lat, lon)
+    key = make_key("forecast", city, lat, lon)
+
+    async def fetch():
+        data = await get_client().forecast(city=city, lat=lat, lon=lon)
+        if data and place and "city" in data:
+            data["city"]["name"] = place.name
+        return data
+
+    if key is None:
+        return await fetch()
+    data = await forecast_cache.get_or_fetch(key, lambda: flights.do(key, fetch))
+    return data if data is not None else forecast_cache.peek(key)
+
+async def fetch_weather_bundle(city: str = None, lat: float = None, lon: float = None) -> tuple[dict | None, dict | None]:
+    """
+    Fetches current weather and forecast concurrently.
+    Returns a (current, forecast) tuple; either item is None if its lookup failed.
+    """
+    current, forecast = await asyncio.gather(
+        fetch_current_weather(city=city, lat=lat, lon=lon),
+        fetch_forecast(city=city, lat=lat, lon=lon),
+        return_exceptions=True,
+    )
+    if isinstance(current, BaseException):
+        log.error("Fetching current weather failed: %r", current)
+        current = None
+    if isinstance(forecast, BaseException):
+        log.error("Fetching forecast failed: %r", forecast)
+        forecast = None
+    return current, forecast
+
+async def fetch_current_weather_many(locations: list[str | tuple[float, float]], concurrency: int = 4) -> list[tuple[str | tuple[float, float], dict | None]]:
+    """
+    Fetches current weather for several cities, each a name or a (lat, lon) pair, with at most
+    `concurrency` lookups in flight. Cached cities are answered from the cache; a failed city
+    yields None instead of failing the batch. Results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_one(location: str | tuple[float, float]) -> tuple[str | tuple[float, float], dict | None]:
+        async with semaphore:
+            try:
+                if isinstance(location, tuple):
+                    return location, await fetch_current_weather(lat=location[0], lon=location[1])
+                return location, await fetch_current_weather(city=location)
+            except Exception:
+                log.exception("Fetching current weather for %s failed", location)
+                return location, None
+
+    return await asyncio.gather(*(fetch_one(location) for location in locations))
+
+# -----------------------------
+# 🧵 SYNC WRAPPERS (scripts only)
+# -----------------------------
+
+async def _fetch_once(method: str, **kwargs) -> dict | None:
+    async with HTTPService() as http:
+        return await getattr(WeatherClient(http), method)(**kwargs)
+
+def get_current_weather(city: str = None, lat: float = None, lon: float = None) -> dict:
+    """
+    Blocking wrapper around the async client, for scripts outside the bot's event loop.
+    """
+    return asyncio.run(_fetch_once("current_weather", city=city, lat=lat, lon=lon))
+
+def get_forecast(city: str = None, lat: float = None, lon: float = None) -> dict:
+    """
+    Fetches 5-day/3-hour weather forecast by city name or coordinates.
+    Blocking wrapper around the async client; returns JSON response or None if failed.
+    """
+    return asyncio.run(_fetch_once("forecast", city=city, lat=lat, lon=lon))
@@ -0,0 +1,117 @@
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple
+
+IST_OFFSET = 19800  # seconds; used when the payload carries no city timezone
+SECONDS_PER_DAY = 86400
+
+class DaySummary(NamedTuple):
+    day_start: int  # UTC timestamp of local midnight
+    temp_min: float
+    temp_max: float
+    temp_mean: float
+    humidity_mean: float
+    rain_chance: float  # highest precipitation probability of the day, 0..1
+    condition_id: int  # most frequent OpenWeatherMap condition code
+    slots: int
+
+class ForecastSeries:
+    """
+    Columnar view of an OpenWeatherMap 5-day/3-hour forecast.
+    The payload is walked once; every column is a packed array indexed by slot.
+    """
+
+    __slots__ = (
+        "city", "tz_offset", "timestamps", "temps", "temp_mins", "temp_maxs",
+        "humidity", "pop", "condition_ids", "conditions",
+    )
+
+    def __init__(self, city: str, tz_offset: int):
+        self.city = city
+        self.tz_offset = tz_offset
+        self.timestamps = array("q")
+        self.temps = array("f")
+        self.temp_mins = array("f")
+        self.temp_maxs = array("f")
+        self.humidity = array("B")
+        self.pop = array("f")
+        self.condition_ids = array("H")
+        self.conditions: dict[int, tuple[str, str]] = {}  # condition id -> (main, description)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def from_payload(cls, data: dict) -> "ForecastSeries":
+        city = data.get("city", {})
+        series = cls(city.get("name", ""), city.get("timezone", IST_OFFSET))
+        conditions = series.conditions
+
+        for entry in data.get("list", []):
+            main = entry["main"]
+            weather = entry["weather"][0]
+            series.timestamps.append(entry["dt"])
+            series.temps.append(main["temp"])
+            series.temp_mins.append(main.get("temp_min", main["temp"]))
+            series.temp_maxs.append(main.get("temp_max", main["temp"]))
+            series.humidity.append(main["humidity"])
+            series.pop.append(entry.get("pop", 0.0))
+            series.condition_ids.append(weather["id"])
+            if weather["id"] not in conditions:
+                conditions[weather["id"]] = (weather["main"], weather["description"])
+
+        return series
+
+    def condition(self, index: int) -> tuple[str, str]:
+        return self.conditions[self.condition_ids[index]]
+
+    def daily(self, days: int = 5) -> list[DaySummary]:
+        """
+        Aggregates the slots into per-day summaries in the city's local time, in one pass.
+        """
+        summaries = []
+        offset = self.tz_offset
+        n = len(self.timestamps)
+        start = 0
+
+        while start < n and len(summaries) < days:
+            day = (self.timestamps[start] + offset) // SECONDS_PER_DAY
+            end = start
+            while end < n and (self.timestamps[end] + offset) // SECONDS_PER_DAY == day:
+                end += 1
+
+            temps = self.temps[start:end]
+            humidity = self.humidity[start:end]
+            codes = self.condition_ids[start:end]
+            summaries.append(DaySummary(
+                day_start=day * SECONDS_PER_DAY - offset,
+                temp_min=min(self.temp_mins[start:end]),
+                temp_max=max(self.temp_maxs[start:end]),
+                temp_mean=sum(temps) / len(temps),
+                humidity_mean=sum(humidity) / len(humidity),
+                rain_chance=max(self.pop[start:end]),
+                condition_id=max(set(codes), key=codes.count),
+                slots=end - start,
+            ))
+            start = end
+
+        return summaries
+
+# Cached forecast payloads are shared between requests, so parse each one only once
+_parsed: OrderedDict = OrderedDict()  # id(payload) -> (payload, series)
+_PARSED_MAX = 64
+
+def series_for(data: dict) -> ForecastSeries:
+    """
+    Returns the ForecastSeries for a payload, reusing the previous parse of the same object.
+    """
+    entry = _parsed.get(id(data))
+    if entry is not None and entry[0] is data:
+        _parsed.move_to_end(id(data))
+        return entry[1]
+
+    series = ForecastSeries.from_payload(data)
+    _parsed[id(data)] = (data, series)
+    while len(_parsed) > _PARSED_MAX:
+        _parsed.popitem(last=False)
+    return series
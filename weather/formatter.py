@@ -1,6 +1,64 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
+import discord
 import pytz
 
+from weather.forecast import ForecastSeries, series_for
+
+# -----------------------------
+# 📋 PRECOMPUTED TABLES
+# -----------------------------
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Checked in order as substrings, so "thunderstorm with rain" is a storm and "light drizzle" isn't plain rain
+WEATHER_EMOJI = (
+    ("thunder", "⛈️"),
+    ("drizzle", "🌦️"),
+    ("rain", "🌧️"),
+    ("snow", "❄️"),
+    ("clear", "☀️"),
+    ("cloud", "☁️"),
+    ("mist", "🌫️"),
+    ("fog", "🌫️"),
+    ("haze", "🌫️"),
+    ("smoke", "🚬"),
+    ("dust", "🏜️"),
+    ("sand", "🏜️"),
+    ("wind", "🌪️"),
+    ("tornado", "🌪️"),
+)
+DEFAULT_WEATHER_EMOJI = "🌡️"
+
+# (API key, label, emoji, unit) for the AQI pollutant breakdown
+POLLUTANTS = (
+    ("PM2.5", "PM2.5", "🟤", "μg/m³"),
+    ("PM10", "PM10", "⚪", "μg/m³"),
+    ("CO", "CO", "🟡", "ppb"),
+    ("SO2", "SO₂", "🔴", "ppb"),
+    ("NO2", "NO₂", "🔵", "ppb"),
+    ("O3", "O₃", "🟢", "ppb"),
+)
+
+AQI_BANDS = (
+    (50, "🟢 Good", "Air quality is excellent."),
+    (100, "🟡 Moderate", "Safe for most, but limit long outdoor exposure if sensitive."),
+    (150, "🟠 Unhealthy for Sensitive Groups", "People with breathing issues should avoid long outdoor activity."),
+    (200, "🔴 Unhealthy", "Avoid extended outdoor exposure. Wear a mask if needed."),
+    (300, "🟣 Very Unhealthy", "Stay indoors and use an air purifier if possible."),
+)
+AQI_HAZARDOUS = ("⚫ Hazardous", "Avoid outdoor activity. Seek medical help if symptoms appear.")
+
+ICON_URL = "https://openweathermap.org/img/wn/{}@2x.png"
+OWM_FOOTER = "Powered by OpenWeatherMap"
+
+# Static parts of every embed we render; copied and filled in per call
+WEATHER_EMBED_TEMPLATE = {
+    "type": "rich",
+    "color": discord.Color.blurple().value,
+    "footer": {"text": OWM_FOOTER},
+}
+
 # -----------------------------
 # 📦 WEATHER FORMATTERS
 # -----------------------------
@@ -32,24 +90,67 @@ def format_current_weather(data: dict) -> str:
         f"> 🕒 Last updated: `{timestamp_to_datetime(data['dt'])}`"
     )
 
-def format_forecast(data: dict, count: int = 3) -> str:
+def format_forecast(data: dict | ForecastSeries, count: int = 3, mode: str = "slots") -> str:
     """
-    Formats forecast data for the next few intervals.
+    Formats forecast data for the next few intervals,
+    or a per-day summary of the next `count` days when mode is "daily".
     """
-    if not data or "list" not in data:
+    if not data or (isinstance(data, dict) and "list" not in data):
         return "⚠️ Unable to retrieve forecast data."
 
+    series = data if isinstance(data, ForecastSeries) else series_for(data)
+    if mode == "daily":
+        return format_daily_forecast(series, days=count)
+
     lines = ["**📅 Forecast Snapshot:**"]
-    for entry in data["list"][:count]:
-        time = timestamp_to_time(entry["dt"])
-        temp = entry["main"]["temp"]
-        humidity = entry["main"]["humidity"]
-        description = entry["weather"][0]["description"].capitalize()
-        emoji = get_weather_emoji(entry["weather"][0]["main"])
-        lines.append(f"> {emoji} **{time}** — `{temp}°C`, `{humidity}%` humidity, {description}")
+    for i in range(min(count, len(series))):
+        time = timestamp_to_time(series.timestamps[i])
+        main, description = series.condition(i)
+        emoji = get_weather_emoji(main)
+        lines.append(
+            f"> {emoji} **{time}** — `{round(series.temps[i], 2)}°C`, `{series.humidity[i]}%` humidity, "
+            f"{description.capitalize()}"
+        )
 
     return "\n".join(lines)
 
+def format_daily_forecast(series: ForecastSeries, days: int = 5) -> str:
+    """
+    Formats daily min/max/mean temperature and rain chance for the next few days.
+    """
+    summaries = series.daily(days)
+    if not summaries:
+        return "⚠️ Unable to retrieve forecast data."
+
+    lines = [f"**📆 {len(summaries)}-Day Outlook:**"]
+    for day in summaries:
+        label = datetime.fromtimestamp(day.day_start + series.tz_offset, timezone.utc).strftime("%a %d %b")
+        main, description = series.conditions[day.condition_id]
+        emoji = get_weather_emoji(main)
+        lines.append(
+            f"> {emoji} **{label}** — `{day.temp_min:.0f}°C` / `{day.temp_max:.0f}°C` "
+            f"(avg `{day.temp_mean:.1f}°C`), 💧 `{day.rain_chance:.0%}` rain chance, {description.capitalize()}"
+        )
+
+    return "\n".join(lines)
+
+def format_comparison_table(rows: list[tuple[str, dict]]) -> str:
+    """
+    Renders (city, current weather) pairs as a monospace table for an embed description.
+    """
+    lines = [f"{'City':<14}{'Temp':>6}{'Feels':>7}{'Hum':>5}{'Wind':>9}  Conditions"]
+    for _, data in rows:
+        main = data['main']
+        lines.append(
+            f"{data['name'][:13]:<14}"
+            f"{round(main['temp']):>5}°"
+            f"{round(main['feels_like']):>6}°"
+            f"{main['humidity']:>4}%"
+            f"{data['wind']['speed']:>5.1f} m/s"
+            f"  {get_weather_emoji(data['weather'][0]['description'])} {data['weather'][0]['main']}"
+        )
+    return "```\n" + "\n".join(lines) + "\n```"
+
 def generate_weather_tip(data: dict) -> str:
     """
     Provides context-aware weather advice.
@@ -77,55 +178,97 @@ def generate_weather_tip(data: dict) -> str:
 
     return "💡 **Pro Tip:** " + " ".join(tips) if tips else ""
 
+@lru_cache(maxsize=256)
 def get_weather_emoji(condition: str) -> str:
     """
-    Maps weather conditions to corresponding emojis.
+    Maps a weather condition or description (e.g. "Rain", "broken clouds") to an emoji.
     """
     condition = condition.lower()
-    return {
-        "clear": "☀️",
-        "cloud": "☁️",
-        "rain": "🌧️",
-        "thunder": "⛈️",
-        "drizzle": "🌦️",
-        "snow": "❄️",
-        "mist": "🌫️",
-        "fog": "🌫️",
-        "haze": "🌫️",
-        "smoke": "🚬",
-        "dust": "🏜️",
-        "sand": "🏜️",
-    }.get(condition, "🌡️")
+    for keyword, emoji in WEATHER_EMOJI:
+        if keyword in condition:
+            return emoji
+    return DEFAULT_WEATHER_EMOJI
+
+# -----------------------------
+# 🧩 EMBED BUILDERS
+# -----------------------------
+
+def _embed(title: str, description: str, **extra) -> discord.Embed:
+    return discord.Embed.from_dict({**WEATHER_EMBED_TEMPLATE, "title": title, "description": description, **extra})
+
+def build_weather_embed(current: dict) -> discord.Embed:
+    """
+    Builds the current-weather embed used by /weather and scheduled reports.
+    """
+    main = current['main']
+    weather = current['weather'][0]
+    condition = weather['description']
+    emoji = get_weather_emoji(condition)
+    visibility_km = current.get('visibility', 0) / 1000
+
+    weather_desc = (
+        f"{emoji} **{condition.title()}**\n"
+        f"🌡️ Temp: `{round(main['temp'])}°C` | Feels like: `{round(main['feels_like'])}°C`\n"
+        f"💧 Humidity: `{main['humidity']}%` | 💨 Wind: `{current['wind']['speed']} m/s`\n"
+        f"🧭 Pressure: `{main['pressure']} hPa` | 👁️ Visibility: `{visibility_km} km`\n"
+        f"🕒 Last updated: `{timestamp_to_ist_label(current['dt'])}`"
+    )
+
+    return _embed(
+        f"{emoji} Weather in {current['name']}",
+        f"{weather_desc}\n\n{generate_weather_tip(current)}",
+        thumbnail={"url": ICON_URL.format(weather['icon'])},
+    )
+
+def build_outlook_embed(forecast: dict, days: int = 5) -> discord.Embed:
+    """
+    Builds the multi-day outlook embed used by /forecast.
+    """
+    return _embed(
+        f"📆 {days}-Day Outlook for {forecast.get('city', {}).get('name', 'Unknown')}",
+        format_forecast(forecast, count=days, mode="daily"),
+    )
+
+def build_comparison_embed(found: list[tuple[str, dict]], failed: list[str]) -> discord.Embed:
+    """
+    Builds the multi-city table embed used by /weather cities:... and /weathercompare.
+    """
+    extra = {}
+    if failed:
+        extra["fields"] = [{
+            "name": "⚠️ Unavailable",
+            "value": ", ".join(f"`{name}`" for name in failed),
+            "inline": False,
+        }]
+    return _embed(f"🌍 Weather Comparison ({len(found)} cities)", format_comparison_table(found), **extra)
 
 # -----------------------------
 # 🕒 TIME UTILITIES (IST Support)
 # -----------------------------
 
+# Forecast slots and sunrise/sunset repeat across renders, so the strings are memoized
+
+@lru_cache(maxsize=2048)
 def timestamp_to_time(ts: int) -> str:
-    ist = pytz.timezone("Asia/Kolkata")
-    return datetime.fromtimestamp(ts, ist).strftime('%I:%M %p')
+    return datetime.fromtimestamp(ts, IST).strftime('%I:%M %p')
 
+@lru_cache(maxsize=1024)
 def timestamp_to_datetime(ts: int) -> str:
-    ist = pytz.timezone("Asia/Kolkata")
-    return datetime.fromtimestamp(ts, ist).strftime('%Y-%m-%d %I:%M %p')
+    return datetime.fromtimestamp(ts, IST).strftime('%Y-%m-%d %I:%M %p')
+
+@lru_cache(maxsize=1024)
+def timestamp_to_ist_label(ts: int) -> str:
+    return datetime.fromtimestamp(ts, IST).strftime("%b %d, %Y | %I:%M %p IST")
 
 # -----------------------------
 # 🌫️ AIR QUALITY FORMATTERS
 # -----------------------------
 
 def get_aqi_level_and_tip(aqi: int) -> tuple[str, str]:
-    if aqi <= 50:
-        return ("🟢 Good", "Air quality is excellent.")
-    elif aqi <= 100:
-        return ("🟡 Moderate", "Safe for most, but limit long outdoor exposure if sensitive.")
-    elif aqi <= 150:
-        return ("🟠 Unhealthy for Sensitive Groups", "People with breathing issues should avoid long outdoor activity.")
-    elif aqi <= 200:
-        return ("🔴 Unhealthy", "Avoid extended outdoor exposure. Wear a mask if needed.")
-    elif aqi <= 300:
-        return ("🟣 Very Unhealthy", "Stay indoors and use an air purifier if possible.")
-    else:
-        return ("⚫ Hazardous", "Avoid outdoor activity. Seek medical help if symptoms appear.")
+    for upper, level, tip in AQI_BANDS:
+        if aqi <= upper:
+            return level, tip
+    return AQI_HAZARDOUS
 
 def format_air_quality(data: dict) -> str:
     if not data:
@@ -134,25 +277,6 @@ def format_air_quality(data: dict) -> str:
     aqi = data.get("overall_aqi", "N/A")
     level, tip = get_aqi_level_and_tip(aqi)
 
-    pollutants = {
-        "PM2.5": data.get("PM2.5", {}).get("concentration", "N/A"),
-        "PM10": data.get("PM10", {}).get("concentration", "N/A"),
-        "CO": data.get("CO", {}).get("concentration", "N/A"),
-        "SO₂": data.get("SO2", {}).get("concentration", "N/A"),
-        "NO₂": data.get("NO2", {}).get("concentration", "N/A"),
-        "O₃": data.get("O3", {}).get("concentration", "N/A"),
-    }
-
-    emoji_map = {
-        "PM2.5": "🟤", "PM10": "⚪", "CO": "🟡",
-        "SO₂": "🔴", "NO₂": "🔵", "O₃": "🟢"
-    }
-
-    unit_map = {
-        "PM2.5": "μg/m³", "PM10": "μg/m³",
-        "CO": "ppb", "SO₂": "ppb", "NO₂": "ppb", "O₃": "ppb"
-    }
-
     lines = [
         "**🌫️ Air Quality Overview**",
         f"> **AQI**: `{aqi}` — {level}",
@@ -161,9 +285,8 @@ def format_air_quality(data: dict) -> str:
         "**📊 Pollutant Breakdown:**"
     ]
 
-    for name, value in pollutants.items():
-        emoji = emoji_map.get(name, "🔸")
-        unit = unit_map.get(name, "")
-        lines.append(f"> {emoji} **{name}**: `{value} {unit}`")
+    for key, label, emoji, unit in POLLUTANTS:
+        value = data.get(key, {}).get("concentration", "N/A")
+        lines.append(f"> {emoji} **{label}**: `{value} {unit}`")
 
     return "\n".join(lines)
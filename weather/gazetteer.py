@@ -0,0 +1,140 @@
+import bisect
+import difflib
+import os
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "cities.tsv")
+
+# How close a misspelled name must be to a known one to be offered as an autocomplete suggestion
+FUZZY_CUTOFF = 0.8
+
+class City(NamedTuple):
+    id: str
+    name: str
+    country: str
+    lat: float
+    lon: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}, {self.country}"
+
+def normalize_name(name: str) -> str:
+    """
+    Accent-, case- and whitespace-insensitive form of a place name ("  São  Paulo" -> "sao paulo").
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.replace(".", " ").split()).casefold()
+
+class Gazetteer:
+    """
+    Offline city index built from the bundled cities.tsv.
+    Names and aliases are kept in one sorted array, so exact lookups and prefix
+    scans are both a binary search away.
+    """
+
+    def __init__(self, cities: list[City], aliases: dict[int, list[str]] | None = None):
+        self.cities = cities
+        self.by_id = {city.id: city for city in cities}
+
+        entries = set()
+        for index, city in enumerate(cities):
+            entries.add((normalize_name(city.name), index))
+            entries.add((normalize_name(city.id.replace("-", " ")), index))
+            for alias in (aliases or {}).get(index, []):
+                entries.add((normalize_name(alias), index))
+
+        ordered = sorted(entries)
+        self._keys = [key for key, _ in ordered]
+        self._indexes = [index for _, index in ordered]
+        self._distinct_keys = sorted(set(self._keys))
+
+    @classmethod
+    def load(cls, path: str = DATA_FILE) -> "Gazetteer":
+        cities, aliases = [], {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                city_id, name, country, lat, lon, alias_field = line.rstrip("\n").split("\t")
+                aliases[len(cities)] = [a for a in alias_field.split(",") if a]
+                cities.append(City(city_id, name, country, float(lat), float(lon)))
+        return cls(cities, aliases)
+
+    def __len__(self):
+        return len(self.cities)
+
+    def _exact(self, key: str, country: str | None = None) -> City | None:
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            city = self.cities[self._indexes[position]]
+            if country is None or city.country.casefold() == country:
+                return city
+            position += 1
+        return None
+
+    def resolve(self, query: str) -> City | None:
+        """
+        Resolves a free-text city name, alias, canonical ID or "Name, CC" to a City.
+        Only exact matches count: a real city missing from the gazetteer must not be swapped
+        for a similarly spelled one, so anything else returns None and is looked up upstream by name.
+        """
+        if not query:
+            return None
+
+        if query in self.by_id:
+            return self.by_id[query]
+
+        name, _, country = query.partition(",")
+        key = normalize_name(name)
+        country = normalize_name(country) or None
+        if not key:
+            return None
+
+        return self._exact(key, country)
+
+    def complete(self, prefix: str, limit: int = 25) -> list[City]:
+        """
+        Returns up to `limit` distinct cities whose name or alias starts with `prefix`.
+        With no prefix match, close spellings are suggested instead; they are only offered, never
+        substituted for what the user typed.
+        """
+        key = normalize_name(prefix)
+        if not key:
+            return self.cities[:limit]
+
+        results, seen = [], set()
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position].startswith(key):
+            index = self._indexes[position]
+            if index not in seen:
+                seen.add(index)
+                results.append(self.cities[index])
+                if len(results) >= limit:
+                    break
+            position += 1
+        if results:
+            return results
+
+        for close in difflib.get_close_matches(key, self._distinct_keys, n=limit, cutoff=FUZZY_CUTOFF):
+            index = self._indexes[bisect.bisect_left(self._keys, close)]
+            if index not in seen:
+                seen.add(index)
+                results.append(self.cities[index])
+        return results
+
+@lru_cache(maxsize=None)
+def get_gazetteer() -> Gazetteer:
+    """
+    Loads the bundled gazetteer on first use.
+    """
+    return Gazetteer.load()
+
+def resolve_city(query: str) -> City | None:
+    return get_gazetteer().resolve(query)
+
+def complete_city(prefix: str, limit: int = 25) -> list[City]:
+    return get_gazetteer().complete(prefix, limit)
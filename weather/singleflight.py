@@ -0,0 +1,34 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for `key` is running,
+    every other caller for the same key awaits the same future instead of starting its own.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}  # key -> asyncio.Future
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn):
+        """
+        Runs the `fn` coroutine function once per key at a time and returns its result to all waiters.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            # shield: one caller being cancelled must not cancel the shared upstream call
+            return await asyncio.shield(future)
+
+        self.calls += 1
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {"inflight": len(self._inflight), "calls": self.calls, "shared": self.shared}
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+from typing import NamedTuple
+
+from config import get_data_dir
+from weather.cache import COORD_PRECISION, normalize_city
+from weather.gazetteer import resolve_city
+
+MINUTES_PER_DAY = 1440
+
+class Subscription(NamedTuple):
+    id: int
+    guild_id: int
+    channel_id: int
+    city: str
+    local_minute: int  # minutes after local midnight, 0..1439
+    utc_offset: int  # seconds east of UTC for the city, as reported by OpenWeatherMap
+    created_by: int
+    # Where OpenWeatherMap placed the city when the report was added. Reports are fetched by
+    # these, so "London, CA" stays in Ontario; `city` is only shown. None on rows from before.
+    lat: float | None = None
+    lon: float | None = None
+    country: str | None = None
+
+    @property
+    def utc_minute(self) -> int:
+        return (self.local_minute - self.utc_offset // 60) % MINUTES_PER_DAY
+
+    @property
+    def local_time(self) -> str:
+        return f"{self.local_minute // 60:02d}:{self.local_minute % 60:02d}"
+
+    @property
+    def label(self) -> str:
+        return f"{self.city}, {self.country}" if self.country else self.city
+
+    @property
+    def location(self) -> str | tuple[float, float]:
+        """
+        What to fetch the report for: the saved coordinates, or the name on older rows.
+        """
+        return (self.lat, self.lon) if self.lat is not None and self.lon is not None else self.city
+
+    @property
+    def city_key(self) -> str:
+        """
+        Identical cities across guilds share this key, and with it one upstream fetch.
+        """
+        if self.lat is not None and self.lon is not None:
+            return f"{round(self.lat, COORD_PRECISION)},{round(self.lon, COORD_PRECISION)}"
+        place = resolve_city(self.city)
+        return place.id if place else normalize_city(self.city)
+
+def parse_local_time(value: str) -> int | None:
+    """
+    Parses "HH:MM" (24h) into minutes after midnight, or returns None if invalid.
+    """
+    hours, _, minutes = value.strip().partition(":")
+    if not (hours.isdigit() and minutes.isdigit()):
+        return None
+    hours, minutes = int(hours), int(minutes)
+    if 0 <= hours < 24 and 0 <= minutes < 60:
+        return hours * 60 + minutes
+    return None
+
+# -----------------------------
+# 💾 PERSISTENT STORE
+# -----------------------------
+
+class SubscriptionStore:
+    """
+    SQLite-backed store for scheduled weather reports. Calls are blocking;
+    run them through asyncio.to_thread from the event loop. The one connection is shared
+    by those worker threads, so every call holds a lock.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(get_data_dir(), "subscriptions.db")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS weather_subscriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                city TEXT NOT NULL,
+                local_minute INTEGER NOT NULL,
+                utc_offset INTEGER NOT NULL,
+                created_by INTEGER NOT NULL,
+                lat REAL,
+                lon REAL,
+                country TEXT
+            )
+            """
+        )
+        # Databases created before reports were fetched by coordinates
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(weather_subscriptions)")}
+        for column, kind in (("lat", "REAL"), ("lon", "REAL"), ("country", "TEXT")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE weather_subscriptions ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def all(self) -> list[Subscription]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, guild_id, channel_id, city, local_minute, utc_offset, created_by, lat, lon, country "
+                "FROM weather_subscriptions"
+            ).fetchall()
+        return [Subscription(*row) for row in rows]
+
+    def for_guild(self, guild_id: int) -> list[Subscription]:
+        return [sub for sub in self.all() if sub.guild_id == guild_id]
+
+    def add(self, guild_id: int, channel_id: int, city: str, local_minute: int, utc_offset: int, created_by: int,
+            lat: float | None = None, lon: float | None = None, country: str | None = None) -> Subscription:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO weather_subscriptions (guild_id, channel_id, city, local_minute, utc_offset, created_by, lat, lon, country) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, channel_id, city, local_minute, utc_offset, created_by, lat, lon, country),
+            )
+            self._conn.commit()
+        return Subscription(cursor.lastrowid, guild_id, channel_id, city, local_minute, utc_offset, created_by, lat, lon, country)
+
+    def remove(self, subscription_id: int, guild_id: int | None = None) -> bool:
+        with self._lock:
+            if guild_id is None:
+                cursor = self._conn.execute("DELETE FROM weather_subscriptions WHERE id = ?", (subscription_id,))
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM weather_subscriptions WHERE id = ? AND guild_id = ?", (subscription_id, guild_id)
+                )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def update_offset(self, subscription_id: int, utc_offset: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE weather_subscriptions SET utc_offset = ? WHERE id = ?", (utc_offset, subscription_id)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# -----------------------------
+# ⏰ TIMER WHEEL
+# -----------------------------
+
+class ReportWheel:
+    """
+    One slot per UTC minute of the day. Every subscription due in the same minute lands
+    in the same slot, so the scheduler wakes once per minute and handles them as a batch.
+    """
+
+    def __init__(self, subscriptions: list[Subscription] = ()):
+        self._slots: list[dict[int, Subscription]] = [{} for _ in range(MINUTES_PER_DAY)]
+        self._minute_of: dict[int, int] = {}  # subscription id -> slot
+        for sub in subscriptions:
+            self.add(sub)
+
+    def __len__(self):
+        return len(self._minute_of)
+
+    def add(self, sub: Subscription):
+        self.remove(sub.id)
+        self._slots[sub.utc_minute][sub.id] = sub
+        self._minute_of[sub.id] = sub.utc_minute
+
+    def remove(self, subscription_id: int):
+        minute = self._minute_of.pop(subscription_id, None)
+        if minute is not None:
+            self._slots[minute].pop(subscription_id, None)
+
+    def due(self, utc_minute: int) -> dict[str, list[Subscription]]:
+        """
+        Returns the subscriptions due at `utc_minute`, grouped by city key.
+        """
+        groups: dict[str, list[Subscription]] = {}
+        for sub in self._slots[utc_minute % MINUTES_PER_DAY].values():
+            groups.setdefault(sub.city_key, []).append(sub)
+        return groups